@@ -0,0 +1,10 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: __init__.py
+@brief: GUI-free calculation core of the Battery Life Calculator.
+
+@license: MIT License
+================================================================================
+"""
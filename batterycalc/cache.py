@@ -0,0 +1,332 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: cache.py
+@brief: Memoization of runtime results and of whole batch chunks with LRU
+        eviction and an optional on-disk store.
+
+@details:
+    RuntimeCache wraps calculate_runtime and the three per-mode functions of
+    engine.py. Results are keyed on the normalized input values: arguments
+    are bound to the function signature (so positional and keyword calls
+    share an entry) and numbers are keyed on their exact float value, since
+    the solver resolves runtimes to the hour and nearby inputs can differ by
+    one. The on-disk store writes floats in hex, so they round-trip. A CSV
+    battery profile is keyed on its path, modification time and size (see
+    discharge.profile_key), so results of an edited file are not reused.
+    With the closed-form solver a lookup costs more than solving the row,
+    so RuntimeCache only pays off for the hourly reference solver.
+
+    ChunkCache stores the output rows and errors of a whole chunk of the
+    batch mode, keyed on the modes and the exact inputs of its scenarios
+    (not on their numbers). One lookup replaces the calculation of the
+    whole chunk, and the on-disk store writes one entry per chunk, so
+    running the same input files again (--cache) reads the results instead
+    of calculating them.
+
+    Both caches hold at most `maxsize` entries in memory and evict the least
+    recently used one. If a `path` is given, entries are also stored in an
+    SQLite database; flush() commits them in one transaction, which the
+    batch mode does after every chunk.
+
+@license: MIT License
+================================================================================
+"""
+
+import hashlib
+import inspect
+import json
+import marshal
+import threading
+from collections import OrderedDict
+
+from batterycalc import engine
+
+# Bump when the calculation changes, so stale on-disk results are not reused
+CACHE_VERSION = 3
+
+## @brief Normalizes a number so that equal inputs produce equal keys.
+#  @param value Input value.
+#  @return Exact float value of a number (ints converted, -0.0 as 0.0), non-numbers unchanged.
+def _normalize(value):
+    """Normalizes a number so that equal inputs produce equal keys."""
+    if value.__class__ is float or value.__class__ is int:
+        return float(value) if value else 0.0
+    return value
+
+## @brief Encodes a key for the on-disk store.
+#  @param key Normalized key tuple.
+#  @return JSON text with every float written in hex, so it round-trips exactly.
+def _db_key(key):
+    """Encodes a key as JSON text with exact floats."""
+    def encode(value):
+        if value.__class__ is float:
+            return value.hex()
+        if value.__class__ is tuple:
+            return [encode(v) for v in value]
+        return value
+    return json.dumps([CACHE_VERSION] + [encode(v) for v in key])
+
+## @brief Keys a battery profile on its version, so edited CSV files are not served from the cache.
+#  @param name Name of the battery profile.
+#  @return The name, or a tuple of the path, modification time and size of a CSV file.
+def _profile_key(name):
+    """Keys a battery profile on its version, see discharge.profile_key."""
+    from batterycalc.discharge import profile_key  # profiles are only loaded when used
+
+    return profile_key(name)
+
+## @brief Bounded LRU store with hit/miss counters and an optional SQLite table.
+class _CacheStore:
+    """Bounded LRU store with an optional on-disk table."""
+
+    # SQLite table of the on-disk store and the type of its values
+    _table = None
+    _value_type = 'TEXT'
+
+    ## @brief Creates the store.
+    #  @param maxsize Maximum number of entries held in memory.
+    #  @param path Optional path of an SQLite database for persistent entries.
+    def __init__(self, maxsize, path=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self._pending_writes = 0
+        if path is not None:
+            import sqlite3  # only needed for the on-disk store
+
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # One commit per flush; with a write-ahead log it does not wait for a full sync
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {self._table} (key TEXT PRIMARY KEY, value {self._value_type} NOT NULL)")
+            self._db.commit()
+
+    ## @brief Encodes a key for the on-disk store.
+    #  @param key Normalized key tuple.
+    #  @return Text key of the SQLite table.
+    def _encode_key(self, key):
+        """Encodes a key for the on-disk store."""
+        return _db_key(key)
+
+    ## @brief Encodes a value for the on-disk store.
+    #  @param value Value as returned by the computation.
+    #  @return JSON text of the value.
+    def _encode_value(self, value):
+        """Encodes a value for the on-disk store."""
+        return json.dumps(value)
+
+    ## @brief Decodes a value read from the on-disk store.
+    #  @param value Value as stored by _encode_value().
+    #  @return Value as returned by the computation.
+    def _decode_value(self, value):
+        """Decodes a value read from the on-disk store."""
+        return tuple(json.loads(value))
+
+    ## @brief Returns the cached value of a key, computing and storing it on a miss.
+    #  @param key Normalized key tuple.
+    #  @param compute Function without arguments that computes the value.
+    #  @return Cached or computed value.
+    def _lookup(self, key, compute):
+        """Returns the cached value of a key, computing and storing it on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is not None:
+                db_key = self._encode_key(key)
+                row = self._db.execute(f"SELECT value FROM {self._table} WHERE key = ?", (db_key,)).fetchone()
+                if row is not None:
+                    value = self._decode_value(row[0])
+                    self.disk_hits += 1
+                    self._store(key, value)
+                    return value
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._store(key, value)
+            if self._db is not None:
+                self._db.execute(f"INSERT OR REPLACE INTO {self._table} (key, value) VALUES (?, ?)", (db_key, self._encode_value(value)))
+                self._pending_writes += 1
+                if self._pending_writes >= 1000:
+                    self.flush()
+        return value
+
+    ## @brief Stores a value in memory and evicts the least recently used entries.
+    def _store(self, key, value):
+        """Stores a value in memory and evicts the least recently used entries."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    ## @brief Writes pending entries to the on-disk store in one transaction.
+    def flush(self):
+        """Commits pending entries to the on-disk store."""
+        with self._lock:
+            if self._db is not None and self._pending_writes:
+                self._db.commit()
+                self._pending_writes = 0
+
+    ## @brief Flushes and closes the on-disk store.
+    def close(self):
+        """Flushes and closes the on-disk store."""
+        with self._lock:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+    ## @brief Removes all entries from memory and resets the counters.
+    def clear(self):
+        """Removes all entries from memory and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    ## @brief Returns the cache counters.
+    #  @return Dictionary with size, maxsize, hits, disk_hits and misses.
+    def stats(self):
+        """Returns the cache counters."""
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._entries)
+
+## @brief Bounded LRU cache of runtime results with hit/miss counters.
+class RuntimeCache(_CacheStore):
+    """Bounded LRU cache of runtime results with an optional on-disk store."""
+
+    _table = 'runtime_cache'
+
+    ## @brief Creates the cache.
+    #  @param maxsize Maximum number of entries held in memory.
+    #  @param path Optional path of an SQLite database for persistent results.
+    def __init__(self, maxsize=65536, path=None):
+        super().__init__(maxsize, path)
+        self.calculate_runtime = self._wrap(engine.calculate_runtime)
+        self.calculate_battery_life_always_on = self._wrap(engine.calculate_battery_life_always_on)
+        self.calculate_battery_life_log_mode = self._wrap(engine.calculate_battery_life_log_mode)
+        self.calculate_battery_life_sleep_mode = self._wrap(engine.calculate_battery_life_sleep_mode)
+        self._mode_functions = {
+            engine.calculate_battery_life_always_on: self.calculate_battery_life_always_on,
+            engine.calculate_battery_life_log_mode: self.calculate_battery_life_log_mode,
+            engine.calculate_battery_life_sleep_mode: self.calculate_battery_life_sleep_mode,
+        }
+    ## @brief Cached version of engine.calculate_scenario.
+    #  @param scenario Scenario with the input values.
+    #  @param mode One of engine.MODES.
+    #  @return Runtime values in minutes, hours, and days.
+    def calculate_scenario(self, scenario, mode):
+        """Calculates the runtime of a scenario, reusing cached results."""
+        func, args, kwargs = engine.mode_call(scenario, mode)
+        return self._mode_functions[func](*args, **kwargs)
+
+    ## @brief Wraps a function so its results are looked up in the cache first.
+    #  @param func Function of engine.py to wrap.
+    #  @return Wrapper with the same signature.
+    def _wrap(self, func):
+        """Wraps a function so its results are looked up in the cache first."""
+        signature = inspect.signature(func)
+        names = [name for name in signature.parameters if name != 'solver']
+        defaults = {name: p.default for name, p in signature.parameters.items()
+                    if p.default is not p.empty and name != 'solver'}
+        uses_solver = 'solver' in signature.parameters
+        profile_index = names.index('battery_profile') + 1 if 'battery_profile' in names else None
+        tag = func.__name__
+
+        def wrapper(*args, **kwargs):
+            if 'solver' in kwargs:
+                raise TypeError(f"{tag}() of the cache does not accept a solver, it always uses the cached calculate_runtime")
+            if len(args) > len(names) or not kwargs.keys() <= defaults.keys() | set(names[len(args):]):
+                signature.bind(*args, **kwargs)  # raises the usual TypeError
+            try:
+                values = args + tuple(kwargs[name] if name in kwargs else defaults[name] for name in names[len(args):])
+            except KeyError as e:
+                raise TypeError(f"{tag}() missing required argument: {e.args[0]!r}") from None
+            key = (tag,) + tuple(_normalize(v) for v in values)
+            if profile_index is not None and key[profile_index] != engine.IDEAL_PROFILE:
+                key = key[:profile_index] + (_profile_key(key[profile_index]),) + key[profile_index + 1:]
+            if uses_solver:
+                return self._lookup(key, lambda: func(*values, solver=self.calculate_runtime))
+            return self._lookup(key, lambda: func(*values))
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__signature__ = signature
+        return wrapper
+
+## @brief Bounded LRU cache of the results of whole batch chunks.
+class ChunkCache(_CacheStore):
+    """Bounded LRU cache of chunk results with an optional on-disk store."""
+
+    _table = 'chunk_cache'
+    _value_type = 'BLOB'
+
+    ## @brief Creates the cache.
+    #  @param maxsize Maximum number of chunks held in memory.
+    #  @param path Optional path of an SQLite database for persistent results.
+    def __init__(self, maxsize=16, path=None):
+        super().__init__(maxsize, path)
+
+    ## @brief Returns the results of a chunk, calculating it on a miss.
+    #  @param numbered_scenarios Sequence of (scenario number, Scenario) pairs.
+    #  @param modes Modes to calculate.
+    #  @param calculate Uncached function with the signature of parallel.calculate_chunk.
+    #  @return Tuple of the output rows and the (scenario number, message) errors.
+    def calculate_chunk(self, numbered_scenarios, modes, calculate):
+        """Returns the results of a chunk, calculating it on a miss."""
+        numbers = [number for number, _ in numbered_scenarios]
+        scenarios = [scenario for _, scenario in numbered_scenarios]
+        profiles = {}
+        key = [tuple(modes)]
+        for scenario in scenarios:
+            # Not normalized: equal numbers are equal keys in memory, on disk an int
+            # written for a float field only misses
+            values = tuple(vars(scenario).values())
+            profile = scenario.battery_profile
+            if profile != engine.IDEAL_PROFILE:
+                if profile not in profiles:
+                    profiles[profile] = _profile_key(profile)
+                values += (profiles[profile],)
+            key.append(values)
+        # Rows and errors are stored with the index of the scenario in the chunk
+        rows, errors = self._lookup(tuple(key), lambda: tuple(calculate(list(enumerate(scenarios)), modes)))
+        return ([(numbers[row[0]], *row[1:]) for row in rows],
+                [(numbers[index], message) for index, message in errors])
+
+    ## @brief Encodes a key for the on-disk store.
+    #  @param key Key tuple.
+    #  @return SHA-256 of the key in marshal format 2, which writes floats as
+    #          exact binary values; chunk keys are too long to store as text.
+    def _encode_key(self, key):
+        """Encodes a key as the SHA-256 of its exact binary form."""
+        return hashlib.sha256(marshal.dumps((CACHE_VERSION,) + key, 2)).hexdigest()
+
+    ## @brief Encodes the results of a chunk for the on-disk store.
+    #  @param value Tuple of the rows and the errors.
+    #  @return The value in marshal format 2, exact and much faster to read than JSON.
+    def _encode_value(self, value):
+        """Encodes the rows and errors of a chunk in marshal format."""
+        return marshal.dumps(value, 2)
+
+    ## @brief Decodes the results of a chunk read from the on-disk store.
+    #  @param value Value as stored by _encode_value().
+    #  @return Tuple of the rows and the errors.
+    def _decode_value(self, value):
+        """Decodes the rows and errors of a chunk read from the on-disk store."""
+        return marshal.loads(value)
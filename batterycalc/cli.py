@@ -0,0 +1,257 @@
+"""
+================================================================================
+Battery Life Calculator Command Line Interface
+--------------------------------------------------------------------------------
+@file: cli.py
+@brief: Headless batch calculation of scenarios read from CSV or JSONL.
+
+@details:
+    Each input record is one Scenario: the device settings plus one consumer
+    current and voltage. Columns (CSV) or keys (JSONL) are the Scenario field
+    names; missing fields take the default values of the GUI.
+
+    Scenarios are read, calculated and written in chunks, so only a few
+    chunks are held in memory at a time and arbitrarily large inputs can be
+    streamed. With --workers the chunks are calculated on a process pool
+    (see parallel.py); the output order does not depend on the worker count.
+    Each output row contains the scenario number (starting at 1), the mode,
+    the probe, the consumer current and voltage and the runtime in minutes,
+    hours and days.
+
+@usage:
+    batteryCalculator scenarios.csv -o results.csv
+    batteryCalculator scenarios.csv -o results.csv --workers 0 --chunk-size 5000 --stats
+    cat scenarios.jsonl | batteryCalculator - --input-format jsonl --mode "Log Mode"
+    batteryCalculator scenarios.csv -o results.csv --timings timings.json
+
+@license: MIT License
+================================================================================
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import deque
+from dataclasses import fields
+
+from batterycalc.engine import MODES, Scenario
+from batterycalc.timings import TIMINGS_ENV, timings
+
+FORMATS = ('csv', 'jsonl')
+
+OUTPUT_COLUMNS = ('scenario', 'mode', 'probe', 'consumer_current_ma', 'consumer_voltage_v',
+                  'runtime_min', 'runtime_h', 'runtime_d')
+
+_SCENARIO_TYPES = {f.name: f.type for f in fields(Scenario)}
+
+## @brief Builds a Scenario from a record read from CSV or JSONL.
+#  @param record Dictionary of field names to values, values may be strings,
+#         or a JSONL line holding such an object.
+#  @return Scenario with the record values and defaults for missing fields.
+def scenario_from_record(record):
+    """Builds a Scenario from a record, converting values to the field types."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"A JSONL line must hold an object, got {type(record).__name__}")
+    values = {}
+    for name, value in record.items():
+        if name not in _SCENARIO_TYPES:
+            raise ValueError(f"Unknown scenario field: {name!r}")
+        if value is None or value == '':
+            continue
+        values[name] = _convert(name, value)
+    return Scenario(**values)
+
+## @brief Converts a CSV or JSONL value to the type of a Scenario field.
+#  @param name Scenario field name.
+#  @param value Value as read, a string from CSV or a JSON value.
+#  @return Converted value; integer fields accept whole numbers only.
+def _convert(name, value):
+    """Converts a value to the field type, the same way for CSV strings and JSON numbers."""
+    field_type = _SCENARIO_TYPES[name]
+    if field_type is not int:
+        return field_type(value)
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)  # exact, also beyond 2**53
+        except ValueError:
+            pass
+    number = float(value)  # e.g. '1000.0', '1e3' or a JSON float
+    if not number.is_integer():
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    return int(number)
+
+## @brief Reads scenario records from a CSV or JSONL stream.
+#  @param stream Text stream to read from.
+#  @param fmt Input format, one of FORMATS.
+#  @return Iterator of records: dictionaries for CSV, the non-blank lines for
+#          JSONL, which scenario_from_record() parses, so a malformed line
+#          fails only its own scenario.
+def read_records(stream, fmt):
+    """Lazily reads scenario records from a CSV or JSONL stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream, skipinitialspace=True)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield line
+    else:
+        raise ValueError(f"Unknown input format: {fmt!r}")
+
+## @brief Writes result rows in CSV or JSONL format.
+class RowWriter:
+    """Writes result rows in CSV or JSONL format."""
+
+    def __init__(self, stream, fmt):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt!r}")
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self._csv = csv.writer(stream, lineterminator='\n')
+            self._csv.writerow(OUTPUT_COLUMNS)
+
+    def write_rows(self, rows):
+        """Writes a list of rows and flushes the stream."""
+        if self.fmt == 'csv':
+            self._csv.writerows(rows)
+        else:
+            self.stream.writelines(json.dumps(dict(zip(OUTPUT_COLUMNS, row))) + '\n' for row in rows)
+        self.stream.flush()
+
+## @brief Guesses the file format from the file extension.
+#  @param path File path, '-' for stdin/stdout.
+#  @return Format name, 'csv' if the extension is unknown.
+def _format_from_path(path):
+    """Guesses the file format from the file extension."""
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+## @brief Reads numbered scenarios from all inputs, one after the other.
+#  @param paths Input file paths, '-' for stdin.
+#  @param input_format Format of all inputs, or None to guess from the extension.
+#  @param errors List or deque collecting (scenario number, message) for invalid records.
+#  @return Iterator of (scenario number, Scenario) pairs.
+def _iter_scenarios(paths, input_format, errors):
+    """Reads numbered scenarios from all inputs and skips invalid records."""
+    number = 0
+    for path in paths:
+        fmt = input_format or _format_from_path(path)
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            for record in read_records(stream, fmt):
+                number += 1
+                try:
+                    yield number, scenario_from_record(record)
+                except (TypeError, ValueError) as e:
+                    errors.append((number, str(e)))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+## @brief Builds the argument parser of the batch mode.
+#  @return argparse.ArgumentParser instance.
+def build_parser():
+    """Builds the argument parser of the batch mode."""
+    parser = argparse.ArgumentParser(
+        prog='batteryCalculator',
+        description='Battery Life Calculator. Without input files the GUI is started; '
+                    'with input files the scenarios are calculated headless.')
+    parser.add_argument('inputs', nargs='*', metavar='INPUT',
+                        help="scenario files (CSV or JSONL), '-' reads from stdin")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, '-' writes to stdout (default)")
+    parser.add_argument('--input-format', choices=FORMATS,
+                        help='format of the inputs (default: from the file extension, csv for stdin)')
+    parser.add_argument('--output-format', choices=FORMATS,
+                        help='format of the output (default: from the file extension, csv for stdout)')
+    parser.add_argument('--mode', action='append', choices=MODES, dest='modes',
+                        help='mode to calculate, may be repeated (default: all modes)')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='number of scenarios calculated and written at once (default: 1000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes, 0 uses one per CPU (default: 1)')
+    parser.add_argument('--cache', metavar='PATH',
+                        help='SQLite file that keeps the results of each chunk between runs, so an unchanged '
+                             'chunk is read instead of calculated, enables caching')
+    parser.add_argument('--cache-size', type=int,
+                        help='maximum number of chunks cached in memory per process, enables caching '
+                             '(default: 16 if --cache is given, otherwise no caching)')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the throughput per worker to stderr')
+    parser.add_argument('--timings', metavar='PATH',
+                        help="time the stages of the GUI or the batch mode and write the timings at exit: "
+                             "'-' to stderr, *.prof as cProfile statistics, otherwise as JSON "
+                             f"(same as {TIMINGS_ENV}=PATH)")
+    return parser
+
+## @brief Runs the batch calculation.
+#  @param args Parsed arguments from build_parser().
+#  @return Process exit code, 1 if any scenario was invalid.
+def run_batch(args):
+    """Streams scenarios from the inputs through the calculation to the output."""
+    # Imported here, so starting the GUI does not load the process pool
+    from batterycalc.parallel import ParallelStats, run_parallel
+
+    if args.chunk_size < 1:
+        raise SystemExit("--chunk-size must be at least 1")
+    if args.workers < 0:
+        raise SystemExit("--workers must not be negative")
+    if args.cache_size is not None and args.cache_size < 1:
+        raise SystemExit("--cache-size must be at least 1")
+    cache_config = None
+    if args.cache or args.cache_size:
+        cache_config = (args.cache_size or 16, args.cache)
+    modes = tuple(args.modes) if args.modes else MODES
+    output_format = args.output_format or _format_from_path(args.output)
+    # Invalid records, in input order; reported with the chunk they belong to
+    invalid_records = deque()
+    error_count = 0
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        writer = RowWriter(out, output_format)
+        scenarios = _iter_scenarios(args.inputs, args.input_format, invalid_records)
+        stats = ParallelStats()
+        started = time.perf_counter()
+        for rows, chunk_errors in run_parallel(scenarios, modes, workers=args.workers or None,
+                                               chunk_size=args.chunk_size, stats=stats,
+                                               cache_config=cache_config):
+            # Reading and calculating a chunk, as far as this process waited for it
+            timings.add('calculate', time.perf_counter() - started, len(rows))
+            with timings.stage('write', len(rows)):
+                writer.write_rows(rows)
+            # Records are read ahead of the calculation, so only those up to this chunk are reported
+            last = max(rows[-1][0] if rows else 0, chunk_errors[-1][0] if chunk_errors else 0)
+            while invalid_records and invalid_records[0][0] <= last:
+                chunk_errors.append(invalid_records.popleft())
+            error_count += len(chunk_errors)
+            _report_errors(chunk_errors)
+            started = time.perf_counter()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    # Invalid records after the last valid scenario
+    error_count += len(invalid_records)
+    _report_errors(invalid_records)
+
+    if args.stats:
+        print(stats.report(), file=sys.stderr)
+    return 1 if error_count else 0
+
+## @brief Writes invalid scenarios to stderr.
+#  @param errors Iterable of (scenario number, message).
+def _report_errors(errors):
+    """Writes invalid scenarios to stderr, ordered by scenario number."""
+    for number, message in sorted(errors):
+        print(f"Scenario {number}: {message}", file=sys.stderr)
+    sys.stderr.flush()
@@ -0,0 +1,215 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: discharge.py
+@brief: Battery discharge-curve and temperature profiles as precompiled lookup tables.
+
+@details:
+    A profile describes the cell voltage over the delivered capacity, with
+    one discharge curve per temperature as in a datasheet. A curve ends at
+    the cut-off voltage, so at low temperatures it ends earlier and runs at
+    a lower voltage. The built-in profiles are typical low-drain curves of
+    Li-ion, lithium thionyl chloride (LiSOCl2) and alkaline cells; any other
+    curve can be read from a CSV file.
+
+    The runtime only needs two integrals of a curve, so every profile is
+    compiled once into a small lookup table over the temperature:
+        1. the charge factor: delivered charge / nominal capacity. A load
+           that is not on the booster is limited by the charge, the voltage
+           sag does not matter.
+        2. the energy factor: delivered energy / (nominal capacity * nominal
+           voltage). The booster draws constant power, so its battery
+           current rises as the voltage sags; the runtime is limited by the
+           energy, the integral of the voltage over the delivered charge.
+    The regulator assumption is the one of the ideal model: every load is
+    charged against capacity * battery voltage, and a profile only scales
+    that energy by its charge or energy factor. A profile whose factors are
+    1 therefore gives the same runtime as the ideal profile; no curve can
+    outlast the fixed-energy cell it is rated like.
+
+    Between the curves the factors are interpolated linearly, outside of
+    them they are held at the nearest curve. Evaluating a profile is one
+    table lookup, in the scalar engine as well as in NumPy sweeps.
+
+    Profiles are compiled on first use and cached; the built-in curves are
+    plain tuples, so importing this module costs nothing. CSV profiles are
+    cached under their path, modification time and size (see profile_key),
+    so an edited file is read again.
+
+    CSV profiles have the columns capacity_percent (delivered capacity in
+    percent of the nominal capacity) and voltage (cell voltage), and
+    optionally temperature_c (default 25) and nominal_voltage (default: the
+    mean voltage of the curve closest to 25 degC). Each curve starts at 0 %.
+
+@license: MIT License
+================================================================================
+"""
+
+import bisect
+import csv
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from batterycalc.engine import IDEAL_PROFILE
+
+# Temperature of the curves in CSV files without a temperature_c column
+DEFAULT_TEMPERATURE_C = 25.0
+
+# Built-in profiles: name -> (nominal cell voltage, {temperature in degC: ((capacity in %, cell voltage), ...)})
+_BUILTIN_CURVES = {
+    'li-ion': (3.7, {
+        -20.0: ((0, 4.05), (10, 3.70), (30, 3.52), (45, 3.40), (55, 3.22), (60, 3.0)),
+        0.0: ((0, 4.15), (10, 3.88), (20, 3.78), (40, 3.64), (60, 3.55), (75, 3.42), (82, 3.25), (85, 3.0)),
+        25.0: ((0, 4.2), (5, 4.05), (10, 3.98), (20, 3.88), (30, 3.80), (40, 3.74), (50, 3.69), (60, 3.65),
+               (70, 3.61), (80, 3.55), (90, 3.45), (95, 3.35), (98, 3.2), (100, 3.0)),
+        45.0: ((0, 4.2), (10, 4.0), (30, 3.83), (50, 3.72), (70, 3.63), (90, 3.48), (97, 3.3), (100, 3.0)),
+        60.0: ((0, 4.2), (10, 4.0), (30, 3.82), (50, 3.71), (70, 3.62), (90, 3.45), (96, 3.25), (98, 3.0)),
+    }),
+    'lisocl2': (3.6, {
+        -40.0: ((0, 3.3), (5, 3.05), (30, 3.0), (45, 2.8), (50, 2.0)),
+        -20.0: ((0, 3.5), (5, 3.35), (30, 3.3), (60, 3.22), (70, 3.0), (75, 2.0)),
+        20.0: ((0, 3.67), (5, 3.6), (20, 3.58), (50, 3.56), (80, 3.52), (90, 3.45), (95, 3.3), (98, 3.0),
+               (100, 2.0)),
+        60.0: ((0, 3.68), (5, 3.62), (50, 3.58), (90, 3.48), (97, 3.2), (100, 2.0)),
+        85.0: ((0, 3.68), (5, 3.6), (50, 3.55), (85, 3.45), (92, 3.2), (95, 2.0)),
+    }),
+    'alkaline': (1.5, {
+        -20.0: ((0, 1.45), (10, 1.2), (25, 1.05), (35, 0.9)),
+        0.0: ((0, 1.52), (10, 1.32), (30, 1.22), (50, 1.14), (65, 1.04), (75, 0.9)),
+        20.0: ((0, 1.58), (5, 1.45), (10, 1.40), (20, 1.35), (30, 1.30), (40, 1.26), (50, 1.22), (60, 1.18),
+               (70, 1.14), (80, 1.09), (90, 1.02), (100, 0.9)),
+        45.0: ((0, 1.6), (10, 1.42), (30, 1.32), (50, 1.24), (70, 1.16), (90, 1.04), (100, 0.9)),
+    }),
+}
+
+# Names of the profiles that need no file; IDEAL_PROFILE is the fixed-energy model of engine.py
+PROFILES = (IDEAL_PROFILE,) + tuple(_BUILTIN_CURVES)
+
+## @brief Compiled profile: charge and energy factors over the temperature.
+@dataclass(frozen=True)
+class DischargeTable:
+    name: str
+    temperatures_c: tuple
+    charge_factors: tuple
+    energy_factors: tuple
+
+    ## @brief Looks up the factors at a temperature.
+    #  @param temperature_c Temperature in degC.
+    #  @return Tuple of the charge factor and the energy factor.
+    def factors(self, temperature_c):
+        """Returns the charge and energy factor at a temperature, interpolated between the curves."""
+        t = self.temperatures_c
+        i = bisect.bisect_right(t, temperature_c)
+        if i == 0:
+            return self.charge_factors[0], self.energy_factors[0]
+        if i == len(t):
+            return self.charge_factors[-1], self.energy_factors[-1]
+        w = (temperature_c - t[i - 1]) / (t[i] - t[i - 1])
+        return (self.charge_factors[i - 1] + w * (self.charge_factors[i] - self.charge_factors[i - 1]),
+                self.energy_factors[i - 1] + w * (self.energy_factors[i] - self.energy_factors[i - 1]))
+
+## @brief Compiles discharge curves into a DischargeTable.
+#  @param name Name of the profile.
+#  @param nominal_voltage Nominal cell voltage, the battery voltage input is scaled to it.
+#  @param curves Dictionary of temperature in degC -> sequence of (capacity in %, cell voltage).
+#  @return DischargeTable.
+def compile_profile(name, nominal_voltage, curves):
+    """Integrates every discharge curve once and returns the lookup table."""
+    if not nominal_voltage > 0:
+        raise ValueError(f"Battery profile {name!r}: nominal voltage must be greater than 0 V")
+    if not curves:
+        raise ValueError(f"Battery profile {name!r} has no discharge curve")
+    temperatures, charge_factors, energy_factors = [], [], []
+    for temperature_c in sorted(curves):
+        points = curves[temperature_c]
+        if len(points) < 2 or points[0][0] != 0:
+            raise ValueError(f"Battery profile {name!r}: the curve at {temperature_c} degC must start at 0 % "
+                             f"and have at least two points")
+        energy = 0.0
+        for (c0, v0), (c1, v1) in zip(points, points[1:]):
+            if c1 <= c0 or v0 <= 0 or v1 <= 0:
+                raise ValueError(f"Battery profile {name!r}: the curve at {temperature_c} degC needs increasing "
+                                 f"capacities and positive voltages")
+            energy += (c1 - c0) / 100 * (v0 + v1) / 2
+        temperatures.append(float(temperature_c))
+        charge_factors.append(points[-1][0] / 100)
+        energy_factors.append(energy / nominal_voltage)
+    return DischargeTable(name, tuple(temperatures), tuple(charge_factors), tuple(energy_factors))
+
+## @brief Reads a profile from a CSV file.
+#  @param path Path of the CSV file, see the module description for the columns.
+#  @return DischargeTable.
+def read_profile_csv(path):
+    """Reads the discharge curves of a CSV file and compiles them."""
+    curves = {}
+    nominal_voltage = None
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'capacity_percent', 'voltage'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Battery profile {path!r} lacks the column(s) {', '.join(sorted(missing))}")
+        for row in reader:
+            temperature_c = float(row.get('temperature_c') or DEFAULT_TEMPERATURE_C)
+            curves.setdefault(temperature_c, []).append((float(row['capacity_percent']), float(row['voltage'])))
+            if row.get('nominal_voltage'):
+                nominal_voltage = float(row['nominal_voltage'])
+    for points in curves.values():
+        points.sort()
+    if nominal_voltage is None and curves:
+        # Mean voltage of the curve closest to room temperature
+        table = compile_profile(path, 1.0, curves)
+        closest = min(range(len(table.temperatures_c)),
+                      key=lambda i: abs(table.temperatures_c[i] - DEFAULT_TEMPERATURE_C))
+        nominal_voltage = table.energy_factors[closest] / table.charge_factors[closest]
+    return compile_profile(path, nominal_voltage or 0.0, curves)
+
+## @brief Identifies the version of a profile, for caches of its results.
+#  @param name Name of the profile, see load_profile.
+#  @return The name, or for a CSV file a tuple of its path, modification time in ns and size.
+def profile_key(name):
+    """Returns a key that changes whenever the curves of the profile change."""
+    if name in _BUILTIN_CURVES or not name.lower().endswith('.csv'):
+        return name
+    try:
+        stat = os.stat(name)
+    except OSError:
+        return name  # load_profile reports the error
+    return (name, stat.st_mtime_ns, stat.st_size)
+
+## @brief Returns the compiled lookup table of a profile.
+#  @param name One of PROFILES except IDEAL_PROFILE, or the path of a CSV file.
+#  @return DischargeTable, compiled on first use and cached until a CSV file changes.
+def load_profile(name):
+    """Returns the lookup table of a built-in or CSV profile, compiling it on first use."""
+    return _load_profile(profile_key(name))
+
+## @brief Compiles a profile, cached on its profile_key.
+@lru_cache(maxsize=32)
+def _load_profile(key):
+    """Compiles the profile identified by a profile_key."""
+    name = key[0] if isinstance(key, tuple) else key
+    if name in _BUILTIN_CURVES:
+        nominal_voltage, curves = _BUILTIN_CURVES[name]
+        return compile_profile(name, nominal_voltage, curves)
+    if name.lower().endswith('.csv'):
+        try:
+            return read_profile_csv(name)
+        except OSError as e:
+            raise ValueError(f"Cannot read battery profile {name!r}: {e.strerror}") from None
+    raise ValueError(f"Unknown battery profile: {name!r}, use one of {', '.join(PROFILES)} or a CSV file")
+
+## @brief Usable battery energy under a profile, in the units of the runtime solver.
+#  @param battery_voltage Nominal battery voltage.
+#  @param battery_capacity_mah Nominal battery capacity in mAh.
+#  @param boosted True if the load is supplied through the booster.
+#  @param battery_profile Name of the profile, see load_profile.
+#  @param temperature_c Battery temperature in degC.
+#  @return Energy in Wh that gives the runtime of the profile when divided by the load power.
+def usable_energy_wh(battery_voltage, battery_capacity_mah, boosted, battery_profile, temperature_c):
+    """Returns the usable battery energy of a profile at a temperature."""
+    charge_factor, energy_factor = load_profile(battery_profile).factors(temperature_c)
+    ideal_energy_wh = battery_capacity_mah / 1000 * battery_voltage
+    # Boosted loads are limited by the delivered energy, all others by the delivered charge
+    return ideal_energy_wh * (energy_factor if boosted else charge_factor)
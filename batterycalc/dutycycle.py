@@ -0,0 +1,307 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: dutycycle.py
+@brief: Event-driven duty-cycle simulator for time-resolved runtimes.
+
+@details:
+    A device draws a constant base current (e.g. the MCU sleeping) plus any
+    number of periodic tasks (sensor sampling every 60 s, radio uplink every
+    15 min, daily housekeeping, ...). Each task adds its current for a fixed
+    duration once per period; overlapping tasks simply add up. As in
+    engine.py, a fixed share of the initial energy is lost to self-discharge
+    at the end of every day.
+
+    The schedule repeats after the hyperperiod, the least common multiple of
+    all task periods and the day. Only that one hyperperiod is simulated: a
+    priority queue of task start/stop and self-discharge events jumps from
+    event to event and records the energy drained so far. Whole hyperperiods
+    are then skipped arithmetically and the depletion time is interpolated
+    within the last one, so a multi-year deployment costs as much as a
+    single hyperperiod. The state-of-charge trace is sampled from the same
+    profile.
+
+    Periods that never line up (e.g. 7 s and 13 s) can make the hyperperiod
+    months long. If it has more than MAX_EVENTS_PER_HYPERPERIOD events, every
+    task is replaced by its average power, current * duration / period, and
+    the day is simulated instead. Until any time, the real schedule drains at
+    most one task instance per task more or less than the average, so the
+    runtime is off by at most that residual divided by the average power;
+    the bound is returned as runtime_error_s (0 for an exact simulation).
+
+    A single periodic task built by log_mode_tasks() reproduces
+    engine.calculate_battery_life_log_mode: the runtime is rounded up to
+    whole hours the same way, and the results are equal whenever the wake-up
+    interval divides an hour (otherwise the battery state at the hour
+    boundaries differs by less than one wake-up cycle).
+
+@license: MIT License
+================================================================================
+"""
+
+import heapq
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from batterycalc.engine import HOURS_PER_DAY
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = HOURS_PER_DAY * SECONDS_PER_HOUR
+
+# Event times are integer ticks of one microsecond, so the hyperperiod is exact
+TICKS_PER_SECOND = 1_000_000
+
+# Average the tasks of schedules whose hyperperiod has more events than this
+MAX_EVENTS_PER_HYPERPERIOD = 50_000
+
+# Event kinds, in the order they are processed at the same time
+_STOP, _START, _SELF_DISCHARGE = 0, 1, 2
+
+## @brief A periodic load: adds its current for a fixed duration once per period.
+@dataclass
+class Task:
+    name: str
+    period_s: float
+    duration_s: float
+    current_ma: float
+    offset_s: float = 0.0
+
+## @brief Result of a duty-cycle simulation.
+@dataclass
+class DutyCycleResult:
+    runtime_minutes: int
+    runtime_hours: int
+    runtime_days: float
+    runtime_seconds: float
+    hyperperiod_s: float
+    events_per_hyperperiod: int
+    # Bound of the runtime error of the averaged fallback, 0.0 if the hyperperiod was simulated
+    runtime_error_s: float = 0.0
+    # (time in hours, state of charge from 1.0 to 0.0) pairs
+    trace: list = field(default_factory=list)
+
+## @brief Converts seconds to event ticks.
+def _ticks(seconds):
+    """Converts seconds to integer event ticks."""
+    return round(seconds * TICKS_PER_SECOND)
+
+## @brief Builds the schedule of engine.calculate_battery_life_log_mode.
+#  @param sleep_power Power consumption in sleep mode.
+#  @param on_power Power consumption in active mode.
+#  @param power_consumption_consumer Power consumption of consumers.
+#  @param consumer_voltage Voltage of consumers.
+#  @param wakeup_interval_s Wake-up interval in seconds.
+#  @param consumer_activation_time_ms Activation time in milliseconds.
+#  @param processing_time_ms Processing time in milliseconds.
+#  @param booster_efficiency Booster efficiency.
+#  @return Tuple of the base current in mA and a list with the wake-up Task.
+def log_mode_tasks(sleep_power, on_power, power_consumption_consumer, consumer_voltage, wakeup_interval_s, consumer_activation_time_ms=100, processing_time_ms=50, booster_efficiency=1.0):
+    """Builds the base current and the wake-up task of the Log Mode model."""
+    if consumer_voltage == 5.0:
+        power_consumption_consumer /= booster_efficiency
+    # Log Mode is awake for one second per wake-up; activation and processing
+    # are counted as a constant share of every hour, see engine.py
+    consumer_activation_time_h = consumer_activation_time_ms / 1000 / 3600
+    processing_time_h = processing_time_ms / 1000 / 3600
+    base_current_ma = sleep_power + 2 * power_consumption_consumer * consumer_activation_time_h + on_power * processing_time_h
+    wakeup = Task('Wake-up', wakeup_interval_s, 1.0, on_power + 2 * power_consumption_consumer - sleep_power)
+    return base_current_ma, [wakeup]
+
+## @brief Converts the task periods and durations to ticks and finds the hyperperiod.
+#  @param tasks List of Task.
+#  @return Tuple of the periods and durations in ticks, the hyperperiod in
+#          ticks and the number of events in one hyperperiod.
+def _schedule(tasks):
+    """Validates the tasks and returns their periods, durations and the hyperperiod in ticks."""
+    periods = [_ticks(task.period_s) for task in tasks]
+    durations = [_ticks(task.duration_s) for task in tasks]
+    for task, period, duration in zip(tasks, periods, durations):
+        if period <= 0 or duration < 0:
+            raise ValueError(f"Task {task.name!r} needs a positive period and a non-negative duration")
+    hyperperiod = math.lcm(_ticks(SECONDS_PER_DAY), *periods)
+    expected_events = hyperperiod // _ticks(SECONDS_PER_DAY) + sum(2 * hyperperiod // p for p in periods)
+    return periods, durations, hyperperiod, expected_events
+
+## @brief Simulates one hyperperiod and records the energy drained over time.
+#  @param base_power_w Power of the base current in W.
+#  @param tasks List of Task.
+#  @param supply_voltage Voltage the currents are drawn at.
+#  @param self_discharge_wh Energy lost at the end of every day in Wh.
+#  @param periods Task periods in ticks, see _schedule.
+#  @param durations Task durations in ticks, see _schedule.
+#  @param hyperperiod Hyperperiod in ticks, see _schedule.
+#  @return Tuple of the event times in ticks, the energy drained until each
+#          of them in Wh, and the number of events.
+def _hyperperiod_profile(base_power_w, tasks, supply_voltage, self_discharge_wh, periods, durations, hyperperiod):
+    """Runs the event queue over one hyperperiod and returns the drain profile."""
+    watts_per_ma = supply_voltage / 1000
+    events = [(_ticks(SECONDS_PER_DAY), _SELF_DISCHARGE, -1)]
+    for index, (task, period, duration) in enumerate(zip(tasks, periods, durations)):
+        # Start early enough that an instance running over the end of the
+        # previous hyperperiod is already drawing current at time 0
+        start = _ticks(task.offset_s) % period
+        while start - period + duration > 0:
+            start -= period
+        if duration:
+            events.append((start, _START, index))
+    heapq.heapify(events)
+
+    power_w = base_power_w
+    time = 0
+    drained_wh = 0.0
+    times = [0]
+    drained = [0.0]
+    count = 0
+    while events and events[0][0] <= hyperperiod:
+        event_time, kind, index = heapq.heappop(events)
+        count += 1
+        if event_time > time:
+            drained_wh += power_w * (event_time - time) / TICKS_PER_SECOND / SECONDS_PER_HOUR
+            time = event_time
+            times.append(time)
+            drained.append(drained_wh)
+        if kind == _START:
+            power_w += tasks[index].current_ma * watts_per_ma
+            heapq.heappush(events, (event_time + durations[index], _STOP, index))
+            if event_time + periods[index] < hyperperiod:
+                heapq.heappush(events, (event_time + periods[index], _START, index))
+        elif kind == _STOP:
+            power_w -= tasks[index].current_ma * watts_per_ma
+        else:
+            drained_wh += self_discharge_wh
+            times.append(time)
+            drained.append(drained_wh)
+            heapq.heappush(events, (event_time + _ticks(SECONDS_PER_DAY), _SELF_DISCHARGE, -1))
+    if time < hyperperiod:
+        drained_wh += power_w * (hyperperiod - time) / TICKS_PER_SECOND / SECONDS_PER_HOUR
+        times.append(hyperperiod)
+        drained.append(drained_wh)
+    return times, drained, count
+
+## @brief Drain profile of one day with every task replaced by its average power.
+#  @param base_power_w Power of the base current in W.
+#  @param tasks List of Task.
+#  @param supply_voltage Voltage the currents are drawn at.
+#  @param self_discharge_wh Energy lost at the end of every day in Wh.
+#  @return Tuple of the day in ticks, the event times in ticks, the energy
+#          drained until each of them in Wh, the bound of the deviation of
+#          the real schedule from the average in Wh, and the average power in W.
+def _average_profile(base_power_w, tasks, supply_voltage, self_discharge_wh):
+    """Returns the drain profile of one day at the average power of the tasks."""
+    watts_per_ma = supply_voltage / 1000
+    if base_power_w + sum(min(task.current_ma, 0.0) for task in tasks) * watts_per_ma < 0:
+        raise ValueError("Power consumption must be greater than 0 W at all times")
+    average_power_w = base_power_w + sum(task.current_ma * task.duration_s / task.period_s for task in tasks) * watts_per_ma
+    # Drawn so far, a task is ahead of or behind its average by less than one instance
+    residual_wh = sum(abs(task.current_ma) * watts_per_ma * task.duration_s for task in tasks) / SECONDS_PER_HOUR
+    day = _ticks(SECONDS_PER_DAY)
+    drained_wh = average_power_w * HOURS_PER_DAY
+    return day, [0, day, day], [0.0, drained_wh, drained_wh + self_discharge_wh], residual_wh, average_power_w
+
+## @brief Energy drained within a hyperperiod until a point in time.
+#  @param times Event times of the profile in ticks.
+#  @param drained Energy drained until each event time in Wh.
+#  @param time Time within the hyperperiod in ticks.
+#  @return Energy drained in Wh.
+def _drained_at(times, drained, time):
+    """Interpolates the drain profile at a point in time."""
+    j = bisect_left(times, time)
+    if j == 0:
+        return 0.0
+    if j >= len(times):
+        return drained[-1]
+    if times[j] == time:
+        # Before a self-discharge step at that time, the step counts afterwards
+        return drained[j]
+    t0, t1 = times[j - 1], times[j]
+    return drained[j - 1] + (drained[j] - drained[j - 1]) * (time - t0) / (t1 - t0)
+
+## @brief Simulates a battery-powered device with periodic tasks.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param supply_voltage Voltage all currents are drawn at.
+#  @param base_current_ma Current drawn all the time in mA.
+#  @param tasks List of Task with the additional periodic loads.
+#  @param self_discharge_percent Self-discharge per day in percent of the initial energy.
+#  @param trace_points Number of points of the state-of-charge trace.
+#  @return DutyCycleResult.
+def simulate(battery_voltage, battery_capacity_mah, supply_voltage, base_current_ma, tasks=(), self_discharge_percent=0.05, trace_points=200):
+    """Simulates the discharge of a battery by a base current and periodic tasks."""
+    battery_energy_wh = battery_capacity_mah / 1000 * battery_voltage
+    self_discharge_wh = battery_energy_wh * (self_discharge_percent / 100)
+    base_power_w = base_current_ma / 1000 * supply_voltage
+    tasks = list(tasks)
+    periods, durations, hyperperiod, expected_events = _schedule(tasks)
+    hyperperiod_s = hyperperiod / TICKS_PER_SECOND
+    residual_wh = average_power_w = 0.0
+    if expected_events <= MAX_EVENTS_PER_HYPERPERIOD:
+        times, drained, events = _hyperperiod_profile(base_power_w, tasks, supply_voltage, self_discharge_wh,
+                                                      periods, durations, hyperperiod)
+    else:
+        # The schedule hardly ever repeats: simulate one day at the average power instead
+        hyperperiod, times, drained, residual_wh, average_power_w = _average_profile(
+            base_power_w, tasks, supply_voltage, self_discharge_wh)
+        events = expected_events
+    if battery_energy_wh <= 0:
+        return DutyCycleResult(0, 0, 0.0, 0.0, hyperperiod_s, events, 0.0, [(0.0, 0.0)])
+
+    drained_per_hyperperiod = drained[-1]
+    if any(b < a for a, b in zip(drained, drained[1:])):
+        raise ValueError("Power consumption must be greater than 0 W at all times")
+    if not drained_per_hyperperiod > 0:
+        raise ValueError("Self-discharge cancels out the power consumption, the battery never runs out")
+
+    # Skip whole hyperperiods, then find the depletion time within the last one
+    full_periods = max(math.ceil(battery_energy_wh / drained_per_hyperperiod) - 1, 0)
+    remaining_wh = battery_energy_wh - full_periods * drained_per_hyperperiod
+    while remaining_wh > drained_per_hyperperiod:
+        full_periods += 1
+        remaining_wh -= drained_per_hyperperiod
+    j = max(bisect_left(drained, remaining_wh), 1)
+    if times[j] == times[j - 1]:
+        depletion = times[j]
+    else:
+        share = (remaining_wh - drained[j - 1]) / (drained[j] - drained[j - 1])
+        depletion = times[j - 1] + share * (times[j] - times[j - 1])
+    runtime_seconds = full_periods * hyperperiod / TICKS_PER_SECOND + depletion / TICKS_PER_SECOND
+    runtime_error_s = 0.0
+    if residual_wh:
+        runtime_error_s = residual_wh / average_power_w * SECONDS_PER_HOUR if average_power_w > 0 else math.inf
+
+    runtime_hours = max(math.ceil(runtime_seconds / SECONDS_PER_HOUR - 1e-9), 1)
+    runtime_minutes = runtime_hours * 60
+    runtime_days = runtime_hours / HOURS_PER_DAY
+
+    trace = []
+    for i in range(max(trace_points, 2)):
+        seconds = runtime_seconds * i / (max(trace_points, 2) - 1)
+        periods, within = divmod(_ticks(seconds), hyperperiod)
+        energy_wh = battery_energy_wh - periods * drained_per_hyperperiod - _drained_at(times, drained, within)
+        trace.append((seconds / SECONDS_PER_HOUR, max(energy_wh / battery_energy_wh, 0.0)))
+    return DutyCycleResult(runtime_minutes, runtime_hours, runtime_days, runtime_seconds,
+                           hyperperiod_s, events, runtime_error_s, trace)
+
+## @brief Simulates Log Mode with the inputs of engine.calculate_battery_life_log_mode.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param sleep_power Power consumption in sleep mode.
+#  @param on_power Power consumption in active mode.
+#  @param power_consumption_consumer Power consumption of consumers.
+#  @param consumer_voltage Voltage of consumers.
+#  @param wakeup_interval_s Wake-up interval in seconds.
+#  @param consumer_activation_time_ms Activation time in milliseconds.
+#  @param processing_time_ms Processing time in milliseconds.
+#  @param booster_efficiency Booster efficiency.
+#  @param self_discharge_percent Self-discharge percentage.
+#  @param extra_tasks Further periodic loads, e.g. a radio uplink.
+#  @param trace_points Number of points of the state-of-charge trace.
+#  @return DutyCycleResult.
+def simulate_log_mode(battery_voltage, battery_capacity_mah, sleep_power, on_power, power_consumption_consumer, consumer_voltage, wakeup_interval_s, consumer_activation_time_ms=100, processing_time_ms=50, booster_efficiency=1.0, self_discharge_percent=0.05, extra_tasks=(), trace_points=200):
+    """Simulates Log Mode, optionally with further periodic loads."""
+    base_current_ma, tasks = log_mode_tasks(sleep_power, on_power, power_consumption_consumer, consumer_voltage,
+                                            wakeup_interval_s, consumer_activation_time_ms, processing_time_ms,
+                                            booster_efficiency)
+    return simulate(battery_voltage, battery_capacity_mah, consumer_voltage, base_current_ma,
+                    tasks + list(extra_tasks), self_discharge_percent, trace_points)
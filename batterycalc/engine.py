@@ -0,0 +1,301 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: engine.py
+@brief: Runtime solver and per-mode battery life calculations.
+
+@details:
+    The battery is modelled as a fixed amount of energy that is drained by a
+    constant load in whole-hour steps. Once every 24 hours a fixed share of
+    the initial energy is lost to self-discharge. The runtime is the first
+    whole hour after which no energy is left.
+
+    Zero or negative power raises a ValueError instead of running forever, as
+    does a load so small that the runtime exceeds MAX_RUNTIME_HOURS: beyond
+    2**53 hours a float can no longer tell one hour from the next.
+
+    With a battery profile other than "ideal" (see discharge.py), the energy
+    follows the discharge curve and the temperature of the battery instead:
+    the ideal energy is scaled by the share of the energy the cell delivers
+    down to its cut-off voltage for loads on the booster, and by the share
+    of the delivered charge for all other loads.
+
+    Two solvers are available:
+        1. "closed_form" (default): finds that hour analytically in constant
+           time, independent of the battery lifetime. It agrees with the loop
+           except when the battery empties exactly on an hour boundary; there
+           the loop's answer depends on accumulated rounding error, while the
+           closed form returns the exact hour.
+        2. "loop": the original hour-by-hour simulation, kept as a reference
+           to cross-check the closed-form solver.
+
+@license: MIT License
+================================================================================
+"""
+
+import math
+from dataclasses import dataclass
+
+HOURS_PER_DAY = 24
+
+RUNTIME_METHODS = ('closed_form', 'loop')
+
+# Longest runtime the solvers resolve to the hour; hours beyond 2**53 are not exact in a float
+MAX_RUNTIME_HOURS = 2 ** 53
+
+# Steps the closed-form solver may take to settle rounding before it gives up
+MAX_CORRECTION_STEPS = 64
+
+ALWAYS_ON_MODE = 'Always ON Mode'
+LOG_MODE = 'Log Mode'
+SLEEP_MODE = 'Sleep Mode'
+MODES = (ALWAYS_ON_MODE, LOG_MODE, SLEEP_MODE)
+
+# Battery profile of the fixed-energy model: capacity * voltage, independent of the temperature
+IDEAL_PROFILE = 'ideal'
+
+# Probe names based on their current consumption in mA
+CONSUMER_NAMES = {
+    1.0: 'Low Current Sensor',
+    4.5: 'Medium Current Sensor A',
+    10.0: 'Medium Current Sensor B',
+    100.0: 'High Current Sensor'
+}
+
+## @brief Input values of one calculation: the device settings and one consumer.
+#  The defaults are the default values of the GUI input fields.
+@dataclass
+class Scenario:
+    battery_voltage: float = 3.7
+    battery_capacity_mah: int = 3500
+    power_consumption_always_on: float = 40.0
+    power_consumption_log_sleep: float = 0.3
+    power_consumption_log_on: float = 2.5
+    power_consumption_sleep_mode: float = 0.25
+    consumer_current: float = 1.0
+    consumer_voltage: float = 3.45
+    booster_efficiency: float = 0.90
+    wakeup_interval_s: int = 60
+    consumer_activation_time_ms: int = 150
+    processing_time_ms: int = 50
+    self_discharge_percent: float = 0.05
+    battery_profile: str = IDEAL_PROFILE
+    temperature_c: float = 25.0
+
+    @property
+    def probe(self):
+        """Name of the consumer, 'Unknown' if its current is not in CONSUMER_NAMES."""
+        return CONSUMER_NAMES.get(self.consumer_current, 'Unknown')
+
+## @brief Calculates the runtime of the battery in minutes, hours, and days.
+#  @param battery_energy_wh Battery energy in Wh.
+#  @param power_watt Power drawn by the load in W.
+#  @param self_discharge_percent Self-discharge per day in percent of the initial energy.
+#  @param method Solver to use, one of RUNTIME_METHODS.
+#  @return Runtime values in minutes, hours, and days.
+def calculate_runtime(battery_energy_wh, power_watt, self_discharge_percent, method='closed_form'):
+    """Calculates the runtime of the battery in minutes, hours, and days."""
+    if method == 'closed_form':
+        runtime_hours = _runtime_hours_closed_form(battery_energy_wh, power_watt, self_discharge_percent)
+    elif method == 'loop':
+        runtime_hours = _runtime_hours_loop(battery_energy_wh, power_watt, self_discharge_percent)
+    else:
+        raise ValueError(f"Unknown runtime method: {method!r}")
+    runtime_minutes = runtime_hours * 60
+    runtime_days = runtime_hours / HOURS_PER_DAY
+    return runtime_minutes, runtime_hours, runtime_days
+
+## @brief Raises a ValueError for loads the battery would never run out on.
+#  @param power_watt Power drawn by the load in W.
+def _check_power(power_watt):
+    """Rejects zero or negative power instead of simulating forever."""
+    if not power_watt > 0:
+        raise ValueError(f"Power consumption must be greater than 0 W, got {power_watt}")
+
+## @brief Raises a ValueError for runtimes too long to resolve to the hour.
+#  @param runtime_hours Estimated runtime in hours.
+def _check_runtime(runtime_hours):
+    """Rejects runtimes beyond MAX_RUNTIME_HOURS instead of simulating forever."""
+    if not runtime_hours <= MAX_RUNTIME_HOURS:
+        raise ValueError(f"Power consumption is too small, the runtime exceeds {MAX_RUNTIME_HOURS} hours")
+
+## @brief Reference solver: simulates the discharge hour by hour.
+#  @param battery_energy_wh Battery energy in Wh.
+#  @param power_watt Power drawn by the load in W.
+#  @param self_discharge_percent Self-discharge per day in percent.
+#  @return Runtime in whole hours.
+def _runtime_hours_loop(battery_energy_wh, power_watt, self_discharge_percent):
+    """Simulates the discharge hour by hour (reference implementation)."""
+    if battery_energy_wh <= 0:
+        return 0
+    _check_power(power_watt)
+    self_discharge_wh_per_day = battery_energy_wh * (self_discharge_percent / 100)
+    if HOURS_PER_DAY * power_watt + self_discharge_wh_per_day <= 0:
+        raise ValueError("Self-discharge cancels out the power consumption, the battery never runs out")
+    _check_runtime(battery_energy_wh / (power_watt + max(self_discharge_wh_per_day, 0) / HOURS_PER_DAY))
+    runtime_hours = 0
+    while battery_energy_wh > 0:
+        battery_energy_wh -= power_watt
+        runtime_hours += 1
+        if runtime_hours % HOURS_PER_DAY == 0:
+            battery_energy_wh -= self_discharge_wh_per_day
+    return runtime_hours
+
+## @brief Closed-form solver: finds the first empty hour without simulating.
+#  @param battery_energy_wh Battery energy in Wh.
+#  @param power_watt Power drawn by the load in W.
+#  @param self_discharge_percent Self-discharge per day in percent.
+#  @return Runtime in whole hours.
+def _runtime_hours_closed_form(battery_energy_wh, power_watt, self_discharge_percent):
+    """Finds the first hour at which the battery is empty in constant time."""
+    if battery_energy_wh <= 0:
+        return 0
+    _check_power(power_watt)
+    self_discharge_wh_per_day = battery_energy_wh * (self_discharge_percent / 100)
+
+    # Energy left after hour h: E(h) = E0 - h * P - (h // 24) * D.
+    # Within a day the energy drops by at most max(23 * P, 24 * P + D) before
+    # the next day starts, and every full day removes 24 * P + D.
+    energy_per_day = HOURS_PER_DAY * power_watt + self_discharge_wh_per_day
+    max_drop_per_day = max((HOURS_PER_DAY - 1) * power_watt, energy_per_day)
+    if battery_energy_wh <= max_drop_per_day:
+        full_days = 0
+    elif energy_per_day <= 0:
+        raise ValueError("Self-discharge cancels out the power consumption, the battery never runs out")
+    else:
+        days = (battery_energy_wh - max_drop_per_day) / energy_per_day
+        _check_runtime(days * HOURS_PER_DAY)
+        full_days = math.ceil(days)
+
+    energy_at_day_start = battery_energy_wh - full_days * energy_per_day
+    hour_of_day = math.ceil(min(energy_at_day_start / power_watt, HOURS_PER_DAY))
+    runtime_hours = full_days * HOURS_PER_DAY + max(hour_of_day, 1)
+
+    # Settle rounding in the divisions so the result lands on the exact hour.
+    def energy_left(hours):
+        return battery_energy_wh - hours * power_watt - (hours // HOURS_PER_DAY) * self_discharge_wh_per_day
+
+    for _ in range(MAX_CORRECTION_STEPS):
+        if runtime_hours > 1 and energy_left(runtime_hours - 1) <= 0:
+            runtime_hours -= 1
+        elif energy_left(runtime_hours) > 0:
+            runtime_hours += 1
+        else:
+            return runtime_hours
+    raise ValueError("The runtime cannot be resolved to the hour, the power consumption is too small")
+
+## @brief Returns the battery energy the runtime solver starts with.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param boosted True if the load is supplied through the booster.
+#  @param battery_profile Name of the battery profile, see discharge.PROFILES.
+#  @param temperature_c Battery temperature in degC, ignored by the ideal profile.
+#  @return Battery energy in Wh.
+def battery_energy(battery_voltage, battery_capacity_mah, boosted, battery_profile=IDEAL_PROFILE, temperature_c=25.0):
+    """Returns the battery energy in Wh, following the discharge curve of the battery profile."""
+    if battery_profile == IDEAL_PROFILE:
+        return battery_capacity_mah / 1000 * battery_voltage
+    from batterycalc.discharge import usable_energy_wh  # compiled profiles are only loaded when used
+
+    return usable_energy_wh(battery_voltage, battery_capacity_mah, boosted, battery_profile, temperature_c)
+
+## @brief Calculates battery runtime for Always ON Mode.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param power_consumption_device Power consumption of the device.
+#  @param power_consumption_consumer Power consumption of consumers.
+#  @param consumer_voltage Voltage of consumers.
+#  @param booster_efficiency Booster efficiency.
+#  @param self_discharge_percent Self-discharge percentage.
+#  @param battery_profile Name of the battery profile, see discharge.PROFILES.
+#  @param temperature_c Battery temperature in degC.
+#  @param solver Runtime solver with the signature of calculate_runtime.
+#  @return Runtime values in minutes, hours, and days.
+def calculate_battery_life_always_on(battery_voltage, battery_capacity_mah, power_consumption_device, power_consumption_consumer, consumer_voltage, booster_efficiency=1.0, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, solver=calculate_runtime):
+    """Calculates battery runtime for Always ON Mode."""
+    if consumer_voltage == 5.0:
+        power_consumption_consumer /= booster_efficiency
+    total_current_consumption_ma = power_consumption_device + 2 * power_consumption_consumer
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = battery_energy(battery_voltage, battery_capacity_mah, consumer_voltage == 5.0, battery_profile, temperature_c)
+    return solver(battery_energy_wh, power_watt, self_discharge_percent)
+
+## @brief Calculates battery runtime for Log Mode.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param sleep_power Power consumption in sleep mode.
+#  @param on_power Power consumption in active mode.
+#  @param power_consumption_consumer Power consumption of consumers.
+#  @param consumer_voltage Voltage of consumers.
+#  @param wakeup_interval_s Wake-up interval in seconds.
+#  @param consumer_activation_time_ms Activation time in milliseconds.
+#  @param processing_time_ms Processing time in milliseconds.
+#  @param booster_efficiency Booster efficiency.
+#  @param self_discharge_percent Self-discharge percentage.
+#  @param battery_profile Name of the battery profile, see discharge.PROFILES.
+#  @param temperature_c Battery temperature in degC.
+#  @param solver Runtime solver with the signature of calculate_runtime.
+#  @return Runtime values in minutes, hours, and days.
+def calculate_battery_life_log_mode(battery_voltage, battery_capacity_mah, sleep_power, on_power, power_consumption_consumer, consumer_voltage, wakeup_interval_s, consumer_activation_time_ms=100, processing_time_ms=50, booster_efficiency=1.0, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, solver=calculate_runtime):
+    """Calculates battery runtime for Log Mode."""
+    consumer_activation_time_h = consumer_activation_time_ms / 1000 / 3600
+    processing_time_h = processing_time_ms / 1000 / 3600
+    on_time_per_hour_h = 3600 / wakeup_interval_s / 3600
+    if consumer_voltage == 5.0:
+        power_consumption_consumer /= booster_efficiency
+    total_current_consumption_ma = (sleep_power * (1 - on_time_per_hour_h)) + \
+                                  ((on_power + 2 * power_consumption_consumer) * on_time_per_hour_h) + \
+                                  (2 * power_consumption_consumer * consumer_activation_time_h) + \
+                                  (on_power * processing_time_h)
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = battery_energy(battery_voltage, battery_capacity_mah, consumer_voltage == 5.0, battery_profile, temperature_c)
+    return solver(battery_energy_wh, power_watt, self_discharge_percent)
+
+## @brief Calculates battery runtime for Sleep Mode.
+#  @param battery_voltage Battery voltage.
+#  @param battery_capacity_mah Battery capacity in mAh.
+#  @param sleep_power Power consumption in sleep mode.
+#  @param consumer_voltage Voltage of consumers.
+#  @param self_discharge_percent Self-discharge percentage.
+#  @param battery_profile Name of the battery profile, see discharge.PROFILES.
+#  @param temperature_c Battery temperature in degC.
+#  @param solver Runtime solver with the signature of calculate_runtime.
+#  @return Runtime values in minutes, hours, and days.
+def calculate_battery_life_sleep_mode(battery_voltage, battery_capacity_mah, sleep_power, consumer_voltage, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, solver=calculate_runtime):
+    """Calculates battery runtime for Sleep Mode."""
+    total_current_consumption_ma = sleep_power
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = battery_energy(battery_voltage, battery_capacity_mah, False, battery_profile, temperature_c)
+    return solver(battery_energy_wh, power_watt, self_discharge_percent)
+
+## @brief Selects the mode function and its arguments for a scenario.
+#  @param scenario Scenario with the input values.
+#  @param mode One of MODES.
+#  @return Tuple of the mode function, its positional and its keyword arguments.
+def mode_call(scenario, mode):
+    """Selects the mode function and its arguments for a scenario."""
+    s = scenario
+    if mode == ALWAYS_ON_MODE:
+        return calculate_battery_life_always_on, (
+            s.battery_voltage, s.battery_capacity_mah, s.power_consumption_always_on, s.consumer_current, s.consumer_voltage
+        ), dict(booster_efficiency=s.booster_efficiency, self_discharge_percent=s.self_discharge_percent, battery_profile=s.battery_profile, temperature_c=s.temperature_c)
+    if mode == LOG_MODE:
+        return calculate_battery_life_log_mode, (
+            s.battery_voltage, s.battery_capacity_mah, s.power_consumption_log_sleep, s.power_consumption_log_on, s.consumer_current, s.consumer_voltage, s.wakeup_interval_s
+        ), dict(consumer_activation_time_ms=s.consumer_activation_time_ms, processing_time_ms=s.processing_time_ms, booster_efficiency=s.booster_efficiency, self_discharge_percent=s.self_discharge_percent, battery_profile=s.battery_profile, temperature_c=s.temperature_c)
+    if mode == SLEEP_MODE:
+        return calculate_battery_life_sleep_mode, (
+            s.battery_voltage, s.battery_capacity_mah, s.power_consumption_sleep_mode, s.consumer_voltage
+        ), dict(self_discharge_percent=s.self_discharge_percent, battery_profile=s.battery_profile, temperature_c=s.temperature_c)
+    raise ValueError(f"Unknown mode: {mode!r}")
+
+## @brief Calculates the battery runtime of a scenario in the given mode.
+#  @param scenario Scenario with the input values.
+#  @param mode One of MODES.
+#  @param solver Runtime solver with the signature of calculate_runtime.
+#  @return Runtime values in minutes, hours, and days.
+def calculate_scenario(scenario, mode, solver=calculate_runtime):
+    """Calculates the battery runtime of a scenario in the given mode."""
+    func, args, kwargs = mode_call(scenario, mode)
+    return func(*args, solver=solver, **kwargs)
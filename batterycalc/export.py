@@ -0,0 +1,130 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: export.py
+@brief: Streaming export of result sets to CSV, TSV and JSONL.
+
+@details:
+    Rows are written in chunks straight from a ResultSet, so exporting does
+    not build the whole output in memory. Values are written either raw
+    (numbers, columns named as in ResultSet.FIELDS) or formatted for display
+    (strings with units, columns named as in the result table).
+
+    serialize_results() uses the same writer to build a string, e.g. for the
+    clipboard, and stops with ExportTooLargeError once a size limit is
+    exceeded.
+
+@license: MIT License
+================================================================================
+"""
+
+import csv
+import io
+import json
+
+from batterycalc.results import ResultSet
+from batterycalc.table import COLUMNS, format_row
+
+EXPORT_FORMATS = ('csv', 'tsv', 'jsonl')
+
+# Rows serialized and written at once
+EXPORT_CHUNK_SIZE = 10000
+
+## @brief Raised when the serialized results would exceed a size limit.
+class ExportTooLargeError(ValueError):
+    """Raised when the serialized results would exceed a size limit."""
+
+## @brief Guesses the export format from a file name.
+#  @param path File name.
+#  @return One of EXPORT_FORMATS, 'csv' if the extension is unknown.
+def format_from_path(path):
+    """Guesses the export format from a file name."""
+    path = path.lower()
+    if path.endswith(('.tsv', '.tab', '.txt')):
+        return 'tsv'
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+## @brief Iterates over the rows of a result set in chunks.
+#  @param results ResultSet to export.
+#  @param order Optional sequence of row indices, e.g. the sorted table order.
+#  @param formatted True for display strings, False for raw values.
+#  @param chunk_size Number of rows per chunk.
+#  @return Iterator of lists of row tuples.
+def iter_chunks(results, order=None, formatted=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterates over the rows of a result set in chunks of row tuples."""
+    order = range(len(results)) if order is None else order
+    row = results.row
+    for start in range(0, len(order), chunk_size):
+        rows = [row(i) for i in order[start:start + chunk_size]]
+        yield [format_row(r) for r in rows] if formatted else rows
+
+## @brief Writes a result set to a text stream.
+#  @param stream Text stream to write to.
+#  @param results ResultSet to export.
+#  @param fmt One of EXPORT_FORMATS.
+#  @param formatted True for display strings, False for raw values.
+#  @param order Optional sequence of row indices, e.g. the sorted table order.
+#  @param header True to write a header line (CSV and TSV only).
+#  @param max_chars Optional limit of characters; ExportTooLargeError is raised when it is exceeded.
+#  @return Number of rows written.
+def write_results(stream, results, fmt='csv', formatted=False, order=None, header=True, max_chars=None):
+    """Writes a result set to a text stream, one chunk of rows at a time."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    columns = COLUMNS if formatted else ResultSet.FIELDS
+    written_chars = 0
+    written_rows = 0
+
+    def write(text):
+        nonlocal written_chars
+        written_chars += len(text)
+        if max_chars is not None and written_chars > max_chars:
+            raise ExportTooLargeError(f"Export exceeds the limit of {max_chars} characters")
+        stream.write(text)
+
+    buffer = io.StringIO()
+    writer = None
+    if fmt != 'jsonl':
+        writer = csv.writer(buffer, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+        if header:
+            writer.writerow(columns)
+    for rows in iter_chunks(results, order, formatted):
+        if writer is not None:
+            writer.writerows(rows)
+        else:
+            buffer.writelines(json.dumps(dict(zip(columns, r))) + '\n' for r in rows)
+        write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        written_rows += len(rows)
+    write(buffer.getvalue())
+    return written_rows
+
+## @brief Writes a result set to a file.
+#  @param path File name.
+#  @param results ResultSet to export.
+#  @param fmt One of EXPORT_FORMATS, or None to guess it from the file name.
+#  @param formatted True for display strings, False for raw values.
+#  @param order Optional sequence of row indices, e.g. the sorted table order.
+#  @return Number of rows written.
+def export_results(path, results, fmt=None, formatted=False, order=None):
+    """Writes a result set to a CSV, TSV or JSONL file."""
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        return write_results(stream, results, fmt or format_from_path(path), formatted, order)
+
+## @brief Serializes a result set to a string.
+#  @param results ResultSet to export.
+#  @param fmt One of EXPORT_FORMATS.
+#  @param formatted True for display strings, False for raw values.
+#  @param order Optional sequence of row indices, e.g. the sorted table order.
+#  @param header True to write a header line (CSV and TSV only).
+#  @param max_chars Optional size limit, see write_results.
+#  @return The serialized rows.
+def serialize_results(results, fmt='tsv', formatted=True, order=None, header=False, max_chars=None):
+    """Serializes a result set to a string, e.g. for the clipboard."""
+    stream = io.StringIO()
+    write_results(stream, results, fmt, formatted, order, header, max_chars)
+    return stream.getvalue()
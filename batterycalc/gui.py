@@ -0,0 +1,813 @@
+"""
+================================================================================
+Battery Life Calculator GUI
+--------------------------------------------------------------------------------
+@file: gui.py
+@brief: Tkinter user interface of the Battery Life Calculator.
+
+@details:
+    The main window with the input fields, the mode and probe selection and
+    the result table. Nothing is created on import; run_gui() builds the
+    window and runs the Tk event loop. The calculations themselves are done
+    by the GUI-free modules of this package.
+
+@license: MIT License
+================================================================================
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from batterycalc.discharge import PROFILES
+from batterycalc.engine import (ALWAYS_ON_MODE, CONSUMER_NAMES, IDEAL_PROFILE, LOG_MODE, SLEEP_MODE,
+                                calculate_battery_life_always_on, calculate_battery_life_log_mode,
+                                calculate_battery_life_sleep_mode)
+from batterycalc.export import ExportTooLargeError, export_results, serialize_results
+from batterycalc.live import LiveCalculator
+from batterycalc.results import ResultSet
+from batterycalc.table import COLUMNS, ResultTableModel
+from batterycalc.timings import timings
+
+# Result rows the worker thread collects before passing them to the table
+RESULT_BATCH_SIZE = 500
+# Batches moved into the table per poll, so the window stays responsive
+MAX_BATCHES_PER_POLL = 4
+# Interval in which the Tk thread picks up finished batches
+POLL_INTERVAL_MS = 50
+
+# Rows of the last live update, only the rows affected by a change are recalculated
+live_calculator = LiveCalculator()
+# Pause after the last key press before the table is updated
+LIVE_UPDATE_DELAY_MS = 300
+# Larger tables are only calculated with the Calculate button
+LIVE_UPDATE_MAX_ROWS = 5000
+# Pending live update scheduled with root.after
+live_update_after = None
+# True if a live update was held back by a running calculation, it runs when the calculation ends
+live_update_deferred = False
+
+# Inputs the target runtime search can find, by their label in the GUI
+TARGET_SEARCHES = {
+    "Minimum Capacity (mAh)": 'battery_capacity_mah',
+    "Maximum Consumer Current (mA)": 'consumer_current',
+    "Shortest Wakeup Interval (s)": 'wakeup_interval_s',
+}
+
+# Larger results are refused by the clipboard export, the file export has no limit.
+# Tk hands the whole text to the window system at once, about 80000 table rows fit.
+MAX_CLIPBOARD_CHARS = 4_000_000
+
+# Columns of the stage timings window
+TIMINGS_COLUMNS = ('Stage', 'Calls', 'Total [ms]', 'Mean [ms]', 'Max [ms]', 'Rows', 'Rows/s')
+# Refresh interval of the stage timings window
+TIMINGS_REFRESH_MS = 1000
+
+# The calculation currently running on the worker thread
+current_job = None
+
+## @brief Function to sort the columns of the Treeview.
+#  @param tv The VirtualTreeview showing the results.
+#  @param col The column to sort.
+#  @param reverse Boolean to indicate if sorting should be reversed.
+def treeview_sort_column(tv, col, reverse):
+    """Sorts the result model by a column and shows the first rows."""
+    with timings.stage('sort', len(tv.model)):
+        tv.model.sort(col, reverse)
+        tv.scroll_to(0)
+    tv.tree.heading(col, command=lambda: treeview_sort_column(tv, col, not reverse))
+
+## @brief Function to copy the results to the clipboard.
+def copy_to_clipboard():
+    """Copies the results in view order to the clipboard as tab separated text."""
+    model = results_view.model
+    try:
+        with timings.stage('serialize', len(model)):
+            clipboard_content = serialize_results(model.rows, 'tsv', formatted=True, order=model.order,
+                                                  max_chars=MAX_CLIPBOARD_CHARS)
+    except ExportTooLargeError:
+        messagebox.showwarning("Export to Clipboard",
+                               f"{len(model)} rows are too many for the clipboard, use Export to File instead.")
+        return
+
+    # Copy to clipboard
+    with timings.stage('clipboard', len(model)):
+        root.clipboard_clear()
+        root.clipboard_append(clipboard_content)
+        root.update()  # now it stays on the clipboard after the window is closed
+
+## @brief Function to export the results to a CSV, TSV or JSONL file.
+def export_to_file():
+    """Asks for a file name and writes the results in view order to it."""
+    path = filedialog.asksaveasfilename(
+        title="Export to File", defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("Tab separated", "*.tsv"), ("JSON Lines", "*.jsonl")])
+    if not path:
+        return
+    model = results_view.model
+    try:
+        with timings.stage('export', len(model)):
+            export_results(path, model.rows, formatted=not raw_export.get(), order=model.order)
+    except OSError as e:
+        messagebox.showerror("Export to File", str(e))
+
+## @brief Treeview that only holds the rows of the visible window of a ResultTableModel.
+class VirtualTreeview:
+    """Shows the visible window of a ResultTableModel in a Treeview."""
+
+    ## @brief Connects the Treeview and its vertical scrollbar to the model.
+    #  @param tree The ttk.Treeview widget.
+    #  @param scrollbar The vertical scrollbar of the Treeview.
+    #  @param model The ResultTableModel to show.
+    def __init__(self, tree, scrollbar, model):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.model = model
+        self.first = 0
+        self.visible = int(tree.cget('height')) or 10
+        self.message = None
+        self.row_height = int(ttk.Style(tree).lookup('Treeview', 'rowheight') or 20)
+        scrollbar.configure(command=self.yview)
+        tree.bind('<Configure>', self._on_configure)
+        tree.bind('<MouseWheel>', lambda e: self.yview('scroll', -3 if e.delta > 0 else 3, 'units'))
+        tree.bind('<Button-4>', lambda e: self.yview('scroll', -3, 'units'))
+        tree.bind('<Button-5>', lambda e: self.yview('scroll', 3, 'units'))
+
+    def _on_configure(self, event):
+        """Adapts the number of rows to the height of the widget."""
+        visible = max(1, event.height // self.row_height - 1)  # minus the heading
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    ## @brief Scroll command of the scrollbar, see Tk's yview.
+    def yview(self, *args):
+        """Scrolls the window of shown rows."""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.model)))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+
+    def scroll_to(self, first):
+        """Shows the rows starting at the given position in view order."""
+        self.first = max(0, min(first, len(self.model) - self.visible))
+        self.refresh()
+
+    def clear(self):
+        """Removes all rows and messages."""
+        self.model.clear()
+        self.message = None
+        self.scroll_to(0)
+
+    def replace(self, rows):
+        """Shows the rows of a ResultSet instead of the current ones, keeping the scroll position."""
+        self.model.replace(rows)
+        self.message = None
+        self.scroll_to(self.first)
+
+    def show_message(self, values):
+        """Replaces all rows by a single row of values, e.g. an error."""
+        self.model.clear()
+        self.message = values
+        self.scroll_to(0)
+
+    def refresh(self):
+        """Updates the Treeview items to the current window of the model."""
+        if self.message is not None:
+            rows = [self.message]
+        else:
+            rows = self.model.window(self.first, self.visible)
+        items = self.tree.get_children()
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        for values in rows[len(items):]:
+            self.tree.insert('', 'end', values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        total = len(self.model)
+        if total > self.visible:
+            self.scrollbar.set(self.first / total, (self.first + self.visible) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+## @brief Background calculation whose results are passed to the Tk thread in batches.
+class CalculationJob:
+    """Calculates the result rows on a worker thread and queues them in batches."""
+
+    ## @brief Creates the job.
+    #  @param inputs Dictionary of the parsed input values.
+    #  @param mode_filter Selected modes, empty for all.
+    #  @param probe_filter Selected probes, empty for all.
+    def __init__(self, inputs, mode_filter, probe_filter):
+        self.inputs = inputs
+        self.mode_filter = mode_filter
+        self.probe_filter = probe_filter
+        # Deselected consumers are skipped instead of calculated and filtered out
+        self.consumer_currents = [current for current in inputs['consumer_currents']
+                                  if not probe_filter or CONSUMER_NAMES.get(current, 'Unknown') in probe_filter]
+        self.total = len(inputs['consumer_voltages']) * len(self.consumer_currents)
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.started = None
+        self.thread = threading.Thread(target=self._run, name="CalculationJob", daemon=True)
+
+    def start(self):
+        """Starts the worker thread."""
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def cancel(self):
+        """Asks the worker thread to stop at the next consumer."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """True if the job was cancelled."""
+        return self.cancel_event.is_set()
+
+    def _run(self):
+        """Worker thread: calculates the selected modes for the selected consumers."""
+        i = self.inputs
+        modes = self.mode_filter or (ALWAYS_ON_MODE, LOG_MODE, SLEEP_MODE)
+        batch = ResultSet()
+        done = 0
+        # Time spent calculating and building the rows of the current batch
+        compute_seconds = build_seconds = 0.0
+        try:
+            # Perform the calculations for the selected modes and consumers
+            for consumer_voltage in i['consumer_voltages']:
+                for power_consumption_consumer in self.consumer_currents:
+                    if self.cancelled:
+                        return
+                    consumer_name = CONSUMER_NAMES.get(power_consumption_consumer, 'Unknown')
+                    started = time.perf_counter()
+                    runtimes = []
+
+                    # Always ON Mode calculation
+                    if ALWAYS_ON_MODE in modes:
+                        runtimes.append((ALWAYS_ON_MODE, calculate_battery_life_always_on(
+                            i['battery_voltage'], i['battery_capacity_mah'], i['power_consumption_always_on'], power_consumption_consumer, consumer_voltage, booster_efficiency=i['booster_efficiency'], self_discharge_percent=i['self_discharge_percent'], battery_profile=i['battery_profile'], temperature_c=i['temperature_c']
+                        )))
+
+                    # Log Mode calculation
+                    if LOG_MODE in modes:
+                        runtimes.append((LOG_MODE, calculate_battery_life_log_mode(
+                            i['battery_voltage'], i['battery_capacity_mah'], i['power_consumption_log_sleep'], i['power_consumption_log_on'], power_consumption_consumer, consumer_voltage, i['wakeup_interval_s'], consumer_activation_time_ms=i['consumer_activation_time_ms'], processing_time_ms=i['processing_time_ms'], booster_efficiency=i['booster_efficiency'], self_discharge_percent=i['self_discharge_percent'], battery_profile=i['battery_profile'], temperature_c=i['temperature_c']
+                        )))
+
+                    # Sleep Mode calculation
+                    if SLEEP_MODE in modes:
+                        runtimes.append((SLEEP_MODE, calculate_battery_life_sleep_mode(
+                            i['battery_voltage'], i['battery_capacity_mah'], i['power_consumption_sleep_mode'], consumer_voltage, self_discharge_percent=i['self_discharge_percent'], battery_profile=i['battery_profile'], temperature_c=i['temperature_c']
+                        )))
+
+                    calculated = time.perf_counter()
+                    for mode, (runtime_minutes, runtime_hours, runtime_days) in runtimes:
+                        batch.append(mode, consumer_name, power_consumption_consumer, consumer_voltage, runtime_minutes, runtime_hours, runtime_days)
+                    compute_seconds += calculated - started
+                    build_seconds += time.perf_counter() - calculated
+
+                    done += 1
+                    if len(batch) >= RESULT_BATCH_SIZE:
+                        self._put_batch(batch, done, compute_seconds, build_seconds)
+                        batch = ResultSet()
+                        compute_seconds = build_seconds = 0.0
+            self._put_batch(batch, done, compute_seconds, build_seconds)
+        except (ArithmeticError, ValueError) as e:
+            self.queue.put(('error', str(e), done))
+        finally:
+            self.queue.put(('done', None, done))
+
+    ## @brief Passes a batch of rows to the Tk thread.
+    #  @param batch ResultSet with the rows.
+    #  @param done Number of consumers calculated so far.
+    #  @param compute_seconds Time spent calculating the rows of the batch.
+    #  @param build_seconds Time spent adding them to the batch.
+    def _put_batch(self, batch, done, compute_seconds, build_seconds):
+        """Queues a batch of rows and records how long it took to calculate and build."""
+        timings.add('compute', compute_seconds, len(batch))
+        timings.add('build', build_seconds, len(batch))
+        self.queue.put(('rows', batch, done))
+
+## @brief Function to read and validate the input values from the entry fields.
+#  @return Dictionary of the parsed input values.
+def read_inputs():
+    """Reads the input values from the entry fields, raises ValueError if invalid."""
+    return {
+        'battery_voltage': float(entry_battery_voltage.get()),
+        'battery_capacity_mah': int(entry_battery_capacity.get()),
+        'power_consumption_always_on': float(entry_power_consumption_always_on.get()),
+        'power_consumption_log_sleep': float(entry_power_consumption_log_sleep.get()),
+        'power_consumption_log_on': float(entry_power_consumption_log_on.get()),
+        'power_consumption_sleep_mode': float(entry_power_consumption_sleep_mode.get()),
+        'consumer_currents': [float(x) for x in entry_consumer_currents.get().split(',')],
+        'consumer_voltages': [float(x) for x in entry_consumer_voltages.get().split(',')],
+        'booster_efficiency': float(entry_booster_efficiency.get()),
+        'wakeup_interval_s': int(entry_wakeup_interval.get()),
+        'consumer_activation_time_ms': int(entry_consumer_activation_time.get()),
+        'processing_time_ms': int(entry_processing_time.get()),
+        'self_discharge_percent': float(entry_self_discharge.get()),
+        'battery_profile': battery_profile.get().strip() or IDEAL_PROFILE,
+        'temperature_c': float(entry_temperature.get()),
+    }
+
+# Function to get selected values from the Mode Listbox (multiple selection)
+def get_selected_mode():
+    """Gets the selected modes from the Mode Listbox."""
+    selected_indices = mode_listbox.curselection()
+    return [mode_listbox.get(i) for i in selected_indices]
+
+# Function to get selected values from the Probe Listbox (multiple selection)
+def get_selected_probe():
+    """Gets the selected probes from the Probe Listbox."""
+    selected_indices = probe_listbox.curselection()
+    return [probe_listbox.get(i) for i in selected_indices]
+
+## @brief Function to show an error message in the result table.
+#  @param message Error message.
+def show_error(message):
+    """Replaces the table contents with an error row."""
+    results_view.show_message(("Error", "Error", "Error", "Error", "Error", message))
+
+## @brief Function to perform battery lifetime calculations and display results in the Treeview.
+def calculate_battery_life():
+    """Starts the battery life calculation on a worker thread, cancelling any running one."""
+    global current_job
+    cancel_calculation()
+    try:
+        with timings.stage('parse'):
+            inputs = read_inputs()
+    except ValueError as e:
+        show_error(str(e))
+        return
+
+    # Clear the table, only the selected modes and probes are calculated and added in batches
+    results_view.clear()
+    current_job = CalculationJob(inputs, get_selected_mode(), get_selected_probe())
+    with timings.stage('filter'):
+        results_view.model.select(current_job.mode_filter, current_job.probe_filter)
+    progress_bar.configure(maximum=max(current_job.total, 1), value=0)
+    cancel_button.configure(state='normal')
+    current_job.start()
+    root.after(POLL_INTERVAL_MS, poll_calculation, current_job)
+
+## @brief Function to display the batches a calculation job has finished so far.
+#  @param job The CalculationJob to poll.
+def poll_calculation(job):
+    """Moves finished rows from the worker thread into the Treeview."""
+    if job is not current_job:
+        return  # cancelled or replaced by a newer calculation
+    finished = False
+    # The batches of one poll are added at once, so a sorted view is merged only once
+    rows = ResultSet()
+    try:
+        for _ in range(MAX_BATCHES_PER_POLL):
+            kind, payload, done = job.queue.get_nowait()
+            if kind == 'rows':
+                rows.extend(payload)
+            elif kind == 'error':
+                show_error(payload)
+            else:
+                finished = True
+                break
+            progress_bar.configure(value=done)
+    except queue.Empty:
+        pass
+    if rows:
+        with timings.stage('insert', len(rows)):
+            results_view.model.extend(rows)
+            results_view.refresh()
+    if finished:
+        timings.add('calculation', time.perf_counter() - job.started, len(results_view.model))
+        finish_calculation()
+    else:
+        root.after(POLL_INTERVAL_MS, poll_calculation, job)
+
+## @brief Function to cancel the running calculation, if any.
+def cancel_calculation():
+    """Cancels the running calculation and keeps the rows shown so far."""
+    if current_job is not None:
+        current_job.cancel()
+    finish_calculation()
+
+## @brief Function to reset the progress indicator after a calculation ended.
+def finish_calculation():
+    """Forgets the current job, disables the Cancel button and runs a held back live update."""
+    global current_job, live_update_deferred
+    current_job = None
+    cancel_button.configure(state='disabled')
+    if live_update_deferred:
+        live_update_deferred = False
+        schedule_live_update()
+
+## @brief Function to show the rows of the selected modes and probes.
+#  @param event The Tk event, unused.
+def apply_selection(event=None):
+    """Shows the rows of the selected modes and probes from the rows already calculated."""
+    with timings.stage('filter') as stage:
+        results_view.model.select(get_selected_mode(), get_selected_probe())
+        results_view.scroll_to(0)
+        stage.rows = len(results_view.model)
+    # Rows that were deselected during the last calculation are calculated by the live update
+    schedule_live_update()
+
+## @brief Function to schedule a live update after the user stopped typing.
+#  @param event The Tk event, unused.
+def schedule_live_update(event=None):
+    """Restarts the delay after which the table is updated to the current inputs."""
+    global live_update_after
+    if live_update_after is not None:
+        root.after_cancel(live_update_after)
+        live_update_after = None
+    if live_update.get():
+        live_update_after = root.after(LIVE_UPDATE_DELAY_MS, live_recalculate)
+
+## @brief Function to update the table to the current inputs, recalculating only the affected rows.
+def live_recalculate():
+    """Updates the table to the current inputs, recalculating only the affected rows."""
+    global live_update_after, live_update_deferred
+    live_update_after = None
+    if current_job is not None:
+        live_update_deferred = True  # a full calculation is running, update when it ends
+        return
+    try:
+        with timings.stage('parse'):
+            inputs = read_inputs()
+    except ValueError:
+        return  # the user is still typing
+    if len(inputs['consumer_currents']) * len(inputs['consumer_voltages']) * 3 > LIVE_UPDATE_MAX_ROWS:
+        return
+    modes, probes = get_selected_mode(), get_selected_probe()
+    try:
+        with timings.stage('live') as stage:
+            rows = live_calculator.update(inputs, modes, probes)
+            stage.rows = live_calculator.recalculated
+    except (ArithmeticError, ValueError) as e:
+        show_error(str(e))
+        return
+    with timings.stage('insert', len(rows)):
+        results_view.model.select(modes, probes)
+        results_view.replace(rows)
+
+## @brief Function to find the input value that reaches the target runtime.
+def find_target_value():
+    """Solves for the selected input for every mode, probe and voltage and shows the results."""
+    try:
+        from batterycalc.inverse import SOLVE_FOR, solve  # needs NumPy
+        from batterycalc.sweep import grid
+    except ImportError:
+        messagebox.showerror("Target Runtime", "The target runtime search needs NumPy (pip install batteryCalculator[sweep]).")
+        return
+    label = target_search.get()
+    solve_for = TARGET_SEARCHES[label]
+    try:
+        inputs = read_inputs()
+        target_days = float(entry_target_days.get())
+    except ValueError as e:
+        messagebox.showerror("Target Runtime", str(e))
+        return
+
+    currents = inputs.pop('consumer_currents')
+    voltages = inputs.pop('consumer_voltages')
+    inputs.pop(solve_for, None)
+    if solve_for == 'consumer_current':
+        currents = [None]  # the probe current is what is searched for
+        queries = grid(consumer_voltage=voltages)
+    else:
+        queries = grid(consumer_current=currents, consumer_voltage=voltages)
+    modes = [mode for mode in (get_selected_mode() or SOLVE_FOR[solve_for]) if mode in SOLVE_FOR[solve_for]]
+
+    rows = []
+    try:
+        for mode in modes:
+            values = solve(mode, solve_for, target_days, **inputs, **queries)
+            for i, value in enumerate(values):
+                current = currents[i // len(voltages)]
+                probe = CONSUMER_NAMES.get(current, 'Unknown') if current is not None else '-'
+                if value != value:  # NaN
+                    text = "not reachable"
+                elif solve_for == 'consumer_current':
+                    text = f"{value:.3f}"
+                else:
+                    text = f"{value:.0f}"
+                rows.append((mode, probe, f"{queries['consumer_voltage'][i]:.2f} V", text))
+    except (ArithmeticError, ValueError) as e:
+        messagebox.showerror("Target Runtime", str(e))
+        return
+    show_target_results(f"{label} for {target_days:g} days", ('Mode', 'Probe', 'Voltage', label), rows)
+
+## @brief Function to show the results of a target runtime search in a new window.
+#  @param title Window title.
+#  @param columns Column headings.
+#  @param rows List of value tuples.
+def show_target_results(title, columns, rows):
+    """Shows the results of a target runtime search in a new window."""
+    window = tk.Toplevel(root)
+    window.title(title)
+    tree = ttk.Treeview(window, columns=columns, show='headings', height=min(max(len(rows), 1), 20))
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, anchor='center', width=160)
+    for values in rows:
+        tree.insert('', 'end', values=values)
+    tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+## @brief Function to show the stage timings in a new window, refreshed while it is open.
+def show_timings():
+    """Shows the stage timings in a new window that refreshes itself."""
+    window = tk.Toplevel(root)
+    window.title("Timings")
+    tree = ttk.Treeview(window, columns=TIMINGS_COLUMNS, show='headings', height=12)
+    for col in TIMINGS_COLUMNS:
+        tree.heading(col, text=col)
+        tree.column(col, anchor='e' if col != 'Stage' else 'w', width=90)
+    tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+    def refresh():
+        if not window.winfo_exists():
+            return
+        tree.delete(*tree.get_children())
+        for name, stats in timings.snapshot().items():
+            tree.insert('', 'end', values=(name, stats.count, f"{stats.seconds * 1000:.1f}",
+                                           f"{stats.mean_seconds * 1000:.2f}", f"{stats.max_seconds * 1000:.2f}",
+                                           stats.rows, f"{stats.rows_per_second:.0f}"))
+        window.after(TIMINGS_REFRESH_MS, refresh)
+
+    def save():
+        path = filedialog.asksaveasfilename(parent=window, title="Save Timings", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            try:
+                timings.write_json(path)
+            except OSError as e:
+                messagebox.showerror("Save Timings", str(e), parent=window)
+
+    frame = tk.Frame(window)
+    frame.pack(pady=(0, 10))
+    tk.Button(frame, text="Reset", command=timings.reset).grid(row=0, column=0, padx=5)
+    tk.Button(frame, text="Save...", command=save).grid(row=0, column=1, padx=5)
+    refresh()
+
+## @brief Function to exit the application.
+def exit_app():
+    """Exits the application."""
+    root.quit()
+
+## @brief Function to create the GUI and run the Tk event loop.
+def run_gui():
+    """Creates the main window and runs the Tk event loop."""
+    global root, results_view, mode_listbox, probe_listbox, cancel_button, progress_bar, raw_export
+    global entry_target_days, target_search, live_update
+    global entry_battery_voltage, entry_battery_capacity, entry_power_consumption_always_on
+    global entry_power_consumption_log_sleep, entry_power_consumption_log_on, entry_power_consumption_sleep_mode
+    global entry_consumer_currents, entry_consumer_voltages, entry_booster_efficiency, entry_wakeup_interval
+    global entry_consumer_activation_time, entry_processing_time, entry_self_discharge
+    global battery_profile, entry_temperature
+
+    # GUI window creation
+    root = tk.Tk()
+    root.title("Battery Life Calculator")
+
+    # Dynamic window resizing
+    root.grid_columnconfigure(0, weight=1)
+    root.grid_columnconfigure(1, weight=1)
+    root.grid_rowconfigure(19, weight=1)
+
+    # Input fields with labels and entry boxes
+    tk.Label(root, text="Battery Voltage (V):").grid(row=0, column=0, sticky="w", padx=10, pady=5)
+    entry_battery_voltage = tk.Entry(root, justify='center')
+    entry_battery_voltage.grid(row=0, column=1, padx=10, pady=5)
+    entry_battery_voltage.insert(0, "3.7")
+
+    tk.Label(root, text="Battery Capacity (mAh):").grid(row=1, column=0, sticky="w", padx=10, pady=5)
+    entry_battery_capacity = tk.Entry(root, justify='center')
+    entry_battery_capacity.grid(row=1, column=1, padx=10, pady=5)
+    entry_battery_capacity.insert(0, "3500")
+
+    tk.Label(root, text="Power Consumption Always ON (mA):").grid(row=2, column=0, sticky="w", padx=10, pady=5)
+    entry_power_consumption_always_on = tk.Entry(root, justify='center')
+    entry_power_consumption_always_on.grid(row=2, column=1, padx=10, pady=5)
+    entry_power_consumption_always_on.insert(0, "40")
+
+    tk.Label(root, text="Power Consumption Log Sleep (mA):").grid(row=3, column=0, sticky="w", padx=10, pady=5)
+    entry_power_consumption_log_sleep = tk.Entry(root, justify='center')
+    entry_power_consumption_log_sleep.grid(row=3, column=1, padx=10, pady=5)
+    entry_power_consumption_log_sleep.insert(0, "0.3")
+
+    tk.Label(root, text="Power Consumption Log ON (mA):").grid(row=4, column=0, sticky="w", padx=10, pady=5)
+    entry_power_consumption_log_on = tk.Entry(root, justify='center')
+    entry_power_consumption_log_on.grid(row=4, column=1, padx=10, pady=5)
+    entry_power_consumption_log_on.insert(0, "2.5")
+
+    tk.Label(root, text="Power Consumption Sleep Mode (mA):").grid(row=5, column=0, sticky="w", padx=10, pady=5)
+    entry_power_consumption_sleep_mode = tk.Entry(root, justify='center')
+    entry_power_consumption_sleep_mode.grid(row=5, column=1, padx=10, pady=5)
+    entry_power_consumption_sleep_mode.insert(0, "0.25")
+
+    tk.Label(root, text="Consumer Currents (mA, comma-separated):").grid(row=6, column=0, sticky="w", padx=10, pady=5)
+    entry_consumer_currents = tk.Entry(root, justify='center')
+    entry_consumer_currents.grid(row=6, column=1, padx=10, pady=5)
+    entry_consumer_currents.insert(0, "1, 4.5, 10, 100")
+
+    tk.Label(root, text="Consumer Voltages (V, comma-separated):").grid(row=7, column=0, sticky="w", padx=10, pady=5)
+    entry_consumer_voltages = tk.Entry(root, justify='center')
+    entry_consumer_voltages.grid(row=7, column=1, padx=10, pady=5)
+    entry_consumer_voltages.insert(0, "3.45, 5.0")
+
+    tk.Label(root, text="Booster Efficiency (%):").grid(row=8, column=0, sticky="w", padx=10, pady=5)
+    entry_booster_efficiency = tk.Entry(root, justify='center')
+    entry_booster_efficiency.grid(row=8, column=1, padx=10, pady=5)
+    entry_booster_efficiency.insert(0, "0.90")
+
+    tk.Label(root, text="Wakeup Interval (s):").grid(row=9, column=0, sticky="w", padx=10, pady=5)
+    entry_wakeup_interval = tk.Entry(root, justify='center')
+    entry_wakeup_interval.grid(row=9, column=1, padx=10, pady=5)
+    entry_wakeup_interval.insert(0, "60")
+
+    tk.Label(root, text="Consumer Activation Time (ms):").grid(row=10, column=0, sticky="w", padx=10, pady=5)
+    entry_consumer_activation_time = tk.Entry(root, justify='center')
+    entry_consumer_activation_time.grid(row=10, column=1, padx=10, pady=5)
+    entry_consumer_activation_time.insert(0, "150")
+
+    tk.Label(root, text="Processing Time (ms):").grid(row=11, column=0, sticky="w", padx=10, pady=5)
+    entry_processing_time = tk.Entry(root, justify='center')
+    entry_processing_time.grid(row=11, column=1, padx=10, pady=5)
+    entry_processing_time.insert(0, "50")
+
+    tk.Label(root, text="Self Discharge per Day (%):").grid(row=12, column=0, sticky="w", padx=10, pady=5)
+    entry_self_discharge = tk.Entry(root, justify='center')
+    entry_self_discharge.grid(row=12, column=1, padx=10, pady=5)
+    entry_self_discharge.insert(0, "0.05")
+
+    # Battery profile: a built-in discharge curve or the path of a CSV file
+    tk.Label(root, text="Battery Profile (or CSV file):").grid(row=13, column=0, sticky="w", padx=10, pady=5)
+    battery_profile = ttk.Combobox(root, values=list(PROFILES), justify='center')
+    battery_profile.grid(row=13, column=1, padx=10, pady=5)
+    battery_profile.set(IDEAL_PROFILE)
+
+    tk.Label(root, text="Battery Temperature (°C):").grid(row=14, column=0, sticky="w", padx=10, pady=5)
+    entry_temperature = tk.Entry(root, justify='center')
+    entry_temperature.grid(row=14, column=1, padx=10, pady=5)
+    entry_temperature.insert(0, "25")
+
+    # Mode Listbox with scrollbar and multiple selection
+    tk.Label(root, text="Select Mode:").grid(row=15, column=0, sticky="w", padx=10, pady=5)
+
+    # Frame to contain the Listbox and Scrollbar
+    frame_mode = tk.Frame(root)
+    frame_mode.grid(row=15, column=1, padx=10, pady=5, sticky="nsew")
+
+    # Create the Listbox
+    mode_listbox = tk.Listbox(frame_mode, selectmode='multiple', height=3, exportselection=False)
+    mode_listbox.pack(side="left", fill="both", expand=True)
+
+    # Add items to the Listbox
+    mode_listbox.insert(0, "Always ON Mode")
+    mode_listbox.insert(1, "Log Mode")
+    mode_listbox.insert(2, "Sleep Mode")
+
+    # Create and configure the Scrollbar
+    scrollbar_mode = tk.Scrollbar(frame_mode, orient="vertical", command=mode_listbox.yview)
+    scrollbar_mode.pack(side="right", fill="y")
+
+    # Link the Listbox and Scrollbar
+    mode_listbox.config(yscrollcommand=scrollbar_mode.set)
+
+    # Update grid configuration to allow resizing
+    root.grid_rowconfigure(15, weight=1)
+    root.grid_columnconfigure(1, weight=1)
+
+
+    # Probe Listbox with scrollbar and multiple selection
+    tk.Label(root, text="Select Probe:").grid(row=16, column=0, sticky="w", padx=10, pady=5)
+
+    # Frame to contain the Listbox and Scrollbar
+    frame_probe = tk.Frame(root)
+    frame_probe.grid(row=16, column=1, padx=10, pady=5, sticky="nsew")
+
+    # Create the Listbox
+    probe_listbox = tk.Listbox(frame_probe, selectmode='multiple', height=4, exportselection=False)
+    probe_listbox.pack(side="left", fill="both", expand=True)
+
+    # Add items to the Listbox
+    probe_listbox.insert(0, "Low Current Sensor")
+    probe_listbox.insert(1, "Medium Current Sensor A")
+    probe_listbox.insert(2, "Medium Current Sensor B")
+    probe_listbox.insert(3, "High Current Sensor")
+
+    # Create and configure the Scrollbar
+    scrollbar_probe = tk.Scrollbar(frame_probe, orient="vertical", command=probe_listbox.yview)
+    scrollbar_probe.pack(side="right", fill="y")
+
+    # Link the Listbox and Scrollbar
+    probe_listbox.config(yscrollcommand=scrollbar_probe.set)
+
+    # Update grid configuration to allow resizing
+    root.grid_rowconfigure(16, weight=1)
+    root.grid_columnconfigure(1, weight=1)
+
+
+    # Target runtime search: which capacity, consumer current or wakeup interval reaches a runtime
+    frame_target = tk.Frame(root)
+    frame_target.grid(row=17, column=0, sticky="w", padx=10, pady=10)
+    tk.Label(frame_target, text="Target Runtime (d):").grid(row=0, column=0, padx=5)
+    entry_target_days = tk.Entry(frame_target, justify='center', width=8)
+    entry_target_days.grid(row=0, column=1, padx=5)
+    entry_target_days.insert(0, "365")
+    target_search = ttk.Combobox(frame_target, values=list(TARGET_SEARCHES), state='readonly', width=30)
+    target_search.current(0)
+    target_search.grid(row=0, column=2, padx=5)
+    find_button = tk.Button(frame_target, text="Find", command=find_target_value)
+    find_button.grid(row=0, column=3, padx=5)
+
+    # Buttons Frame
+    frame_buttons = tk.Frame(root)
+    frame_buttons.grid(row=17, column=1, sticky="e", padx=10, pady=10)
+
+    # Calculate button
+    calculate_button = tk.Button(frame_buttons, text="Calculate", command=calculate_battery_life)
+    calculate_button.grid(row=0, column=0, padx=5)
+
+    # Exit button
+    exit_button = tk.Button(frame_buttons, text="Exit", command=exit_app)
+    exit_button.grid(row=0, column=1, padx=5)
+
+    # Copy to Clipboard button
+    copy_button = tk.Button(frame_buttons, text="Export to Clipboard", command=copy_to_clipboard)
+    copy_button.grid(row=0, column=2, padx=5)
+
+    # Cancel button, enabled while a calculation is running
+    cancel_button = tk.Button(frame_buttons, text="Cancel", command=cancel_calculation, state='disabled')
+    cancel_button.grid(row=0, column=3, padx=5)
+
+    # Live update: recalculate the affected rows while typing
+    live_update = tk.BooleanVar(value=True)
+    live_update_check = tk.Checkbutton(frame_buttons, text="Live Update", variable=live_update,
+                                       command=schedule_live_update)
+    live_update_check.grid(row=0, column=6, padx=5)
+
+    # Export to File button, writes raw numbers instead of display strings if checked
+    export_button = tk.Button(frame_buttons, text="Export to File...", command=export_to_file)
+    export_button.grid(row=0, column=4, padx=5)
+    raw_export = tk.BooleanVar(value=False)
+    raw_export_check = tk.Checkbutton(frame_buttons, text="Raw values", variable=raw_export)
+    raw_export_check.grid(row=0, column=5, padx=5)
+
+    # Stage timings, only when turned on with --timings or BATTERYCALC_TIMINGS
+    if timings.enabled:
+        timings_button = tk.Button(frame_buttons, text="Timings...", command=show_timings)
+        timings_button.grid(row=0, column=7, padx=5)
+
+    # Progress of the running calculation
+    progress_bar = ttk.Progressbar(root, orient="horizontal", mode="determinate")
+    progress_bar.grid(row=18, column=0, columnspan=2, padx=10, sticky="ew")
+
+    # Frame to contain the Treeview and Scrollbars
+    frame_tree = tk.Frame(root)
+    frame_tree.grid(row=19, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
+
+    # Create the Treeview
+    tree = ttk.Treeview(frame_tree, columns=COLUMNS, show='headings')
+    tree.grid(row=0, column=0, sticky="nsew")
+
+    # Create and configure vertical scrollbar, it scrolls the model rather than the Treeview
+    vsb = tk.Scrollbar(frame_tree, orient="vertical")
+    vsb.grid(row=0, column=1, sticky='ns')
+    results_view = VirtualTreeview(tree, vsb, ResultTableModel())
+
+    # Set column headers and make columns sortable
+    for col in tree['columns']:
+        tree.heading(col, text=col, command=lambda _col=col: treeview_sort_column(results_view, _col, False))
+        tree.column(col, anchor='center', width=80)  # Set the width of each column to 80 and center-align
+
+    # Create and configure horizontal scrollbar
+    hsb = tk.Scrollbar(frame_tree, orient="horizontal", command=tree.xview)
+    hsb.grid(row=1, column=0, sticky='ew')
+
+    # Link the Treeview and horizontal scrollbar
+    tree.configure(xscrollcommand=hsb.set)
+
+    # Update grid configuration to allow resizing
+    frame_tree.grid_rowconfigure(0, weight=1)
+    frame_tree.grid_columnconfigure(0, weight=1)
+
+    # Update the table while the inputs or the selection change
+    for entry in (entry_battery_voltage, entry_battery_capacity, entry_power_consumption_always_on,
+                  entry_power_consumption_log_sleep, entry_power_consumption_log_on, entry_power_consumption_sleep_mode,
+                  entry_consumer_currents, entry_consumer_voltages, entry_booster_efficiency, entry_wakeup_interval,
+                  entry_consumer_activation_time, entry_processing_time, entry_self_discharge,
+                  battery_profile, entry_temperature):
+        entry.bind('<KeyRelease>', schedule_live_update)
+    battery_profile.bind('<<ComboboxSelected>>', schedule_live_update)
+    mode_listbox.bind('<<ListboxSelect>>', apply_selection)
+    probe_listbox.bind('<<ListboxSelect>>', apply_selection)
+    schedule_live_update()
+
+    # Start the GUI
+    root.mainloop()
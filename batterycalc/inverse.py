@@ -0,0 +1,151 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: inverse.py
+@brief: Inverse design queries: which input value reaches a target runtime.
+
+@details:
+    Instead of the runtime of given inputs, solve() answers the inverse
+    question for a target runtime in days: the minimum battery capacity, the
+    maximum consumer current or the shortest wake-up interval that still
+    reaches the target. All other inputs stay fixed.
+
+    The runtime is monotonic in each of these inputs, so the answer is found
+    by bracketing (doubling an upper bound until it passes the target) and
+    bisection. Every step evaluates the vectorized sweep() for all queries at
+    once, so a whole product matrix of targets, inputs and probes is
+    answered with a few dozen NumPy passes:
+
+        params = grid(target_days=[365, 730, 1825], consumer_current=[1.0, 4.5, 10.0, 100.0])
+        capacity = solve(LOG_MODE, 'battery_capacity_mah', **params)
+
+    Capacity and wake-up interval are whole numbers like the GUI inputs, the
+    consumer current is found to full float precision. Queries without a
+    solution (e.g. a target beyond what self-discharge allows) return NaN.
+    A load that draws no power, or too little to ever run out, meets any
+    target; negative power or a self-discharge that cancels the load is
+    invalid and never meets it.
+
+@dependencies:
+    - NumPy: install with `pip install batteryCalculator[sweep]`.
+
+@license: MIT License
+================================================================================
+"""
+
+import numpy as np
+
+from batterycalc.engine import ALWAYS_ON_MODE, LOG_MODE, MODES
+from batterycalc.sweep import DEFAULT_INPUTS, UNBOUNDED_RUNTIME, sweep
+
+# Inputs solve() can search for, and the modes they have an effect on
+SOLVE_FOR = {
+    'battery_capacity_mah': MODES,
+    'consumer_current': (ALWAYS_ON_MODE, LOG_MODE),
+    'wakeup_interval_s': (LOG_MODE,),
+}
+
+# Search limits; queries that need more than this have no solution
+MAX_CAPACITY_MAH = 10**9
+MAX_CONSUMER_CURRENT_MA = 10**9
+MAX_WAKEUP_INTERVAL_S = 10 * 365 * 86400
+
+# Bisection steps for the consumer current, enough for full float precision
+CURRENT_BISECTION_STEPS = 80
+
+## @brief Finds the input value that reaches a target runtime.
+#  @param mode One of MODES.
+#  @param solve_for Input to search for, one of SOLVE_FOR.
+#  @param target_days Target runtime in days, scalar or array.
+#  @param inputs The other input values by name (see sweep.DEFAULT_INPUTS), scalars or arrays.
+#  @return Array broadcast over target_days and inputs: the minimum capacity in
+#          mAh, the maximum consumer current in mA or the shortest wake-up
+#          interval in s that reaches the target; NaN where there is none.
+def solve(mode, solve_for, target_days, **inputs):
+    """Finds the capacity, consumer current or wake-up interval that reaches a target runtime."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode!r}")
+    if solve_for not in SOLVE_FOR:
+        raise ValueError(f"Cannot solve for {solve_for!r}, use one of {', '.join(SOLVE_FOR)}")
+    if mode not in SOLVE_FOR[solve_for]:
+        raise ValueError(f"{solve_for} has no effect on the runtime in {mode}")
+    if solve_for in inputs:
+        raise TypeError(f"{solve_for} is the value to solve for, it cannot be given as an input")
+    unknown = set(inputs) - set(DEFAULT_INPUTS)
+    if unknown:
+        raise TypeError(f"Unknown inputs: {', '.join(sorted(unknown))}")
+
+    # The battery profile name is passed on as it is, sweep() handles a single name fastest
+    profile = {'battery_profile': inputs.pop('battery_profile')} if 'battery_profile' in inputs else {}
+    target, *values = np.broadcast_arrays(np.asarray(target_days, dtype=float),
+                                          *(np.asarray(value) for value in inputs.values()))
+    fixed = dict(zip(inputs, values), **profile)
+
+    def meets_target(value):
+        # Loads that never run out meet any target, invalid rows (negative hours) none
+        _, hours, days = sweep((mode,), errors='mask', **fixed, **{solve_for: value})[mode]
+        return (days >= target) | (hours == UNBOUNDED_RUNTIME)
+
+    if solve_for == 'consumer_current':
+        return _search_max(meets_target, target.shape, MAX_CONSUMER_CURRENT_MA)
+    if solve_for == 'battery_capacity_mah':
+        return _search_min_int(meets_target, target.shape, 0, MAX_CAPACITY_MAH)
+    return _search_min_int(meets_target, target.shape, 1, MAX_WAKEUP_INTERVAL_S)
+
+## @brief Finds the smallest whole number that meets a monotonic condition.
+#  @param meets_target Function taking an array of candidates and returning a boolean array.
+#  @param shape Shape of the queries.
+#  @param low Smallest value to consider.
+#  @param limit Largest value to consider.
+#  @return Float array of the smallest values, NaN where even limit fails.
+def _search_min_int(meets_target, shape, low, limit):
+    """Finds the smallest whole number that meets a monotonic condition, per query."""
+    lo = np.full(shape, low, dtype=np.int64)
+    done = meets_target(lo)
+    # Bracket: double the upper bound until it meets the target or hits the limit
+    hi = np.where(done, lo, np.maximum(lo, 1))
+    ok = done.copy()
+    while True:
+        ok |= meets_target(hi)
+        grow = ~ok & (hi < limit)
+        if not grow.any():
+            break
+        lo = np.where(grow, hi, lo)
+        hi = np.where(grow, np.minimum(hi * 2, limit), hi)
+    found = ok & ~done
+    # Bisection: meets_target(lo) is False and meets_target(hi) is True
+    while True:
+        active = found & (hi - lo > 1)
+        if not active.any():
+            break
+        mid = np.where(active, (lo + hi) // 2, hi)
+        passed = meets_target(mid)
+        hi = np.where(active & passed, mid, hi)
+        lo = np.where(active & ~passed, mid, lo)
+    return np.where(ok, hi, np.nan)
+
+## @brief Finds the largest non-negative value that meets a decreasing condition.
+#  @param meets_target Function taking an array of candidates and returning a boolean array.
+#  @param shape Shape of the queries.
+#  @param limit Largest value to consider.
+#  @return Float array of the largest values, NaN where even 0 fails.
+def _search_max(meets_target, shape, limit):
+    """Finds the largest value that meets a decreasing condition, per query."""
+    lo = np.zeros(shape)
+    possible = meets_target(lo)
+    # Bracket: double the upper bound until it fails the target or hits the limit
+    hi = np.ones(shape)
+    while True:
+        grow = possible & meets_target(hi) & (hi < limit)
+        if not grow.any():
+            break
+        lo = np.where(grow, hi, lo)
+        hi = np.where(grow, np.minimum(hi * 2, limit), hi)
+    unbounded = possible & meets_target(hi)
+    for _ in range(CURRENT_BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        passed = meets_target(mid)
+        lo = np.where(passed, mid, lo)
+        hi = np.where(passed, hi, mid)
+    return np.where(unbounded, hi, np.where(possible, lo, np.nan))
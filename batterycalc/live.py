@@ -0,0 +1,146 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: live.py
+@brief: Incremental recalculation of the result table driven by input dependencies.
+
+@details:
+    Every mode depends on only part of the inputs: the Sleep Mode power
+    affects only Sleep Mode rows, the wake-up interval only Log Mode rows,
+    and Sleep Mode does not depend on the consumer current at all. The
+    dependency graph MODE_INPUTS is read from engine.mode_call, so it stays
+    in sync with the calculations.
+
+    LiveCalculator keeps the runtime of every row, keyed on the mode and on
+    the consumer current and voltage as far as the mode depends on them.
+    When the inputs change, only the rows of the affected modes and the rows
+    of new consumers are recalculated; all others are reused. This keeps the
+    GUI table live while the user types.
+
+    Rows of deselected modes and probes are not calculated at all; they are
+    calculated when they are selected again, and only if they are not known
+    for the current inputs yet.
+
+@license: MIT License
+================================================================================
+"""
+
+from dataclasses import fields, replace
+
+from batterycalc.engine import MODES, Scenario, calculate_scenario, mode_call
+from batterycalc.results import ResultSet
+
+# Inputs that vary per table row; all other inputs are shared by every row
+ROW_INPUTS = ('consumer_current', 'consumer_voltage')
+
+## @brief Records which Scenario fields a mode function reads.
+class _FieldRecorder:
+    """Stands in for a Scenario and records the fields that are read."""
+
+    def __init__(self):
+        self.used = set()
+
+    def __getattr__(self, name):
+        self.used.add(name)
+        return 0
+
+## @brief Returns the Scenario fields a mode depends on.
+#  @param mode One of MODES.
+#  @return Frozen set of Scenario field names.
+def mode_inputs(mode):
+    """Returns the Scenario fields the calculation of a mode depends on."""
+    recorder = _FieldRecorder()
+    mode_call(recorder, mode)
+    return frozenset(recorder.used)
+
+# Dependency graph: the Scenario fields each mode depends on
+MODE_INPUTS = {mode: mode_inputs(mode) for mode in MODES}
+
+## @brief Returns the modes affected by changed inputs.
+#  @param changed Names of the changed Scenario fields.
+#  @return Tuple of modes in the order of MODES.
+def affected_modes(changed):
+    """Returns the modes whose results depend on any of the changed inputs."""
+    changed = set(changed)
+    return tuple(mode for mode in MODES if MODE_INPUTS[mode] & changed)
+
+## @brief Result table that recalculates only the rows affected by a change.
+class LiveCalculator:
+    """Keeps the result rows and recalculates only the rows affected by input changes."""
+
+    def __init__(self):
+        self.inputs = None
+        self.recalculated = 0
+        self._runtimes = {}
+        self._rows = []
+
+    ## @brief Returns the cache key of a row.
+    #  @param mode One of MODES.
+    #  @param scenario Scenario of the row.
+    @staticmethod
+    def _key(mode, scenario):
+        """Returns the key of a row: the mode and the row inputs the mode depends on."""
+        return (mode,) + tuple(getattr(scenario, name) if name in MODE_INPUTS[mode] else None for name in ROW_INPUTS)
+
+    ## @brief Updates the results to new inputs.
+    #  @param inputs Dictionary of the parsed GUI inputs, with the lists
+    #         'consumer_currents' and 'consumer_voltages'.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    #  @return ResultSet with all rows calculated for these inputs, at least the selected ones.
+    def update(self, inputs, modes=None, probes=None):
+        """Recalculates the selected rows affected by the changed inputs and returns all known rows."""
+        shared = {f.name: inputs[f.name] for f in fields(Scenario) if f.name not in ROW_INPUTS}
+        if self.inputs is None:
+            stale = set(MODES)
+        else:
+            stale = set(affected_modes(name for name in shared if shared[name] != self.inputs.get(name)))
+
+        base = Scenario(**shared)
+        runtimes = {}
+        rows = []
+        recalculated = 0
+        for consumer_voltage in inputs['consumer_voltages']:
+            for consumer_current in inputs['consumer_currents']:
+                scenario = replace(base, consumer_current=consumer_current, consumer_voltage=consumer_voltage)
+                selected_probe = not probes or scenario.probe in probes
+                for mode in MODES:
+                    key = self._key(mode, scenario)
+                    rows.append((mode, scenario.probe, consumer_current, consumer_voltage, key))
+                    if key in runtimes:
+                        continue
+                    if mode not in stale and key in self._runtimes:
+                        runtimes[key] = self._runtimes[key]
+                    elif selected_probe and (not modes or mode in modes):
+                        runtimes[key] = calculate_scenario(scenario, mode)
+                        recalculated += 1
+
+        # Only keep the new state once every row was calculated without error
+        self.inputs = dict(shared)
+        self._runtimes = runtimes
+        self._rows = rows
+        self.recalculated = recalculated
+        return self.results()
+
+    ## @brief Returns the calculated rows.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    #  @return ResultSet in table order (voltage, consumer, mode); rows that
+    #          were not calculated because they were deselected are left out.
+    def results(self, modes=None, probes=None):
+        """Returns the calculated rows, optionally only those of the selected modes and probes."""
+        results = ResultSet()
+        for mode, probe, consumer_current, consumer_voltage, key in self._rows:
+            if (modes and mode not in modes) or (probes and probe not in probes):
+                continue
+            runtime = self._runtimes.get(key)
+            if runtime is not None:
+                results.append(mode, probe, consumer_current, consumer_voltage, *runtime)
+        return results
+
+    def clear(self):
+        """Forgets all rows, the next update recalculates everything."""
+        self.inputs = None
+        self._runtimes = {}
+        self._rows = []
@@ -0,0 +1,196 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: parallel.py
+@brief: Multi-core execution of scenario sets with a process pool.
+
+@details:
+    The scenarios are split into chunks which are calculated by a pool of
+    worker processes. Only a bounded number of chunks is in flight at once,
+    so large inputs are still streamed, and the results are returned in the
+    order of the input regardless of which worker finished first.
+
+    Every chunk reports the process that calculated it and how long it took,
+    which is collected in a ParallelStats object to show how the calculation
+    scales with the number of workers.
+
+@license: MIT License
+================================================================================
+"""
+
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from batterycalc.cache import ChunkCache
+from batterycalc.engine import MODES, calculate_scenario
+
+## @brief Calculates the output rows of a chunk of scenarios.
+#  @param numbered_scenarios Sequence of (scenario number, Scenario) pairs.
+#  @param modes Modes to calculate.
+#  @param cache Optional cache.ChunkCache to reuse the results of an equal chunk.
+#  @return Tuple of the output rows (see cli.OUTPUT_COLUMNS), ordered by
+#          scenario number and mode, and a list of (scenario number, message)
+#          for scenarios that failed.
+def calculate_chunk(numbered_scenarios, modes=MODES, cache=None):
+    """Calculates all requested modes for a chunk of scenarios."""
+    if cache is not None:
+        return cache.calculate_chunk(numbered_scenarios, modes, calculate_chunk)
+    rows = []
+    errors = []
+    for number, scenario in numbered_scenarios:
+        try:
+            scenario_rows = []
+            for mode in modes:
+                runtime_minutes, runtime_hours, runtime_days = calculate_scenario(scenario, mode)
+                scenario_rows.append((number, mode, scenario.probe, scenario.consumer_current, scenario.consumer_voltage,
+                                      runtime_minutes, runtime_hours, runtime_days))
+        except (ArithmeticError, ValueError) as e:
+            errors.append((number, str(e)))
+        else:
+            rows.extend(scenario_rows)
+    return rows, errors
+
+## @brief Work done by one worker process.
+@dataclass
+class WorkerStats:
+    chunks: int = 0
+    scenarios: int = 0
+    rows: int = 0
+    busy_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def throughput(self):
+        """Scenarios calculated per second of busy time."""
+        return self.scenarios / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+## @brief Throughput of a parallel run, in total and per worker process.
+@dataclass
+class ParallelStats:
+    workers: int = 1
+    chunk_size: int = 0
+    wall_seconds: float = 0.0
+    per_worker: dict = field(default_factory=dict)
+
+    @property
+    def scenarios(self):
+        """Total number of scenarios calculated."""
+        return sum(w.scenarios for w in self.per_worker.values())
+
+    @property
+    def throughput(self):
+        """Scenarios calculated per second of wall time."""
+        return self.scenarios / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def record(self, pid, scenarios, rows, busy_seconds, cache_hits=0, cache_misses=0):
+        """Adds the result of one chunk to the statistics of its worker."""
+        worker = self.per_worker.setdefault(pid, WorkerStats())
+        worker.chunks += 1
+        worker.scenarios += scenarios
+        worker.rows += rows
+        worker.busy_seconds += busy_seconds
+        worker.cache_hits += cache_hits
+        worker.cache_misses += cache_misses
+
+    def report(self):
+        """Formats the statistics as a human readable table."""
+        lines = [f"{self.scenarios} scenarios in {self.wall_seconds:.2f} s "
+                 f"({self.throughput:.0f} scenarios/s, {self.workers} workers, chunk size {self.chunk_size})"]
+        for pid, worker in sorted(self.per_worker.items()):
+            line = (f"  worker {pid}: {worker.chunks} chunks, {worker.scenarios} scenarios, "
+                    f"{worker.busy_seconds:.2f} s busy, {worker.throughput:.0f} scenarios/s")
+            if worker.cache_hits or worker.cache_misses:
+                line += f", cache {worker.cache_hits} hits / {worker.cache_misses} misses (chunks)"
+            lines.append(line)
+        return "\n".join(lines)
+
+# Cache of this process, created on first use from the cache configuration
+_process_cache = None
+
+## @brief Returns the ChunkCache of this process for a cache configuration.
+#  @param cache_config Tuple of (maxsize, path), or None for no cache.
+#  @return ChunkCache or None.
+def _get_process_cache(cache_config):
+    """Returns the ChunkCache of this process, creating it on first use."""
+    global _process_cache
+    if cache_config is None:
+        return None
+    if _process_cache is None or (_process_cache.maxsize, _process_cache.path) != cache_config:
+        if _process_cache is not None:
+            _process_cache.close()
+        maxsize, path = cache_config
+        _process_cache = ChunkCache(maxsize=maxsize, path=path)
+    return _process_cache
+
+## @brief Calculates one chunk and measures the time it took.
+#  @param chunk List of (scenario number, Scenario) pairs.
+#  @param modes Modes to calculate.
+#  @param cache_config Tuple of (maxsize, path) of the cache, or None.
+#  @return Tuple of rows, errors, process id, busy time in seconds, and the
+#          chunk cache hits and misses.
+def _calculate_chunk_timed(chunk, modes, cache_config=None):
+    """Calculates one chunk in a worker and measures the time it took."""
+    start = time.perf_counter()
+    cache = _get_process_cache(cache_config)
+    hits = misses = 0
+    if cache is not None:
+        hits, misses = cache.hits + cache.disk_hits, cache.misses
+    rows, errors = calculate_chunk(chunk, modes, cache)
+    if cache is not None:
+        cache.flush()
+        hits, misses = cache.hits + cache.disk_hits - hits, cache.misses - misses
+    return rows, errors, os.getpid(), time.perf_counter() - start, hits, misses
+
+## @brief Calculates scenarios in chunks on a process pool.
+#  @param numbered_scenarios Iterable of (scenario number, Scenario) pairs.
+#  @param modes Modes to calculate.
+#  @param workers Number of worker processes; 1 calculates in this process,
+#         None uses one worker per CPU.
+#  @param chunk_size Number of scenarios sent to a worker at once.
+#  @param stats Optional ParallelStats object that is filled in during the run.
+#  @param cache_config Optional tuple of (maxsize, path) of the ChunkCache
+#         used by each process; path may be None for a memory-only cache.
+#         The results of each chunk are committed to it in one transaction.
+#  @return Iterator of (rows, errors) per chunk, in input order.
+def run_parallel(numbered_scenarios, modes=MODES, workers=None, chunk_size=1000, stats=None, cache_config=None):
+    """Calculates scenarios in chunks on a process pool, in input order."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    stats = stats if stats is not None else ParallelStats()
+    stats.workers = workers
+    stats.chunk_size = chunk_size
+
+    scenarios = iter(numbered_scenarios)
+    chunks = iter(lambda: list(itertools.islice(scenarios, chunk_size)), [])
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                rows, errors, pid, busy, hits, misses = _calculate_chunk_timed(chunk, modes, cache_config)
+                stats.record(pid, len(chunk), len(rows), busy, hits, misses)
+                yield rows, errors
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a few chunks per worker queued, but never the whole input
+            pending = deque()
+            for chunk in itertools.islice(chunks, 2 * workers):
+                pending.append((len(chunk), executor.submit(_calculate_chunk_timed, chunk, modes, cache_config)))
+            while pending:
+                size, future = pending.popleft()
+                rows, errors, pid, busy, hits, misses = future.result()
+                stats.record(pid, size, len(rows), busy, hits, misses)
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append((len(chunk), executor.submit(_calculate_chunk_timed, chunk, modes, cache_config)))
+                yield rows, errors
+    finally:
+        stats.wall_seconds = time.perf_counter() - start
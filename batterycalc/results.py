@@ -0,0 +1,220 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: results.py
+@brief: Compact columnar store for calculation results.
+
+@details:
+    A ResultSet keeps one typed array per column instead of one dictionary of
+    pre-formatted strings per row. Mode and probe are stored as category
+    codes into MODES and a per-set probe table, the numbers are stored as
+    doubles and 64-bit integers. A row takes about 50 bytes, so millions of
+    rows fit comfortably in memory, and the raw numbers stay available for
+    sorting, export and analysis. Formatting happens only at display or
+    export time (see table.format_row).
+
+@license: MIT License
+================================================================================
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import chain, compress
+from operator import and_
+
+from batterycalc.engine import MODES
+
+## @brief Columnar result rows: mode, probe, consumer, voltage and runtime.
+class ResultSet:
+    """Columnar store of result rows with category-coded mode and probe."""
+
+    __slots__ = ('mode_codes', 'probe_codes', 'current_ma', 'voltage_v',
+                 'runtime_min', 'runtime_h', 'runtime_d', 'probes', '_probe_index')
+
+    # Value names of a row, in the order returned by row()
+    FIELDS = ('mode', 'probe', 'current_ma', 'voltage_v', 'runtime_min', 'runtime_h', 'runtime_d')
+
+    def __init__(self, probes=()):
+        self.mode_codes = array('B')
+        self.probe_codes = array('H')
+        self.current_ma = array('d')
+        self.voltage_v = array('d')
+        self.runtime_min = array('q')
+        self.runtime_h = array('q')
+        self.runtime_d = array('d')
+        self.probes = list(probes)
+        self._probe_index = {probe: code for code, probe in enumerate(self.probes)}
+
+    def __len__(self):
+        return len(self.runtime_h)
+
+    def __getitem__(self, index):
+        """Returns a row tuple for an integer index, a ResultSet for a slice."""
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        return self.row(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    ## @brief Returns the category code of a probe, adding it if it is new.
+    #  @param probe Probe name.
+    #  @return Code into self.probes.
+    def probe_code(self, probe):
+        """Returns the category code of a probe, adding it if it is new."""
+        code = self._probe_index.get(probe)
+        if code is None:
+            code = self._probe_index[probe] = len(self.probes)
+            self.probes.append(probe)
+        return code
+
+    ## @brief Appends one row.
+    #  @param mode One of MODES.
+    #  @param probe Probe name.
+    #  @param current_ma Consumer current in mA.
+    #  @param voltage_v Consumer voltage in V.
+    #  @param runtime_minutes Runtime in minutes.
+    #  @param runtime_hours Runtime in hours.
+    #  @param runtime_days Runtime in days.
+    def append(self, mode, probe, current_ma, voltage_v, runtime_minutes, runtime_hours, runtime_days):
+        """Appends one row."""
+        self.mode_codes.append(MODES.index(mode))
+        self.probe_codes.append(self.probe_code(probe))
+        self.current_ma.append(current_ma)
+        self.voltage_v.append(voltage_v)
+        self.runtime_min.append(runtime_minutes)
+        self.runtime_h.append(runtime_hours)
+        self.runtime_d.append(runtime_days)
+
+    ## @brief Appends all rows of another ResultSet.
+    #  @param other ResultSet to append.
+    def extend(self, other):
+        """Appends all rows of another ResultSet."""
+        if other.probes == self.probes[:len(other.probes)]:
+            self.probe_codes.extend(other.probe_codes)
+        else:
+            recode = [self.probe_code(probe) for probe in other.probes]
+            self.probe_codes.extend(recode[code] for code in other.probe_codes)
+        self.mode_codes.extend(other.mode_codes)
+        self.current_ma.extend(other.current_ma)
+        self.voltage_v.extend(other.voltage_v)
+        self.runtime_min.extend(other.runtime_min)
+        self.runtime_h.extend(other.runtime_h)
+        self.runtime_d.extend(other.runtime_d)
+
+    ## @brief Returns one row as a tuple of raw values, see FIELDS.
+    #  @param i Row index.
+    def row(self, i):
+        """Returns one row as a tuple of raw values."""
+        return (MODES[self.mode_codes[i]], self.probes[self.probe_codes[i]], self.current_ma[i],
+                self.voltage_v[i], self.runtime_min[i], self.runtime_h[i], self.runtime_d[i])
+
+    ## @brief Returns a new ResultSet with the given rows.
+    #  @param indices Iterable of row indices.
+    #  @return ResultSet sharing the probe table.
+    def take(self, indices):
+        """Returns a new ResultSet with the given rows, in the given order."""
+        indices = indices if isinstance(indices, (range, list)) else list(indices)
+        result = ResultSet(self.probes)
+        for name in ('mode_codes', 'probe_codes', 'current_ma', 'voltage_v', 'runtime_min', 'runtime_h', 'runtime_d'):
+            column = getattr(self, name)
+            if isinstance(indices, range) and indices.step == 1:
+                setattr(result, name, column[indices.start:indices.stop])
+            else:
+                getattr(result, name).extend(map(column.__getitem__, indices))
+        return result
+
+    ## @brief Returns the indices of the rows matching a mode and probe selection.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    #  @return List of row indices.
+    def select(self, modes=None, probes=None):
+        """Returns the indices of the rows matching a mode and probe selection."""
+        keep = None
+        if modes:
+            selected = [mode in modes for mode in MODES]
+            keep = map(selected.__getitem__, self.mode_codes)
+        if probes:
+            selected = [probe in probes for probe in self.probes]
+            keep_probe = map(selected.__getitem__, self.probe_codes)
+            keep = keep_probe if keep is None else map(and_, keep, keep_probe)
+        if keep is None:
+            return list(range(len(self)))
+        return list(compress(range(len(self)), keep))
+
+    ## @brief Returns a new ResultSet with the rows matching a mode and probe selection.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    def filter(self, modes=None, probes=None):
+        """Returns a new ResultSet with the rows matching the selection."""
+        if not modes and not probes:
+            return self
+        return self.take(self.select(modes, probes))
+
+    ## @brief Returns the values of a column.
+    #  @param name Column name from FIELDS.
+    #  @return Sequence of raw values; mode and probe are returned as names.
+    def column(self, name):
+        """Returns the values of a column, mode and probe as names."""
+        if name == 'mode':
+            return [MODES[code] for code in self.mode_codes]
+        if name == 'probe':
+            return [self.probes[code] for code in self.probe_codes]
+        return getattr(self, name)
+
+    ## @brief Converts the rows to a NumPy structured array.
+    #  @return Structured array with mode and probe as category codes.
+    def to_numpy(self):
+        """Converts the rows to a NumPy structured array (requires NumPy)."""
+        import numpy as np
+
+        result = np.empty(len(self), dtype=[('mode', 'u1'), ('probe', 'u2'), ('current_ma', 'f8'), ('voltage_v', 'f8'),
+                                            ('runtime_min', 'i8'), ('runtime_h', 'i8'), ('runtime_d', 'f8')])
+        result['mode'] = np.frombuffer(self.mode_codes, dtype=np.uint8)
+        result['probe'] = np.frombuffer(self.probe_codes, dtype=np.uint16)
+        for name in ('current_ma', 'voltage_v', 'runtime_min', 'runtime_h', 'runtime_d'):
+            result[name] = np.frombuffer(getattr(self, name), dtype=result.dtype[name])
+        return result
+
+## @brief Row indices of a ResultSet grouped by mode, probe and voltage.
+class ResultIndex:
+    """Row indices of a ResultSet grouped by mode, probe and consumer voltage."""
+
+    ## @brief Creates the index of a ResultSet.
+    #  @param results ResultSet to index; rows are indexed on the first select()
+    #         and rows appended later on the next one.
+    def __init__(self, results):
+        self.results = results
+        self.groups = {}
+        self.indexed = 0
+
+    def update(self):
+        """Adds the rows appended to the ResultSet since the last update."""
+        r = self.results
+        groups = self.groups
+        start = self.indexed
+        for i, key in enumerate(zip(r.mode_codes[start:], r.probe_codes[start:], r.voltage_v[start:]), start):
+            rows = groups.get(key)
+            if rows is None:
+                rows = groups[key] = array('q')
+            rows.append(i)
+        self.indexed = len(r)
+
+    ## @brief Returns the indices of the rows matching a selection.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    #  @param start Only return rows from this index on.
+    #  @return Sorted list of row indices.
+    def select(self, modes=None, probes=None, start=0):
+        """Returns the indices of the rows matching a mode and probe selection, in row order."""
+        if self.indexed < len(self.results):
+            self.update()
+        mode_codes = {MODES.index(mode) for mode in modes if mode in MODES} if modes else None
+        probe_codes = {self.results._probe_index.get(probe) for probe in probes} if probes else None
+        parts = [rows for (mode, probe, voltage), rows in self.groups.items()
+                 if (mode_codes is None or mode in mode_codes) and (probe_codes is None or probe in probe_codes)]
+        if start:
+            parts = [rows[bisect_left(rows, start):] for rows in parts]
+        return sorted(chain.from_iterable(parts))
@@ -0,0 +1,243 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: sweep.py
+@brief: NumPy-vectorized parameter sweeps for all operation modes.
+
+@details:
+    Every function in this module accepts scalars or arrays for each input.
+    The inputs are broadcast against each other and the runtime is computed
+    for all combinations in one vectorized pass. The results match the scalar
+    functions in engine.py row for row.
+
+    Dense grids are built with grid(), e.g.:
+
+        params = grid(battery_capacity_mah=np.arange(500, 5001, 100),
+                      wakeup_interval_s=[10, 60, 600],
+                      consumer_current=[1.0, 4.5, 10.0, 100.0])
+        results = sweep(**params)
+        minutes, hours, days = results[LOG_MODE]
+
+    Any sweep() input that is not given takes its value from DEFAULT_INPUTS.
+
+    battery_profile may be a single name or an array of names; each profile
+    is evaluated as one np.interp over its precompiled lookup table, see
+    discharge.py.
+
+@dependencies:
+    - NumPy: install with `pip install batteryCalculator[sweep]`.
+
+@license: MIT License
+================================================================================
+"""
+
+from dataclasses import asdict
+
+import numpy as np
+
+from batterycalc.engine import (ALWAYS_ON_MODE, HOURS_PER_DAY, IDEAL_PROFILE, LOG_MODE, MAX_CORRECTION_STEPS,
+                                MAX_RUNTIME_HOURS, MODES, SLEEP_MODE, Scenario)
+
+# Default values of the GUI input fields
+DEFAULT_INPUTS = asdict(Scenario())
+
+# Runtime returned with errors='mask' for rows that cannot be calculated
+INVALID_RUNTIME = -1
+# Runtime returned with errors='mask' for loads that never drain the battery:
+# no power at all, or a runtime beyond engine.MAX_RUNTIME_HOURS
+UNBOUNDED_RUNTIME = -2
+
+## @brief Builds the cartesian product of the given parameter axes.
+#  @param axes Parameter names mapped to a scalar or a 1-D sequence of values.
+#  @return Dictionary with one flat array per parameter, one entry per combination.
+def grid(**axes):
+    """Builds the cartesian product of the given parameter axes."""
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(axes[name])) for name in names]
+    mesh = np.meshgrid(*values, indexing='ij')
+    return {name: column.ravel() for name, column in zip(names, mesh)}
+
+## @brief Vectorized runtime solver, see engine.calculate_runtime.
+#  @param battery_energy_wh Battery energy in Wh.
+#  @param power_watt Power drawn by the load in W.
+#  @param self_discharge_percent Self-discharge per day in percent of the initial energy.
+#  @param errors 'raise' raises a ValueError for rows the engine would reject, 'mask' returns
+#         UNBOUNDED_RUNTIME hours for loads too small to ever run out and INVALID_RUNTIME
+#         hours for all other rejected rows (and the matching negative minutes and days).
+#  @return Runtime arrays in minutes, hours, and days.
+def calculate_runtime(battery_energy_wh, power_watt, self_discharge_percent, errors='raise'):
+    """Calculates the runtime in minutes, hours, and days for arrays of inputs."""
+    if errors not in ('raise', 'mask'):
+        raise ValueError(f"Unknown errors option: {errors!r}")
+    energy, power, self_discharge_percent = np.broadcast_arrays(
+        np.asarray(battery_energy_wh, dtype=float),
+        np.asarray(power_watt, dtype=float),
+        np.asarray(self_discharge_percent, dtype=float),
+    )
+    self_discharge_wh_per_day = energy * (self_discharge_percent / 100)
+    active = np.array(energy > 0)
+    invalid = np.zeros(energy.shape, dtype=bool)
+    unbounded = np.zeros(energy.shape, dtype=bool)
+
+    def reject(rows, message, never_runs_out=False):
+        if errors == 'raise' and rows.any():
+            raise ValueError(message())
+        (unbounded if never_runs_out else invalid)[...] |= rows
+        active[...] &= ~rows
+
+    reject(active & ~(power >= 0),
+           lambda: f"Power consumption must be greater than 0 W, got {power[active & ~(power >= 0)][0]}")
+    reject(active & (power == 0),
+           lambda: f"Power consumption must be greater than 0 W, got {power[active & (power == 0)][0]}",
+           never_runs_out=True)
+
+    energy_per_day = HOURS_PER_DAY * power + self_discharge_wh_per_day
+    max_drop_per_day = np.maximum((HOURS_PER_DAY - 1) * power, energy_per_day)
+    first_day = energy <= max_drop_per_day
+    reject(active & ~first_day & (energy_per_day <= 0),
+           lambda: "Self-discharge cancels out the power consumption, the battery never runs out")
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        days = np.where(first_day | ~active, 0.0, (energy - max_drop_per_day) / energy_per_day)
+        reject(days * HOURS_PER_DAY > MAX_RUNTIME_HOURS,
+               lambda: f"Power consumption is too small, the runtime exceeds {MAX_RUNTIME_HOURS} hours",
+               never_runs_out=True)
+        days = np.where(active, days, 0.0)
+        full_days = np.ceil(days)
+        energy_at_day_start = energy - full_days * energy_per_day
+        hour_of_day = np.minimum(np.ceil(energy_at_day_start / power), HOURS_PER_DAY)
+    hour_of_day = np.where(active, np.maximum(hour_of_day, 1), 0)
+    runtime_hours = np.where(active, full_days * HOURS_PER_DAY + hour_of_day, 0).astype(np.int64)
+
+    # Settle rounding in the divisions, exactly like the scalar solver
+    def energy_left(hours):
+        return energy - hours * power - (hours // HOURS_PER_DAY) * self_discharge_wh_per_day
+
+    for _ in range(MAX_CORRECTION_STEPS):
+        step_back = active & (runtime_hours > 1) & (energy_left(runtime_hours - 1) <= 0)
+        step_forward = active & ~step_back & (energy_left(runtime_hours) > 0)
+        if not (step_back.any() or step_forward.any()):
+            break
+        runtime_hours += step_forward.astype(np.int64) - step_back
+    else:
+        reject(step_back | step_forward,
+               lambda: "The runtime cannot be resolved to the hour, the power consumption is too small",
+               never_runs_out=True)
+    runtime_hours[invalid] = INVALID_RUNTIME
+    runtime_hours[unbounded] = UNBOUNDED_RUNTIME
+
+    runtime_minutes = runtime_hours * 60
+    runtime_days = runtime_hours / HOURS_PER_DAY
+    return runtime_minutes, runtime_hours, runtime_days
+
+## @brief Vectorized engine.battery_energy.
+#  @param boosted Boolean array, True where the load is supplied through the booster.
+#  @return Battery energy array in Wh.
+def _battery_energy(battery_voltage, battery_capacity_mah, boosted, battery_profile, temperature_c):
+    """Returns the battery energy in Wh for arrays of inputs and battery profiles."""
+    capacity_ah = np.asarray(battery_capacity_mah) / 1000
+    energy = capacity_ah * battery_voltage
+    profiles = np.asarray(battery_profile)
+    if profiles.ndim == 0 and profiles == IDEAL_PROFILE:
+        return energy
+
+    from batterycalc.discharge import load_profile
+
+    energy, boosted, profiles, temperature_c = np.broadcast_arrays(
+        energy, np.asarray(boosted), profiles, np.asarray(temperature_c, dtype=float))
+    charge_factor = np.ones(energy.shape)
+    energy_factor = np.ones(energy.shape)
+    for name in (np.unique(profiles) if profiles.ndim else (profiles[()],)):
+        if name == IDEAL_PROFILE:
+            continue
+        table = load_profile(str(name))
+        where = profiles == name
+        temperature = temperature_c[where]
+        charge_factor[where] = np.interp(temperature, table.temperatures_c, table.charge_factors)
+        energy_factor[where] = np.interp(temperature, table.temperatures_c, table.energy_factors)
+    # Boosted loads are limited by the energy, all others by the charge (see discharge.py)
+    return energy * np.where(boosted, energy_factor, charge_factor)
+
+## @brief Applies the booster efficiency to consumers supplied with 5 V.
+#  @param power_consumption_consumer Power consumption of consumers.
+#  @param consumer_voltage Voltage of consumers.
+#  @param booster_efficiency Booster efficiency.
+#  @return Consumer current drawn through the booster.
+def _boosted_consumer_current(power_consumption_consumer, consumer_voltage, booster_efficiency):
+    """Applies the booster efficiency to consumers supplied with 5 V."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(consumer_voltage == 5.0,
+                        power_consumption_consumer / booster_efficiency,
+                        power_consumption_consumer)
+
+## @brief Vectorized calculate_battery_life_always_on.
+#  @return Runtime arrays in minutes, hours, and days.
+def calculate_battery_life_always_on(battery_voltage, battery_capacity_mah, power_consumption_device, power_consumption_consumer, consumer_voltage, booster_efficiency=1.0, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, errors='raise'):
+    """Calculates battery runtime for Always ON Mode for arrays of inputs."""
+    power_consumption_consumer = _boosted_consumer_current(
+        np.asarray(power_consumption_consumer, dtype=float), np.asarray(consumer_voltage), booster_efficiency)
+    total_current_consumption_ma = power_consumption_device + 2 * power_consumption_consumer
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = _battery_energy(battery_voltage, battery_capacity_mah, np.asarray(consumer_voltage) == 5.0, battery_profile, temperature_c)
+    return calculate_runtime(battery_energy_wh, power_watt, self_discharge_percent, errors)
+
+## @brief Vectorized calculate_battery_life_log_mode.
+#  @return Runtime arrays in minutes, hours, and days.
+def calculate_battery_life_log_mode(battery_voltage, battery_capacity_mah, sleep_power, on_power, power_consumption_consumer, consumer_voltage, wakeup_interval_s, consumer_activation_time_ms=100, processing_time_ms=50, booster_efficiency=1.0, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, errors='raise'):
+    """Calculates battery runtime for Log Mode for arrays of inputs."""
+    consumer_activation_time_h = np.asarray(consumer_activation_time_ms) / 1000 / 3600
+    processing_time_h = np.asarray(processing_time_ms) / 1000 / 3600
+    on_time_per_hour_h = 3600 / np.asarray(wakeup_interval_s) / 3600
+    power_consumption_consumer = _boosted_consumer_current(
+        np.asarray(power_consumption_consumer, dtype=float), np.asarray(consumer_voltage), booster_efficiency)
+    total_current_consumption_ma = (sleep_power * (1 - on_time_per_hour_h)) + \
+                                  ((on_power + 2 * power_consumption_consumer) * on_time_per_hour_h) + \
+                                  (2 * power_consumption_consumer * consumer_activation_time_h) + \
+                                  (on_power * processing_time_h)
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = _battery_energy(battery_voltage, battery_capacity_mah, np.asarray(consumer_voltage) == 5.0, battery_profile, temperature_c)
+    return calculate_runtime(battery_energy_wh, power_watt, self_discharge_percent, errors)
+
+## @brief Vectorized calculate_battery_life_sleep_mode.
+#  @return Runtime arrays in minutes, hours, and days.
+def calculate_battery_life_sleep_mode(battery_voltage, battery_capacity_mah, sleep_power, consumer_voltage, self_discharge_percent=0.05, battery_profile=IDEAL_PROFILE, temperature_c=25.0, errors='raise'):
+    """Calculates battery runtime for Sleep Mode for arrays of inputs."""
+    total_current_consumption_ma = np.asarray(sleep_power, dtype=float)
+    power_watt = total_current_consumption_ma / 1000 * consumer_voltage
+    battery_energy_wh = _battery_energy(battery_voltage, battery_capacity_mah, False, battery_profile, temperature_c)
+    return calculate_runtime(battery_energy_wh, power_watt, self_discharge_percent, errors)
+
+## @brief Runs the selected modes over broadcast arrays of inputs.
+#  @param modes Modes to calculate, defaults to all of MODES.
+#  @param errors 'raise' or 'mask', see calculate_runtime.
+#  @param inputs Input values by name (see DEFAULT_INPUTS), scalars or arrays.
+#  @return Dictionary mapping each mode to its runtime arrays in minutes, hours, and days.
+def sweep(modes=MODES, errors='raise', **inputs):
+    """Calculates the runtime of every mode for all input combinations."""
+    unknown = set(inputs) - set(DEFAULT_INPUTS)
+    if unknown:
+        raise TypeError(f"Unknown sweep inputs: {', '.join(sorted(unknown))}")
+    # A single battery profile name is not broadcast, so the ideal profile costs nothing
+    profile = np.asarray(inputs.get('battery_profile', DEFAULT_INPUTS['battery_profile']))
+    names = [name for name in DEFAULT_INPUTS if name != 'battery_profile' or profile.ndim]
+    arrays = np.broadcast_arrays(*(np.asarray(inputs.get(name, DEFAULT_INPUTS[name])) for name in names))
+    p = {'battery_profile': profile, **dict(zip(names, arrays))}
+
+    results = {}
+    for mode in modes:
+        if mode == ALWAYS_ON_MODE:
+            results[mode] = calculate_battery_life_always_on(
+                p['battery_voltage'], p['battery_capacity_mah'], p['power_consumption_always_on'], p['consumer_current'], p['consumer_voltage'], booster_efficiency=p['booster_efficiency'], self_discharge_percent=p['self_discharge_percent'], battery_profile=p['battery_profile'], temperature_c=p['temperature_c'], errors=errors
+            )
+        elif mode == LOG_MODE:
+            results[mode] = calculate_battery_life_log_mode(
+                p['battery_voltage'], p['battery_capacity_mah'], p['power_consumption_log_sleep'], p['power_consumption_log_on'], p['consumer_current'], p['consumer_voltage'], p['wakeup_interval_s'], consumer_activation_time_ms=p['consumer_activation_time_ms'], processing_time_ms=p['processing_time_ms'], booster_efficiency=p['booster_efficiency'], self_discharge_percent=p['self_discharge_percent'], battery_profile=p['battery_profile'], temperature_c=p['temperature_c'], errors=errors
+            )
+        elif mode == SLEEP_MODE:
+            results[mode] = calculate_battery_life_sleep_mode(
+                p['battery_voltage'], p['battery_capacity_mah'], p['power_consumption_sleep_mode'], p['consumer_voltage'], self_discharge_percent=p['self_discharge_percent'], battery_profile=p['battery_profile'], temperature_c=p['temperature_c'], errors=errors
+            )
+        else:
+            raise ValueError(f"Unknown mode: {mode!r}")
+    return results
@@ -0,0 +1,178 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: table.py
+@brief: Numeric model of the result table, sorted outside of Tk.
+
+@details:
+    The result rows are kept in a ResultSet (raw numbers, not display
+    strings) and a separate view order. Sorting a column only reorders the
+    list of row indices with a numeric key, and formatting happens only for
+    the rows that are actually shown, so the GUI can display a window of a
+    result set of any size without one Tk call per row.
+
+    The mode and probe selection is applied the same way: the view order only
+    holds the rows of the selected modes and probes, looked up in a
+    ResultIndex, so changing the selection needs no recalculation.
+
+    While a column is sorted, rows added by a running calculation are sorted
+    on their own and merged into the view order with a binary search, so a
+    batch costs O(k log n) comparisons and one copy of the view instead of a
+    sort of the whole view.
+
+@license: MIT License
+================================================================================
+"""
+
+from array import array
+from bisect import bisect_right
+
+from batterycalc.engine import MODES
+from batterycalc.results import ResultIndex, ResultSet
+
+COLUMNS = ('Mode', 'Probe', 'Power Consumption', 'Voltage', 'Runtime [min]', 'Runtime [d]')
+
+# ResultSet column shown in each table column
+COLUMN_FIELDS = dict(zip(COLUMNS, ('mode', 'probe', 'current_ma', 'voltage_v', 'runtime_min', 'runtime_d')))
+
+## @brief Formats a raw result row for display.
+#  @param row Row tuple of a ResultSet, see ResultSet.FIELDS.
+#  @return Tuple of display strings, one per column in COLUMNS.
+def format_row(row):
+    """Formats a raw result row for display."""
+    mode, probe, current, voltage, runtime_minutes, runtime_hours, runtime_days = row
+    return (mode, probe, f"{current:.1f} mA", f"{voltage:.2f} V",
+            f"{runtime_minutes:.2f} min", f"{runtime_days:.2f} d")
+
+## @brief Result rows with a sortable view order.
+class ResultTableModel:
+    """Result rows with a sortable view order."""
+
+    def __init__(self):
+        self.rows = ResultSet()
+        self.index = ResultIndex(self.rows)
+        self.order = []
+        self.modes = None
+        self.probes = None
+        self.sort_column = None
+        self.sort_reverse = False
+        # Sort keys of the rows in view order, kept while extend() merges new rows
+        self._sort_keys = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def clear(self):
+        """Removes all rows, the selection and the sort order."""
+        self.rows = ResultSet()
+        self.index = ResultIndex(self.rows)
+        self.order = []
+        self.modes = None
+        self.probes = None
+        self.sort_column = None
+        self.sort_reverse = False
+        self._sort_keys = None
+
+    def extend(self, rows):
+        """Appends the rows of a ResultSet; keeps the current selection and sort order."""
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if self.modes or self.probes:
+            new = self.index.select(self.modes, self.probes, start)
+        else:
+            new = list(range(start, len(self.rows)))
+        if self.sort_column is None:
+            self.order.extend(new)
+        else:
+            self._merge(new)
+
+    ## @brief Merges new rows into the sorted view order.
+    #  @param new List of row indices added after all rows in the view.
+    def _merge(self, new):
+        """Sorts new rows and merges them into the view, like a stable sort of the whole view."""
+        typecode, key = self._merge_key()
+        if self._sort_keys is None:
+            # Typed arrays, so merging copies memory instead of object references
+            self.order = array('q', self.order)
+            self._sort_keys = array(typecode, map(key, self.order))
+        order, keys = self.order, self._sort_keys
+        merged_order, merged_keys = array('q'), array(typecode)
+        lo = 0
+        # Ties are sorted by row index; new rows go after old rows with an equal value
+        for value, i in sorted(zip(map(key, new), new)):
+            start, lo = lo, bisect_right(keys, value, lo)
+            merged_order += order[start:lo]
+            merged_keys += keys[start:lo]
+            merged_order.append(i)
+            merged_keys.append(value)
+        merged_order += order[lo:]
+        merged_keys += keys[lo:]
+        self.order, self._sort_keys = merged_order, merged_keys
+
+    ## @brief Returns the ascending numeric sort key of the sorted column.
+    #  @return Tuple of the array typecode of the keys and a function of a row
+    #          index; names are ranked alphabetically and keys are negated for a
+    #          descending sort.
+    def _merge_key(self):
+        """Returns a numeric key of the sorted column that orders rows as the view does."""
+        name = COLUMN_FIELDS[self.sort_column]
+        if name in ('mode', 'probe'):
+            names = MODES if name == 'mode' else self.rows.probes
+            rank = {value: r for r, value in enumerate(sorted(names))}
+            ranks = [rank[value] for value in names]
+            codes = self.rows.mode_codes if name == 'mode' else self.rows.probe_codes
+            typecode, key = 'q', lambda i: ranks[codes[i]]
+        else:
+            column = getattr(self.rows, name)
+            typecode, key = column.typecode, column.__getitem__
+        if self.sort_reverse:
+            return typecode, lambda i: -key(i)
+        return typecode, key
+
+    def replace(self, rows):
+        """Replaces all rows by the rows of a ResultSet; keeps the current selection and sort order."""
+        self.rows = rows
+        self.index = ResultIndex(rows)
+        self.select(self.modes, self.probes)
+
+    ## @brief Shows only the rows of the selected modes and probes.
+    #  @param modes Selected modes, empty or None for all.
+    #  @param probes Selected probes, empty or None for all.
+    def select(self, modes=None, probes=None):
+        """Shows only the rows of the selected modes and probes, looked up in the index."""
+        self.modes = list(modes) if modes else None
+        self.probes = list(probes) if probes else None
+        self._sort_keys = None
+        if self.modes or self.probes:
+            self.order = self.index.select(self.modes, self.probes)
+        else:
+            self.order = list(range(len(self.rows)))
+        if self.sort_column is not None:
+            self.sort(self.sort_column, self.sort_reverse)
+
+    ## @brief Sorts the view by a column.
+    #  @param column Column name from COLUMNS.
+    #  @param reverse True for descending order.
+    def sort(self, column, reverse=False):
+        """Sorts the view by a column, numerically for the numeric columns."""
+        values = self.rows.column(COLUMN_FIELDS[column])
+        self.order = sorted(self.order, key=values.__getitem__, reverse=reverse)
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self._sort_keys = None
+
+    ## @brief Returns the formatted rows of a part of the view.
+    #  @param start Index of the first row in view order.
+    #  @param count Number of rows.
+    #  @return List of tuples of display strings.
+    def window(self, start, count):
+        """Returns the formatted rows of a part of the view."""
+        row = self.rows.row
+        return [format_row(row(i)) for i in self.order[start:start + count]]
+
+    def iter_formatted(self):
+        """Iterates over all rows in view order, formatted for display."""
+        row = self.rows.row
+        for i in self.order:
+            yield format_row(row(i))
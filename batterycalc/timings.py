@@ -0,0 +1,223 @@
+"""
+================================================================================
+Battery Life Calculator Engine
+--------------------------------------------------------------------------------
+@file: timings.py
+@brief: Stage timings and cProfile output for finding where the time goes.
+
+@details:
+    The GUI and the batch mode time their stages (parsing the inputs,
+    calculating, building the result rows, filtering, inserting into the
+    table, sorting, the clipboard) into the module-wide StageTimings object
+    `timings`. Every stage keeps a call counter, the total and the longest
+    wall time and the number of rows it handled.
+
+    The timings are off by default and cost a single attribute check then.
+    They are turned on with the BATTERYCALC_TIMINGS environment variable or
+    the --timings option of calculator.py, whose value says where the
+    results go when the program exits:
+        1. "1" or "-": a table on stderr.
+        2. a path ending in .prof or .pstats: the whole run is profiled with
+           cProfile and the statistics are written there, for pstats or
+           snakeviz. cProfile only sees the main thread, the calculation
+           thread of the GUI shows up in the stage timings.
+        3. any other path: the stage timings as JSON, for regression
+           tracking.
+
+    In the GUI, the "Timings..." button shows the stage timings while they
+    are collected.
+
+@license: MIT License
+================================================================================
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+# Environment variable that turns the timings on, see the module description
+TIMINGS_ENV = 'BATTERYCALC_TIMINGS'
+
+# Output paths with these extensions get a cProfile dump instead of JSON
+CPROFILE_SUFFIXES = ('.prof', '.pstats')
+
+## @brief Counters of one stage.
+@dataclass
+class StageStats:
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+    @property
+    def mean_seconds(self):
+        """Mean wall time per call."""
+        return self.seconds / self.count if self.count else 0.0
+
+    @property
+    def rows_per_second(self):
+        """Rows handled per second of wall time."""
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+## @brief Times one run of a stage, see StageTimings.stage.
+class _Stage:
+    """Context manager that adds its wall time to a stage."""
+
+    __slots__ = ('timings', 'name', 'rows', 'start')
+
+    def __init__(self, timings, name, rows):
+        self.timings = timings
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+## @brief Stand-in for _Stage while the timings are off.
+class _NoStage:
+    """Context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # rows set by the timed code are ignored
+
+_NO_STAGE = _NoStage()
+
+## @brief Wall time, call counters and row counts per stage.
+class StageTimings:
+    """Collects the wall time, calls and rows of named stages; thread-safe."""
+
+    ## @brief Creates the timings.
+    #  @param enabled True to collect timings right away.
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    ## @brief Returns a context manager that times a stage.
+    #  @param name Name of the stage.
+    #  @param rows Rows handled, can also be set on the returned object.
+    #  @return Context manager; a shared no-op object while the timings are off.
+    def stage(self, name, rows=0):
+        """Times the code in a with block as one call of a stage."""
+        return _Stage(self, name, rows) if self.enabled else _NO_STAGE
+
+    ## @brief Adds a measurement to a stage.
+    #  @param name Name of the stage.
+    #  @param seconds Wall time in seconds.
+    #  @param rows Rows handled.
+    def add(self, name, seconds, rows=0):
+        """Adds wall time, rows and calls to a stage."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+
+    def reset(self):
+        """Forgets all measurements."""
+        with self._lock:
+            self.stages = {}
+
+    ## @brief Returns a copy of the counters.
+    #  @return Dictionary of stage name -> StageStats, in the order the stages were first seen.
+    def snapshot(self):
+        """Returns a consistent copy of the counters of all stages."""
+        with self._lock:
+            return {name: StageStats(**asdict(stats)) for name, stats in self.stages.items()}
+
+    def as_dict(self):
+        """Returns the timings as a JSON-serializable dictionary."""
+        import platform  # only needed for the output
+
+        stages = {}
+        for name, stats in self.snapshot().items():
+            stages[name] = dict(asdict(stats), mean_seconds=stats.mean_seconds,
+                                rows_per_second=stats.rows_per_second)
+        return {'python': platform.python_version(), 'platform': platform.platform(), 'stages': stages}
+
+    def report(self):
+        """Formats the timings as a human readable table."""
+        lines = [f"{'Stage':<14}{'Calls':>8}{'Total [ms]':>13}{'Mean [ms]':>12}{'Max [ms]':>12}"
+                 f"{'Rows':>11}{'Rows/s':>13}"]
+        for name, stats in self.snapshot().items():
+            lines.append(f"{name:<14}{stats.count:>8}{stats.seconds * 1000:>13.3f}{stats.mean_seconds * 1000:>12.3f}"
+                         f"{stats.max_seconds * 1000:>12.3f}{stats.rows:>11}{stats.rows_per_second:>13.0f}")
+        return "\n".join(lines)
+
+    ## @brief Writes the timings as JSON.
+    #  @param path Output file path.
+    def write_json(self, path):
+        """Writes the stage timings to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write('\n')
+
+    def start_profile(self):
+        """Starts profiling the calling thread with cProfile."""
+        import cProfile  # only loaded when profiling
+
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    ## @brief Stops cProfile and writes its statistics.
+    #  @param path Output file path, readable with pstats.
+    def write_profile(self, path):
+        """Stops profiling and writes the cProfile statistics to a file."""
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        self._profiler.dump_stats(path)
+        self._profiler = None
+
+    ## @brief Writes the results to their destination.
+    #  @param destination "1" or "-" for stderr, else an output file path.
+    def save(self, destination):
+        """Writes the timings to stderr, a cProfile file or a JSON file."""
+        if destination in ('1', '-'):
+            print(self.report(), file=sys.stderr)
+        elif destination.lower().endswith(CPROFILE_SUFFIXES):
+            self.write_profile(destination)
+        else:
+            self.write_json(destination)
+
+# Timings of this process, off until configure() turns them on
+timings = StageTimings()
+
+## @brief Turns the timings on as requested.
+#  @param destination Value of the --timings option; None reads the BATTERYCALC_TIMINGS
+#         environment variable. Empty or "0" leaves the timings off.
+#  @return The module-wide StageTimings object.
+def configure(destination=None):
+    """Turns the timings on and writes them to their destination when the program exits."""
+    if destination is None:
+        destination = os.environ.get(TIMINGS_ENV, '')
+    if destination in ('', '0') or timings.enabled:
+        return timings
+    timings.enabled = True
+    if destination.lower().endswith(CPROFILE_SUFFIXES):
+        timings.start_profile()
+    atexit.register(timings.save, destination)
+    return timings
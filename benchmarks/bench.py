@@ -0,0 +1,334 @@
+"""
+================================================================================
+Battery Life Calculator Benchmarks
+--------------------------------------------------------------------------------
+@file: bench.py
+@brief: Benchmark suite for the solver, the sweep and the result table paths.
+
+@details:
+    Every benchmark is run for a range of sizes (battery capacity, number of
+    scenarios, sweep points or table rows), so it shows how a path scales and
+    not only how fast it is for the GUI defaults. The table, clipboard and
+    GUI calculation benchmarks use the Tk-free ResultTableModel and run the
+    CalculationJob synchronously, so no display is needed. The suite does
+    not use the network; benchmarks whose optional dependency (NumPy,
+    Tkinter) is missing are skipped.
+
+    Each benchmark is timed several times and the fastest run counts. The
+    results can be saved as JSON and compared with a saved baseline; the
+    script exits with status 1 if a benchmark got slower than the baseline
+    by more than the threshold:
+
+        python benchmarks/bench.py --output baseline.json
+        python benchmarks/bench.py --baseline baseline.json --threshold 0.25
+
+@license: MIT License
+================================================================================
+"""
+
+import argparse
+import fnmatch
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batterycalc.engine import MODES, Scenario, calculate_runtime, calculate_scenario
+from batterycalc.export import serialize_results, write_results
+from batterycalc.results import ResultSet
+from batterycalc.table import COLUMNS, ResultTableModel
+
+# Registered benchmarks: name -> (function, sizes, quick sizes)
+BENCHMARKS = {}
+
+## @brief Registers a benchmark.
+#  @param name Name of the benchmark, the size is appended when it is reported.
+#  @param sizes Sizes of a full run.
+#  @param quick_sizes Sizes of a run with --quick.
+#  @return Decorator; the decorated function takes a size and returns the
+#          function to time, so setup work is not measured.
+def benchmark(name, sizes, quick_sizes):
+    """Registers a benchmark function for a range of sizes."""
+    def register(func):
+        BENCHMARKS[name] = (func, sizes, quick_sizes)
+        return func
+    return register
+
+## @brief Synthetic result rows, the same for every run.
+#  @param count Number of rows.
+#  @return ResultSet.
+def make_results(count):
+    """Creates a ResultSet of reproducible random rows."""
+    rng = random.Random(count)
+    probes = ['Low Current Sensor', 'Medium Current Sensor A', 'Medium Current Sensor B', 'High Current Sensor']
+    results = ResultSet()
+    for _ in range(count):
+        runtime_minutes = rng.randrange(60, 10_000_000)
+        results.append(rng.choice(MODES), rng.choice(probes), rng.uniform(0.1, 100.0), rng.choice((3.3, 3.45, 5.0)),
+                       runtime_minutes, runtime_minutes // 60, runtime_minutes / 1440)
+    return results
+
+## @brief Scenarios with reproducible random inputs.
+#  @param count Number of scenarios.
+#  @return List of Scenario.
+def make_scenarios(count):
+    """Creates a list of reproducible random scenarios."""
+    rng = random.Random(count)
+    return [Scenario(battery_capacity_mah=rng.randrange(500, 20000), consumer_current=rng.uniform(0.1, 100.0),
+                     wakeup_interval_s=rng.randrange(1, 3600)) for _ in range(count)]
+
+@benchmark('solver.closed_form', sizes=(1_000, 100_000, 10_000_000), quick_sizes=(1_000, 100_000))
+def bench_solver_closed_form(capacity_mah):
+    """1000 closed-form solves for a battery capacity."""
+    energy_wh = 3.7 * capacity_mah / 1000
+    powers = [0.0001 * (i + 1) for i in range(1000)]
+    return lambda: [calculate_runtime(energy_wh, power, 0.05) for power in powers]
+
+@benchmark('solver.loop', sizes=(1_000, 10_000, 100_000), quick_sizes=(1_000, 10_000))
+def bench_solver_loop(capacity_mah):
+    """One hourly reference solve at 1 mW for a battery capacity."""
+    energy_wh = 3.7 * capacity_mah / 1000
+    return lambda: calculate_runtime(energy_wh, 0.001, 0.05, method='loop')
+
+@benchmark('engine.scenarios', sizes=(1_000, 10_000, 100_000), quick_sizes=(1_000, 10_000))
+def bench_engine_scenarios(count):
+    """All modes of a list of scenarios with the scalar engine."""
+    scenarios = make_scenarios(count)
+    return lambda: [calculate_scenario(scenario, mode) for scenario in scenarios for mode in MODES]
+
+@benchmark('sweep.grid', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_sweep(count):
+    """All modes of a NumPy sweep over random inputs."""
+    import numpy as np
+
+    from batterycalc.sweep import sweep
+
+    rng = np.random.default_rng(count)
+    inputs = {'battery_capacity_mah': rng.integers(500, 20000, count),
+              'consumer_current': rng.uniform(0.1, 100.0, count),
+              'wakeup_interval_s': rng.integers(1, 3600, count)}
+    return lambda: sweep(**inputs)
+
+@benchmark('inverse.capacity', sizes=(1_000, 10_000, 100_000), quick_sizes=(1_000, 10_000))
+def bench_inverse_capacity(count):
+    """Minimum Log Mode capacity for random targets and consumer currents."""
+    import numpy as np
+
+    from batterycalc.engine import LOG_MODE
+    from batterycalc.inverse import solve
+
+    rng = np.random.default_rng(count)
+    targets = rng.uniform(30, 1500, count)
+    currents = rng.uniform(0.1, 100.0, count)
+    return lambda: solve(LOG_MODE, 'battery_capacity_mah', targets, consumer_current=currents)
+
+@benchmark('montecarlo', sizes=(100_000, 1_000_000), quick_sizes=(100_000,))
+def bench_montecarlo(draws):
+    """Monte Carlo run of all modes and probes with four varied inputs."""
+    from batterycalc.montecarlo import monte_carlo, normal, tolerance, uniform
+
+    inputs = {'battery_capacity_mah': tolerance(3500, 10), 'booster_efficiency': normal(0.9, 0.02, high=1.0),
+              'self_discharge_percent': uniform(0.02, 0.1), 'power_consumption_log_sleep': tolerance(0.3, 20)}
+    return lambda: monte_carlo(inputs, draws=draws, seed=1)
+
+@benchmark('gui.calculation', sizes=(10, 100, 1_000), quick_sizes=(10, 100))
+def bench_gui_calculation(count):
+    """The GUI calculation job for a number of consumer currents and two voltages, without a window."""
+    from batterycalc import gui
+
+    inputs = {name: value for name, value in vars(Scenario()).items()
+              if name not in ('consumer_current', 'consumer_voltage')}
+    inputs['consumer_currents'] = [0.5 + i * 0.25 for i in range(count)]
+    inputs['consumer_voltages'] = [3.3, 5.0]
+
+    def run():
+        job = gui.CalculationJob(inputs, [], [])
+        job._run()  # synchronously, the worker thread is not started
+        model = ResultTableModel()
+        while True:
+            kind, payload, done = job.queue.get_nowait()
+            if kind == 'done':
+                return model
+            if kind == 'rows':
+                model.extend(payload)
+    return run
+
+@benchmark('table.extend', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_table_extend(count):
+    """Adds rows to the table model in batches of 500, as the GUI does."""
+    results = make_results(count)
+    batches = [results[start:start + 500] for start in range(0, count, 500)]
+
+    def run():
+        model = ResultTableModel()
+        for batch in batches:
+            model.extend(batch)
+        return model
+    return run
+
+@benchmark('table.extend_sorted', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_table_extend_sorted(count):
+    """Adds rows to the table model in batches of 2000 while it is sorted by runtime, as one GUI poll does."""
+    results = make_results(count)
+    batches = [results[start:start + 2000] for start in range(0, count, 2000)]
+
+    def run():
+        model = ResultTableModel()
+        model.sort('Runtime [min]', reverse=True)
+        for batch in batches:
+            model.extend(batch)
+        return model
+    return run
+
+@benchmark('table.sort', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_table_sort(count):
+    """Sorts the table model by every column, as clicking the headings does."""
+    model = ResultTableModel()
+    model.extend(make_results(count))
+
+    def run():
+        for column in COLUMNS:
+            model.sort(column, reverse=True)
+        return model
+    return run
+
+@benchmark('table.select', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_table_select(count):
+    """Changes the mode and probe selection of a sorted table four times."""
+    model = ResultTableModel()
+    model.extend(make_results(count))
+    model.sort('Runtime [d]')
+    selections = [(['Log Mode'], ['Low Current Sensor']), (['Log Mode', 'Sleep Mode'], None),
+                  (None, ['High Current Sensor']), (None, None)]
+
+    def run():
+        for modes, probes in selections:
+            model.select(modes, probes)
+        return model
+    return run
+
+@benchmark('table.window', sizes=(10_000, 1_000_000), quick_sizes=(10_000,))
+def bench_table_window(count):
+    """Formats 100 windows of 40 rows of a sorted table, as scrolling does."""
+    model = ResultTableModel()
+    model.extend(make_results(count))
+    model.sort('Runtime [d]')
+    starts = range(0, count, max(count // 100, 1))
+    return lambda: [model.window(start, 40) for start in starts]
+
+@benchmark('export.clipboard', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_export_clipboard(count):
+    """Serializes the sorted table for the clipboard."""
+    model = ResultTableModel()
+    model.extend(make_results(count))
+    model.sort('Runtime [min]')
+    return lambda: serialize_results(model.rows, 'tsv', formatted=True, order=model.order)
+
+@benchmark('export.jsonl', sizes=(10_000, 100_000, 1_000_000), quick_sizes=(10_000, 100_000))
+def bench_export_jsonl(count):
+    """Writes raw rows as JSON Lines to memory."""
+    results = make_results(count)
+    return lambda: write_results(io.StringIO(), results, 'jsonl')
+
+## @brief Times a function.
+#  @param func Function without arguments.
+#  @param repeat Number of timed runs.
+#  @return Duration of the fastest run in seconds.
+def measure(func, repeat):
+    """Runs a function several times and returns the fastest duration in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+## @brief Runs the selected benchmarks.
+#  @param patterns Shell-style patterns of benchmark names, empty for all.
+#  @param quick True to run only the smaller sizes.
+#  @param repeat Number of timed runs per benchmark.
+#  @param report Function called with each result line.
+#  @return Dictionary of "name[size]" -> seconds.
+def run_benchmarks(patterns=(), quick=False, repeat=5, report=print):
+    """Runs the selected benchmarks and returns the fastest duration of each."""
+    results = {}
+    for name, (func, sizes, quick_sizes) in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        for size in (quick_sizes if quick else sizes):
+            key = f"{name}[{size}]"
+            try:
+                timed = func(size)
+            except ImportError as e:
+                report(f"{key:<36} skipped ({e})")
+                break
+            results[key] = measure(timed, repeat)
+            report(f"{key:<36} {results[key] * 1000:12.3f} ms")
+    return results
+
+## @brief Compares results with a baseline.
+#  @param results Dictionary of "name[size]" -> seconds.
+#  @param baseline Dictionary of "name[size]" -> seconds.
+#  @param threshold Allowed relative slowdown, e.g. 0.25 for 25 %.
+#  @param min_delta Slowdowns below this many seconds are ignored as noise.
+#  @return List of (key, baseline seconds, seconds) of the regressions.
+def compare(results, baseline, threshold, min_delta=0.001):
+    """Returns the benchmarks that got slower than the baseline by more than the threshold."""
+    regressions = []
+    for key, seconds in results.items():
+        before = baseline.get(key)
+        if before is not None and seconds > before * (1 + threshold) and seconds - before > min_delta:
+            regressions.append((key, before, seconds))
+    return regressions
+
+## @brief Command line entry point.
+#  @param argv Command line arguments, defaults to sys.argv[1:].
+#  @return Process exit code, 1 if a benchmark regressed.
+def main(argv=None):
+    """Runs the benchmarks, saves the results and compares them with a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmarks the solver, the sweep and the result table paths.")
+    parser.add_argument('patterns', nargs='*', metavar='PATTERN',
+                        help="run only benchmarks matching these shell patterns, e.g. 'table.*'")
+    parser.add_argument('--quick', action='store_true', help="run only the smaller sizes")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark, the fastest one counts")
+    parser.add_argument('-o', '--output', help="save the results as JSON, e.g. as a new baseline")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown against the baseline (default: %(default)s = 25%%)")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (func, sizes, quick_sizes) in BENCHMARKS.items():
+            print(f"{name:<20} {func.__doc__} Sizes: {', '.join(map(str, sizes))}")
+        return 0
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = run_benchmarks(args.patterns, args.quick, args.repeat)
+    if args.output:
+        document = {'python': platform.python_version(), 'platform': platform.platform(),
+                    'repeat': args.repeat, 'results': results}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for key, before, seconds in regressions:
+        print(f"REGRESSION {key}: {before * 1000:.3f} ms -> {seconds * 1000:.3f} ms "
+              f"(+{(seconds / before - 1) * 100:.0f}%)", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
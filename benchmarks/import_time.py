@@ -0,0 +1,110 @@
+"""
+================================================================================
+Battery Life Calculator Benchmarks
+--------------------------------------------------------------------------------
+@file: import_time.py
+@brief: Checks that the calculation core imports fast and without the GUI.
+
+@details:
+    Each module is imported in a fresh interpreter with `-X importtime` and
+    the cumulative import time of the module is compared with its budget.
+    The best of several runs is used, so a busy machine does not cause false
+    alarms. The script also checks that no heavy or GUI module (Tkinter,
+    NumPy, SQLite, multiprocessing, the process pool) is loaded as a side effect.
+
+    Budgets are multiples of a baseline measured the same way: the imports
+    of a bare interpreter (`python -c pass`). A slower machine has a larger
+    baseline and therefore larger budgets, so the check does not depend on
+    the hardware it runs on.
+
+    Exits with status 1 if a budget is exceeded, so it can run on CI:
+
+        python benchmarks/import_time.py --budget-factor 4
+        python benchmarks/import_time.py --budget-ms 50
+
+@license: MIT License
+================================================================================
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules checked by default and their import time budget in multiples of the bare interpreter
+DEFAULT_BUDGETS = {
+    'batterycalc.engine': 5.0,
+    'calculator': 7.0,
+}
+
+# Modules that must not be loaded by importing the modules above
+FORBIDDEN_MODULES = ('tkinter', '_tkinter', 'numpy', 'sqlite3', 'concurrent.futures', 'multiprocessing')
+
+## @brief Imports a module in a fresh interpreter and measures it.
+#  @param module Module name.
+#  @return Tuple of the cumulative import time in ms and the forbidden modules that were loaded.
+def measure_import(module):
+    """Imports a module in a fresh interpreter and returns its import time and loaded forbidden modules."""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module and not parts[2].startswith('  '):
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    loaded = [name for name in result.stdout.strip().split(',') if name]
+    return cumulative_us / 1000.0, loaded
+
+## @brief Measures the imports of a bare interpreter, the unit of the budgets.
+#  @return Total import time of the interpreter startup in ms.
+def measure_baseline():
+    """Returns the total time of the imports done by a bare interpreter at startup."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        # Only top-level imports, their cumulative time includes the nested ones
+        if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith('  '):
+            total_us += int(parts[1])
+    return total_us / 1000.0
+
+## @brief Command line entry point.
+#  @param argv Command line arguments, defaults to sys.argv[1:].
+#  @return Process exit code, 1 if a budget is exceeded.
+def main(argv=None):
+    """Measures the import times and compares them with the budgets."""
+    parser = argparse.ArgumentParser(description="Checks the import time budget of the calculation core.")
+    parser.add_argument('modules', nargs='*', help="modules to check (default: %(default)s)",
+                        default=list(DEFAULT_BUDGETS))
+    parser.add_argument('--budget-factor', type=float,
+                        help="budget for all modules in multiples of the bare interpreter instead of the defaults")
+    parser.add_argument('--budget-ms', type=float, help="absolute budget for all modules in milliseconds")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per module, the fastest one counts")
+    args = parser.parse_args(argv)
+
+    baseline = min(measure_baseline() for _ in range(max(args.repeat, 1)))
+    print(f"baseline (bare interpreter): {baseline:.1f} ms")
+    failed = False
+    for module in args.modules:
+        budget = args.budget_ms or baseline * (args.budget_factor or DEFAULT_BUDGETS.get(module, 5.0))
+        runs = [measure_import(module) for _ in range(max(args.repeat, 1))]
+        best = min(ms for ms, _ in runs)
+        loaded = sorted({name for _, names in runs for name in names})
+        ok = best <= budget and not loaded
+        failed |= not ok
+        line = f"{'ok  ' if ok else 'FAIL'} {module}: {best:.1f} ms (budget {budget:.1f} ms)"
+        if loaded:
+            line += f", loads {', '.join(loaded)}"
+        print(line)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,8 +12,12 @@ setup(
     long_description_content_type='text/markdown',  
     author='MootSeeker',  
     author_email='mootseeker98@gmail.com', 
-    packages=find_packages(),  
+    packages=find_packages(exclude=['tests', 'tests.*']),
+    py_modules=['calculator'],
     install_requires=[],  
+    extras_require={
+        'sweep': ['numpy'],
+    },
     entry_points={
         'console_scripts': [
             'batteryCalculator = calculator:main',  
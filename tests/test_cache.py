@@ -0,0 +1,91 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_cache.py
+@brief: Tests of the runtime cache.
+
+@license: MIT License
+================================================================================
+"""
+
+import pytest
+
+from batterycalc import engine
+from batterycalc.cache import ChunkCache, RuntimeCache
+from batterycalc.engine import MODES, Scenario
+from batterycalc.parallel import calculate_chunk
+
+def test_nearby_inputs_do_not_share_an_entry():
+    cache = RuntimeCache()
+    assert cache.calculate_runtime(1.0, 0.1, 0.0) == engine.calculate_runtime(1.0, 0.1, 0.0)
+    # Within 12 significant digits of 0.1, but one hour longer
+    assert cache.calculate_runtime(1.0, 0.09999999999999, 0.0) == engine.calculate_runtime(1.0, 0.09999999999999, 0.0)
+    assert cache.stats()['misses'] == 2
+
+def test_positional_and_keyword_calls_share_an_entry():
+    cache = RuntimeCache()
+    first = cache.calculate_battery_life_sleep_mode(3.7, 3500, 0.25, 3.45, 0.05)
+    assert cache.calculate_battery_life_sleep_mode(3.7, 3500, 0.25, consumer_voltage=3.45) == first
+    assert cache.stats()['hits'] == 1
+
+def test_results_equal_the_engine():
+    cache = RuntimeCache()
+    for mode in MODES:
+        for current in (1.0, 4.5, 100.0):
+            scenario = Scenario(consumer_current=current)
+            assert cache.calculate_scenario(scenario, mode) == engine.calculate_scenario(scenario, mode)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RuntimeCache(maxsize=2)
+    cache.calculate_runtime(1.0, 0.1, 0.0)
+    cache.calculate_runtime(1.0, 0.2, 0.0)
+    cache.calculate_runtime(1.0, 0.1, 0.0)
+    cache.calculate_runtime(1.0, 0.3, 0.0)
+    cache.calculate_runtime(1.0, 0.1, 0.0)
+    assert len(cache) == 2
+    assert cache.stats()['hits'] == 2
+
+def test_solver_argument_is_rejected():
+    with pytest.raises(TypeError, match='does not accept a solver'):
+        RuntimeCache().calculate_battery_life_sleep_mode(3.7, 3500, 0.25, 3.45, solver=engine.calculate_runtime)
+
+def test_on_disk_store_keeps_exact_results(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = RuntimeCache(path=path)
+    cache.calculate_runtime(1.0, 0.1, 0.0)
+    cache.close()
+    cache = RuntimeCache(path=path)
+    assert cache.calculate_runtime(1.0, 0.1, 0.0) == engine.calculate_runtime(1.0, 0.1, 0.0)
+    assert cache.calculate_runtime(1.0, 0.09999999999999, 0.0) == engine.calculate_runtime(1.0, 0.09999999999999, 0.0)
+    assert cache.stats()['disk_hits'] == 1
+    cache.close()
+
+def test_chunk_cache_renumbers_equal_chunks():
+    scenarios = [Scenario(consumer_current=c) for c in (1.0, 4.5, 100.0)]
+    scenarios[1].power_consumption_sleep_mode = -1.0
+    cache = ChunkCache()
+    first = calculate_chunk(list(enumerate(scenarios, 1)), MODES, cache)
+    assert first == calculate_chunk(list(enumerate(scenarios, 1)), MODES)
+    assert first[1] and first[1][0][0] == 2
+    again = calculate_chunk(list(enumerate(scenarios, 11)), MODES, cache)
+    assert again == calculate_chunk(list(enumerate(scenarios, 11)), MODES)
+    assert cache.stats()['hits'] == 1
+
+def test_chunk_cache_keys_on_exact_inputs_and_modes():
+    cache = ChunkCache()
+    calculate_chunk([(1, Scenario(power_consumption_sleep_mode=0.1))], MODES, cache)
+    calculate_chunk([(1, Scenario(power_consumption_sleep_mode=0.09999999999999))], MODES, cache)
+    calculate_chunk([(1, Scenario(power_consumption_sleep_mode=0.1))], MODES[:1], cache)
+    assert cache.stats()['misses'] == 3
+
+def test_chunk_cache_on_disk_store(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    chunk = [(number, Scenario(consumer_current=number / 4)) for number in range(1, 50)]
+    cache = ChunkCache(path=path)
+    expected = calculate_chunk(chunk, MODES, cache)
+    cache.close()
+    cache = ChunkCache(path=path)
+    assert calculate_chunk(chunk, MODES, cache) == expected
+    assert cache.stats()['disk_hits'] == 1
+    cache.close()
@@ -0,0 +1,69 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_cli.py
+@brief: Tests of the headless batch mode.
+
+@license: MIT License
+================================================================================
+"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from batterycalc.cli import build_parser, read_records, run_batch, scenario_from_record
+from batterycalc.engine import ALWAYS_ON_MODE
+
+def records_from_text(fmt, text):
+    return list(read_records(io.StringIO(text), fmt))
+
+def records(fmt, value):
+    if fmt == 'csv':
+        return records_from_text(fmt, f"battery_capacity_mah\n{value}\n")
+    return records_from_text(fmt, json.dumps({'battery_capacity_mah': value}) + "\n")
+
+def run(*argv):
+    return run_batch(build_parser().parse_args(argv))
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+@pytest.mark.parametrize('value', [1000, 1000.0])
+def test_whole_numbers_are_accepted(fmt, value):
+    assert scenario_from_record(records(fmt, value)[0]).battery_capacity_mah == 1000
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+@pytest.mark.parametrize('value', [1000.5, 1000.7])
+def test_fractional_integer_fields_are_rejected(fmt, value):
+    with pytest.raises(ValueError, match='battery_capacity_mah must be a whole number'):
+        scenario_from_record(records(fmt, value)[0])
+
+def test_float_fields_keep_their_value():
+    assert scenario_from_record({'battery_voltage': '3.65'}).battery_voltage == 3.65
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError, match='Unknown scenario field'):
+        scenario_from_record({'battery_capacity': '1000'})
+
+@pytest.mark.parametrize('line, message', [
+    ('[1]', 'must hold an object, got list'),
+    ('null', 'must hold an object, got NoneType'),
+    ('{"battery_capacity_mah": 1000', 'Invalid JSON'),
+])
+def test_invalid_jsonl_lines_fail_their_own_scenario(line, message):
+    with pytest.raises(ValueError, match=message):
+        scenario_from_record(records_from_text('jsonl', line + "\n")[0])
+
+def test_batch_mode_reports_invalid_lines_and_keeps_the_others(tmp_path, capsys):
+    path = tmp_path / 'scenarios.jsonl'
+    path.write_text('{"consumer_current": 4.5}\n[1]\nnot json\n{"consumer_current": 10.0}\n{"power_consumption_always_on": -100}\n'
+                    '{"consumer_current": 1.0}\nnull\n', encoding='utf-8')
+    output = tmp_path / 'results.csv'
+    assert run(str(path), '-o', str(output), '--mode', ALWAYS_ON_MODE, '--chunk-size', '2') == 1
+    assert [row['scenario'] for row in csv.DictReader(io.StringIO(output.read_text(encoding='utf-8')))] == ['1', '4', '6']
+    errors = capsys.readouterr().err.splitlines()
+    assert [line.split(':')[0] for line in errors] == ['Scenario 2', 'Scenario 3', 'Scenario 5', 'Scenario 7']
+    assert errors[0].startswith('Scenario 2: A JSONL line must hold an object')
+    assert errors[1].startswith('Scenario 3: Invalid JSON')
@@ -0,0 +1,59 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_discharge.py
+@brief: Tests of the battery discharge-curve profiles.
+
+@license: MIT License
+================================================================================
+"""
+
+import os
+
+import pytest
+
+from batterycalc.cache import RuntimeCache
+from batterycalc.discharge import PROFILES, compile_profile, load_profile, usable_energy_wh
+from batterycalc.engine import IDEAL_PROFILE, MODES, SLEEP_MODE, Scenario, calculate_scenario
+
+@pytest.mark.parametrize('boosted', [False, True])
+def test_full_flat_curve_reduces_to_ideal(boosted, monkeypatch):
+    # A curve that delivers 100 % of the capacity at the nominal voltage has both factors 1
+    table = compile_profile('flat', 3.7, {25.0: ((0, 3.7), (100, 3.7))})
+    monkeypatch.setattr('batterycalc.discharge._load_profile', lambda key: table)
+    assert usable_energy_wh(3.7, 3500, boosted, 'flat', 25.0) == pytest.approx(3500 / 1000 * 3.7)
+
+@pytest.mark.parametrize('profile', [p for p in PROFILES if p != IDEAL_PROFILE])
+@pytest.mark.parametrize('consumer_voltage', [3.3, 3.45])
+def test_charge_limited_profiles_never_beat_the_ideal_cell(profile, consumer_voltage):
+    # Without the booster only the delivered charge counts, which never exceeds the nominal capacity
+    for mode in MODES:
+        ideal = calculate_scenario(Scenario(consumer_voltage=consumer_voltage), mode)
+        curve = calculate_scenario(Scenario(consumer_voltage=consumer_voltage, battery_profile=profile), mode)
+        assert curve[1] <= ideal[1], (profile, mode)
+
+def write_curve(path, capacity_percent, mtime_ns):
+    path.write_text(f"capacity_percent,voltage\n0,3.7\n{capacity_percent},3.7\n")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_edited_csv_profile_is_reloaded(tmp_path):
+    path = tmp_path / 'cell.csv'
+    write_curve(path, 100, 10 ** 18)
+    assert load_profile(str(path)).charge_factors == (1.0,)
+    write_curve(path, 50, 2 * 10 ** 18)
+    assert load_profile(str(path)).charge_factors == (0.5,)
+
+def test_runtime_cache_keys_csv_profiles_on_their_version(tmp_path):
+    path = tmp_path / 'cell.csv'
+    scenario = Scenario(battery_profile=str(path))
+    write_curve(path, 100, 10 ** 18)
+    cache = RuntimeCache(path=str(tmp_path / 'cache.db'))
+    full = cache.calculate_scenario(scenario, SLEEP_MODE)
+    cache.close()
+
+    write_curve(path, 50, 2 * 10 ** 18)
+    cache = RuntimeCache(path=str(tmp_path / 'cache.db'))
+    assert cache.calculate_scenario(scenario, SLEEP_MODE) == calculate_scenario(scenario, SLEEP_MODE) != full
+    assert cache.stats()['disk_hits'] == 0
+    cache.close()
@@ -0,0 +1,51 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_dutycycle.py
+@brief: Tests of the event-driven duty-cycle simulator.
+
+@license: MIT License
+================================================================================
+"""
+
+import pytest
+
+from batterycalc import dutycycle
+from batterycalc.dutycycle import Task, simulate, simulate_log_mode
+from batterycalc.engine import calculate_battery_life_log_mode
+
+@pytest.mark.parametrize('wakeup_interval_s', [1, 10, 60, 600, 3600])
+def test_log_mode_matches_engine_when_the_interval_divides_an_hour(wakeup_interval_s):
+    args = (3.7, 3500, 0.3, 2.5, 10.0, 3.45, wakeup_interval_s, 150, 50)
+    result = simulate_log_mode(*args)
+    assert (result.runtime_minutes, result.runtime_hours, result.runtime_days) == calculate_battery_life_log_mode(*args)
+
+def test_schedule_with_a_day_long_hyperperiod_is_exact():
+    result = simulate(3.7, 3500, 3.45, 0.3, [Task('Sample', 60, 1.0, 5.0), Task('Uplink', 900, 2.0, 50.0)])
+    assert result.hyperperiod_s == 86400
+    assert result.runtime_error_s == 0.0
+
+@pytest.mark.parametrize('periods', [(61, 59), (7, 13)])
+def test_schedules_that_never_line_up_are_averaged(periods):
+    tasks = [Task('A', periods[0], 0.5, 5.0), Task('B', periods[1], 1.0, 5.0)]
+    result = simulate(3.7, 3500, 3.45, 0.3, tasks)
+    assert result.events_per_hyperperiod > dutycycle.MAX_EVENTS_PER_HYPERPERIOD
+    assert 0.0 < result.runtime_error_s < 60.0
+    assert result.trace[0] == (0.0, 1.0) and result.trace[-1][1] == pytest.approx(0.0, abs=1e-9)
+
+@pytest.mark.parametrize('tasks', [
+    [Task('A', 7, 0.5, 5.0), Task('B', 60, 1.0, 5.0)],
+    [Task('A', 7, 2.0, 50.0), Task('B', 60, 1.0, 5.0)],
+])
+def test_averaged_runtime_is_within_its_error_bound(tasks, monkeypatch):
+    monkeypatch.setattr(dutycycle, 'MAX_EVENTS_PER_HYPERPERIOD', 10 ** 6)
+    exact = simulate(3.7, 3500, 3.45, 0.3, tasks)
+    assert exact.runtime_error_s == 0.0
+    monkeypatch.setattr(dutycycle, 'MAX_EVENTS_PER_HYPERPERIOD', 0)
+    averaged = simulate(3.7, 3500, 3.45, 0.3, tasks)
+    assert abs(averaged.runtime_seconds - exact.runtime_seconds) <= averaged.runtime_error_s
+
+def test_invalid_task_raises():
+    with pytest.raises(ValueError, match='positive period'):
+        simulate(3.7, 3500, 3.45, 0.3, [Task('A', 0, 1.0, 5.0)])
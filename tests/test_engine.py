@@ -0,0 +1,109 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_engine.py
+@brief: Equivalence tests of the closed-form runtime solver against the loop.
+
+@details:
+    The hour-by-hour loop is the reference implementation. The closed form
+    must return the same runtime on random inputs and on the edge cases the
+    loop handles specially. Hour-boundary cases use values that are exact in
+    binary floating point, so the loop accumulates no rounding error there.
+
+@license: MIT License
+================================================================================
+"""
+
+import random
+from functools import partial
+
+import pytest
+
+from batterycalc.engine import (HOURS_PER_DAY, MAX_RUNTIME_HOURS, MODES, Scenario, calculate_runtime,
+                                calculate_scenario)
+
+loop_solver = partial(calculate_runtime, method='loop')
+
+## @brief Random solver inputs with runtimes of up to a few thousand hours, so the loop stays fast.
+def random_runtime_inputs(count, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        energy = rng.uniform(0.01, 20.0)
+        hours = 10 ** rng.uniform(0, 3.7)
+        power = energy / hours * rng.uniform(0.5, 1.5)
+        self_discharge = rng.choice((0.0, rng.uniform(0.0, 1.0), rng.uniform(0.0, 20.0)))
+        yield energy, power, self_discharge
+
+## @brief Random scenarios around the GUI defaults.
+def random_scenarios(count, seed=2):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield Scenario(
+            battery_voltage=rng.uniform(1.2, 4.2),
+            battery_capacity_mah=rng.randint(100, 5000),
+            power_consumption_always_on=rng.uniform(1.0, 80.0),
+            power_consumption_log_sleep=rng.uniform(0.01, 1.0),
+            power_consumption_log_on=rng.uniform(0.5, 10.0),
+            power_consumption_sleep_mode=rng.uniform(0.5, 5.0),
+            consumer_current=rng.choice((1.0, 4.5, 10.0, 100.0)),
+            consumer_voltage=rng.choice((3.3, 3.45, 5.0)),
+            booster_efficiency=rng.uniform(0.5, 1.0),
+            wakeup_interval_s=rng.choice((1, 10, 60, 600, 3600)),
+            consumer_activation_time_ms=rng.randint(0, 500),
+            processing_time_ms=rng.randint(0, 200),
+            self_discharge_percent=rng.uniform(0.0, 1.0),
+        )
+
+def test_closed_form_matches_loop_on_random_inputs():
+    for args in random_runtime_inputs(20000):
+        assert calculate_runtime(*args) == calculate_runtime(*args, method='loop'), args
+
+@pytest.mark.parametrize('energy', [0.0, -1.0])
+def test_empty_battery_has_no_runtime(energy):
+    for method in ('closed_form', 'loop'):
+        assert calculate_runtime(energy, 0.5, 0.05, method=method) == (0, 0, 0)
+
+@pytest.mark.parametrize('power', [0.0, -0.5, float('nan')])
+def test_zero_or_negative_power_raises(power):
+    for method in ('closed_form', 'loop'):
+        with pytest.raises(ValueError, match='greater than 0 W'):
+            calculate_runtime(10.0, power, 0.05, method=method)
+
+def test_self_discharge_cancelling_the_load_raises():
+    # 24 h * 0.1 W = 2.4 Wh per day against -5 Wh of self-discharge per day
+    for method in ('closed_form', 'loop'):
+        with pytest.raises(ValueError, match='never runs out'):
+            calculate_runtime(10.0, 0.1, -50.0, method=method)
+
+@pytest.mark.parametrize('power', [1e-20, 1e-30, 5e-324])
+def test_tiny_power_raises_instead_of_hanging(power):
+    for method in ('closed_form', 'loop'):
+        with pytest.raises(ValueError, match='too small'):
+            calculate_runtime(1.0, power, 0.0, method=method)
+
+def test_runtime_up_to_the_limit_is_resolved():
+    runtime_hours = calculate_runtime(12.95, 12.95 / 2 ** 52, 0.0)[1]
+    assert runtime_hours == 2 ** 52 <= MAX_RUNTIME_HOURS
+
+@pytest.mark.parametrize('energy, power, self_discharge, hours', [
+    (10.0, 0.5, 0.0, 20),     # empties exactly at the end of hour 20
+    (12.0, 0.5, 0.0, 24),     # ... at the end of the first day
+    (8.0, 0.25, 25.0, 24),    # ... by the self-discharge step at the end of the first day
+    (8.0, 0.25, 12.5, 28),    # self-discharge of 1 Wh after the first day, then 4 more hours
+    (0.25, 0.5, 0.0, 1),      # less than one hour of energy
+    (0.5, 0.5, 0.0, 1),       # exactly one hour of energy
+])
+def test_hour_boundaries(energy, power, self_discharge, hours):
+    for method in ('closed_form', 'loop'):
+        minutes, runtime_hours, days = calculate_runtime(energy, power, self_discharge, method=method)
+        assert (minutes, runtime_hours, days) == (hours * 60, hours, hours / HOURS_PER_DAY)
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError, match='Unknown runtime method'):
+        calculate_runtime(10.0, 0.5, 0.05, method='bisect')
+
+def test_modes_match_loop():
+    for scenario in random_scenarios(500):
+        for mode in MODES:
+            assert calculate_scenario(scenario, mode) == calculate_scenario(scenario, mode, solver=loop_solver), (scenario, mode)
@@ -0,0 +1,88 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_export.py
+@brief: Tests of the export of result sets.
+
+@license: MIT License
+================================================================================
+"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from batterycalc.engine import ALWAYS_ON_MODE, LOG_MODE, SLEEP_MODE
+from batterycalc.export import (ExportTooLargeError, export_results, format_from_path, serialize_results,
+                                write_results)
+from batterycalc.results import ResultSet
+from batterycalc.table import COLUMNS, format_row
+
+def make_results(count=5):
+    results = ResultSet()
+    modes = (ALWAYS_ON_MODE, LOG_MODE, SLEEP_MODE)
+    for i in range(count):
+        results.append(modes[i % 3], f"Probe {i % 2}", 1.5 * i, 3.45, 600 * i, 10 * i, 10 * i / 24)
+    return results
+
+def parse(text, fmt):
+    if fmt == 'jsonl':
+        return [json.loads(line) for line in text.splitlines()]
+    return list(csv.reader(io.StringIO(text), delimiter='\t' if fmt == 'tsv' else ','))
+
+@pytest.mark.parametrize('fmt', ['csv', 'tsv'])
+def test_raw_rows_with_header(fmt):
+    results = make_results()
+    stream = io.StringIO()
+    assert write_results(stream, results, fmt) == len(results)
+    header, *rows = parse(stream.getvalue(), fmt)
+    assert header == list(ResultSet.FIELDS)
+    assert rows == [[str(value) for value in row] for row in results]
+
+@pytest.mark.parametrize('fmt', ['csv', 'tsv'])
+def test_formatted_rows_without_header(fmt):
+    results = make_results()
+    rows = parse(serialize_results(results, fmt, formatted=True), fmt)
+    assert rows == [list(format_row(row)) for row in results]
+
+def test_jsonl_rows():
+    results = make_results()
+    assert parse(serialize_results(results, 'jsonl', formatted=False), 'jsonl') == \
+        [dict(zip(ResultSet.FIELDS, row)) for row in results]
+    assert parse(serialize_results(results, 'jsonl', formatted=True), 'jsonl') == \
+        [dict(zip(COLUMNS, format_row(row))) for row in results]
+
+def test_rows_follow_the_order():
+    results = make_results()
+    order = [4, 0, 2]
+    rows = parse(serialize_results(results, 'csv', formatted=False, order=order), 'csv')
+    assert rows == [[str(value) for value in results[i]] for i in order]
+
+def test_chunks_are_joined_without_gaps(monkeypatch):
+    monkeypatch.setattr('batterycalc.export.EXPORT_CHUNK_SIZE', 2)
+    results = make_results(7)
+    assert serialize_results(results, 'tsv') == ''.join('\t'.join(format_row(row)) + '\n' for row in results)
+
+def test_size_limit():
+    results = make_results(100)
+    text = serialize_results(results, 'tsv')
+    assert serialize_results(results, 'tsv', max_chars=len(text)) == text
+    with pytest.raises(ExportTooLargeError):
+        serialize_results(results, 'tsv', max_chars=len(text) - 1)
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match='Unknown export format'):
+        serialize_results(make_results(), 'xlsx')
+
+def test_export_to_file(tmp_path):
+    results = make_results()
+    path = tmp_path / 'results.jsonl'
+    assert export_results(str(path), results) == len(results)
+    assert parse(path.read_text(encoding='utf-8'), 'jsonl') == [dict(zip(ResultSet.FIELDS, row)) for row in results]
+
+@pytest.mark.parametrize('path, fmt', [('a.csv', 'csv'), ('a.TSV', 'tsv'), ('a.txt', 'tsv'), ('a.ndjson', 'jsonl'), ('a', 'csv')])
+def test_format_from_path(path, fmt):
+    assert format_from_path(path) == fmt
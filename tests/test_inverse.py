@@ -0,0 +1,48 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_inverse.py
+@brief: Tests of the inverse design queries.
+
+@details:
+    Skipped when NumPy is not installed.
+
+@license: MIT License
+================================================================================
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from batterycalc.engine import ALWAYS_ON_MODE, LOG_MODE, SLEEP_MODE, Scenario, calculate_scenario
+from batterycalc.inverse import solve
+
+def test_minimum_capacity_reaches_the_target():
+    capacity = int(solve(LOG_MODE, 'battery_capacity_mah', target_days=365))
+    assert calculate_scenario(Scenario(battery_capacity_mah=capacity), LOG_MODE)[2] >= 365
+    assert calculate_scenario(Scenario(battery_capacity_mah=capacity - 1), LOG_MODE)[2] < 365
+
+def test_maximum_current_reaches_the_target():
+    current = float(solve(ALWAYS_ON_MODE, 'consumer_current', target_days=1))
+    assert calculate_scenario(Scenario(consumer_current=current), ALWAYS_ON_MODE)[2] >= 1
+    assert calculate_scenario(Scenario(consumer_current=current * 1.01), ALWAYS_ON_MODE)[2] < 1
+
+def test_zero_device_power_does_not_fail():
+    # At consumer current 0 the device draws no power at all, which meets any target
+    current = float(solve(ALWAYS_ON_MODE, 'consumer_current', target_days=1, power_consumption_always_on=0))
+    assert current > 0
+    assert calculate_scenario(Scenario(consumer_current=current, power_consumption_always_on=0), ALWAYS_ON_MODE)[2] >= 1
+
+def test_unreachable_target_is_nan():
+    assert np.isnan(solve(LOG_MODE, 'battery_capacity_mah', target_days=10**6))
+
+def test_zero_sleep_power_meets_any_target():
+    # Any battery at all, an empty one has no runtime
+    assert solve(SLEEP_MODE, 'battery_capacity_mah', target_days=365, power_consumption_sleep_mode=0) == 1
+
+def test_invalid_inputs_are_nan():
+    assert np.isnan(solve(SLEEP_MODE, 'battery_capacity_mah', target_days=365, power_consumption_sleep_mode=-0.25))
+    # The self-discharge gives back more than the load draws, so the battery never drains
+    assert np.isnan(solve(SLEEP_MODE, 'battery_capacity_mah', target_days=365, self_discharge_percent=-50))
@@ -0,0 +1,108 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_live.py
+@brief: Tests of the incremental live recalculation.
+
+@license: MIT License
+================================================================================
+"""
+
+from dataclasses import asdict, replace
+
+from batterycalc.engine import (ALWAYS_ON_MODE, CONSUMER_NAMES, LOG_MODE, MODES, SLEEP_MODE, Scenario,
+                                calculate_scenario)
+from batterycalc.live import MODE_INPUTS, ROW_INPUTS, LiveCalculator, _FieldRecorder, affected_modes, mode_inputs
+
+CURRENTS = [1.0, 4.5, 10.0, 100.0]
+VOLTAGES = [3.45, 5.0]
+
+def make_inputs(**changes):
+    inputs = {name: value for name, value in asdict(Scenario(**changes)).items() if name not in ROW_INPUTS}
+    inputs['consumer_currents'] = CURRENTS
+    inputs['consumer_voltages'] = VOLTAGES
+    return inputs
+
+def assert_rows_are_fresh(results, inputs):
+    base = Scenario(**{name: value for name, value in inputs.items() if name not in ('consumer_currents', 'consumer_voltages')})
+    assert len(results) > 0
+    for mode, probe, current, voltage, *runtime in results:
+        scenario = replace(base, consumer_current=current, consumer_voltage=voltage)
+        assert probe == scenario.probe
+        assert tuple(runtime) == calculate_scenario(scenario, mode)
+
+def test_field_recorder_records_the_fields_read():
+    recorder = _FieldRecorder()
+    assert recorder.battery_voltage + recorder.temperature_c == 0
+    assert recorder.used == {'battery_voltage', 'temperature_c'}
+
+def test_mode_inputs_follow_the_mode_functions():
+    assert MODE_INPUTS == {mode: mode_inputs(mode) for mode in MODES}
+    assert 'consumer_current' not in MODE_INPUTS[SLEEP_MODE]
+    assert 'wakeup_interval_s' in MODE_INPUTS[LOG_MODE]
+    assert 'wakeup_interval_s' not in MODE_INPUTS[ALWAYS_ON_MODE] | MODE_INPUTS[SLEEP_MODE]
+    assert all(MODE_INPUTS[mode] <= set(asdict(Scenario())) for mode in MODES)
+
+def test_affected_modes():
+    assert affected_modes(['power_consumption_sleep_mode']) == (SLEEP_MODE,)
+    assert affected_modes(['wakeup_interval_s', 'power_consumption_always_on']) == (ALWAYS_ON_MODE, LOG_MODE)
+    assert affected_modes(['battery_capacity_mah']) == MODES
+    assert affected_modes([]) == ()
+
+def test_first_update_calculates_every_row_once():
+    calculator = LiveCalculator()
+    results = calculator.update(make_inputs())
+    assert len(results) == len(CURRENTS) * len(VOLTAGES) * len(MODES)
+    # Sleep Mode does not depend on the consumer current, its rows share one result per voltage
+    assert calculator.recalculated == 2 * len(CURRENTS) * len(VOLTAGES) + len(VOLTAGES)
+    assert_rows_are_fresh(results, make_inputs())
+
+def test_unchanged_inputs_recalculate_nothing():
+    calculator = LiveCalculator()
+    first = calculator.update(make_inputs())
+    assert list(calculator.update(make_inputs())) == list(first)
+    assert calculator.recalculated == 0
+
+def test_wakeup_interval_recalculates_only_log_mode():
+    calculator = LiveCalculator()
+    before = list(calculator.update(make_inputs()))
+    inputs = make_inputs(wakeup_interval_s=600)
+    after = list(calculator.update(inputs))
+    assert calculator.recalculated == len(CURRENTS) * len(VOLTAGES)
+    for old, new in zip(before, after):
+        assert (old == new) == (old[0] != LOG_MODE)
+    assert_rows_are_fresh(after, inputs)
+
+def test_new_consumers_reuse_known_rows():
+    calculator = LiveCalculator()
+    calculator.update(make_inputs())
+    inputs = make_inputs()
+    inputs['consumer_currents'] = CURRENTS + [0.5]
+    results = calculator.update(inputs)
+    assert calculator.recalculated == 2 * len(VOLTAGES)
+    assert_rows_are_fresh(results, inputs)
+
+def test_deselected_modes_and_probes_are_skipped():
+    calculator = LiveCalculator()
+    results = calculator.update(make_inputs(), modes=[LOG_MODE], probes=[CONSUMER_NAMES[4.5]])
+    assert calculator.recalculated == len(VOLTAGES)
+    assert {(row[0], row[1]) for row in results} == {(LOG_MODE, CONSUMER_NAMES[4.5])}
+
+    # Selecting them again calculates only the rows that are missing
+    results = calculator.update(make_inputs())
+    all_rows = 2 * len(CURRENTS) * len(VOLTAGES) + len(VOLTAGES)
+    assert calculator.recalculated == all_rows - len(VOLTAGES)
+    assert len(results) == len(CURRENTS) * len(VOLTAGES) * len(MODES)
+    assert_rows_are_fresh(results, make_inputs())
+
+def test_deselected_stale_rows_are_not_reused():
+    calculator = LiveCalculator()
+    calculator.update(make_inputs())
+    inputs = make_inputs(power_consumption_sleep_mode=1.0)
+    results = calculator.update(inputs, modes=[ALWAYS_ON_MODE, LOG_MODE])
+    assert calculator.recalculated == 0
+    assert SLEEP_MODE not in {row[0] for row in results}
+    results = calculator.update(inputs)
+    assert calculator.recalculated == len(VOLTAGES)
+    assert_rows_are_fresh(results, inputs)
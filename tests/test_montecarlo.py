@@ -0,0 +1,54 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_montecarlo.py
+@brief: Tests of the Monte Carlo tolerance analysis.
+
+@details:
+    Skipped when NumPy is not installed.
+
+@license: MIT License
+================================================================================
+"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from batterycalc.engine import SLEEP_MODE
+from batterycalc.montecarlo import _parse_distribution, main, monte_carlo, normal, tolerance
+
+def test_parse_distribution_with_bounds():
+    assert _parse_distribution('booster_efficiency=normal:0.9,0.02:0.5,0.95') == \
+        ('booster_efficiency', normal(0.9, 0.02, 0.5, 0.95))
+    name, distribution = _parse_distribution('power_consumption_sleep_mode=normal:0.25,0.15:0.05,')
+    assert (distribution.low, distribution.high) == (0.05, math.inf)
+    name, distribution = _parse_distribution('battery_capacity_mah=tolerance:3500,10:,3600')
+    assert distribution.params == tolerance(3500, 10).params and distribution.high == 3600
+
+def test_negative_draws_are_clipped_and_dropped_instead_of_aborting():
+    result = monte_carlo({'power_consumption_sleep_mode': normal(0.25, 0.15)}, probes={'Probe': 1.0},
+                         modes=(SLEEP_MODE,), draws=20_000, batch_size=5_000, seed=1)
+    dropped = result.dropped[SLEEP_MODE, 'Probe']
+    # About 5 % of the draws are negative, clipped to 0 A and dropped
+    assert 0.03 < dropped / 20_000 < 0.07
+    assert result.histograms[SLEEP_MODE, 'Probe'].count == 20_000 - dropped
+    p1, p50, p99 = result.quantiles()[SLEEP_MODE, 'Probe']
+    assert 0 < p1 < p50 < p99
+
+def test_bounds_keep_every_draw():
+    result = monte_carlo({'power_consumption_sleep_mode': normal(0.25, 0.15, low=0.05)}, probes={'Probe': 1.0},
+                         modes=(SLEEP_MODE,), draws=10_000, seed=1)
+    assert result.dropped[SLEEP_MODE, 'Probe'] == 0
+
+def test_same_seed_same_result():
+    inputs = {'battery_capacity_mah': tolerance(3500, 10)}
+    first = monte_carlo(inputs, draws=5_000, batch_size=1_000, seed=7).quantiles()
+    assert monte_carlo(inputs, draws=5_000, batch_size=1_000, seed=7).quantiles() == first
+
+def test_command_line_accepts_unbounded_normal_current(capsys):
+    assert main(['-n', '2000', '--mode', SLEEP_MODE, '-d', 'power_consumption_sleep_mode=normal:0.25,0.15']) == 0
+    assert 'Dropped' in capsys.readouterr().out
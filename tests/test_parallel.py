@@ -0,0 +1,60 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_parallel.py
+@brief: Tests of the multi-core execution of scenario sets.
+
+@license: MIT License
+================================================================================
+"""
+
+from dataclasses import replace
+
+import pytest
+
+from batterycalc.engine import MODES, SLEEP_MODE
+from batterycalc.parallel import ParallelStats, calculate_chunk, run_parallel
+from tests.test_engine import random_scenarios
+
+def numbered_scenarios(count=25):
+    scenarios = list(random_scenarios(count, seed=4))
+    # Invalid scenarios, reported as errors instead of rows
+    scenarios[6] = replace(scenarios[6], power_consumption_sleep_mode=-0.25)
+    scenarios[17] = replace(scenarios[17], power_consumption_always_on=-1e6)
+    return list(enumerate(scenarios, 1))
+
+def collect(chunks):
+    rows, errors = [], []
+    for chunk_rows, chunk_errors in chunks:
+        rows.extend(chunk_rows)
+        errors.extend(chunk_errors)
+    return rows, errors
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 7, 25, 100])
+def test_results_do_not_depend_on_the_worker_count(chunk_size):
+    scenarios = numbered_scenarios()
+    expected = calculate_chunk(scenarios)
+    assert [number for number, _ in expected[1]] == [7, 18]
+    for workers in (1, 2):
+        stats = ParallelStats()
+        assert collect(run_parallel(scenarios, workers=workers, chunk_size=chunk_size, stats=stats)) == expected
+        assert stats.scenarios == len(scenarios)
+
+def test_cached_chunks_give_the_same_results(tmp_path):
+    scenarios = numbered_scenarios()
+    expected = calculate_chunk(scenarios)
+    cache_config = (4, str(tmp_path / 'cache.db'))
+    for workers in (1, 2, 1):
+        assert collect(run_parallel(scenarios, workers=workers, chunk_size=7, cache_config=cache_config)) == expected
+
+def test_chunks_are_returned_in_input_order():
+    chunks = list(run_parallel(numbered_scenarios(), modes=(SLEEP_MODE,), workers=2, chunk_size=4))
+    numbers = [row[0] for rows, _ in chunks for row in rows]
+    assert numbers == sorted(numbers)
+    assert len(chunks) == 7
+
+@pytest.mark.parametrize('chunk_size, workers', [(0, 1), (1, -1)])
+def test_invalid_settings_are_rejected(chunk_size, workers):
+    with pytest.raises(ValueError):
+        list(run_parallel(numbered_scenarios(), MODES, workers=workers, chunk_size=chunk_size))
@@ -0,0 +1,75 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_sweep.py
+@brief: Row-for-row equivalence of the NumPy sweep with the scalar engine.
+
+@details:
+    Skipped when NumPy is not installed.
+
+@license: MIT License
+================================================================================
+"""
+
+from dataclasses import asdict
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from batterycalc.discharge import PROFILES
+from batterycalc import engine
+from batterycalc.engine import MODES, SLEEP_MODE, Scenario, calculate_scenario
+from batterycalc.sweep import INVALID_RUNTIME, UNBOUNDED_RUNTIME, calculate_runtime, grid, sweep
+
+from tests.test_engine import random_runtime_inputs, random_scenarios
+
+def test_runtime_matches_scalar_solver():
+    energy, power, self_discharge = map(np.array, zip(*random_runtime_inputs(20000)))
+    minutes, hours, days = calculate_runtime(energy, power, self_discharge)
+    for i, args in enumerate(zip(energy, power, self_discharge)):
+        assert (minutes[i], hours[i], days[i]) == engine.calculate_runtime(*args), args
+
+@pytest.mark.parametrize('profile', PROFILES)
+def test_sweep_matches_engine(profile):
+    scenarios = [Scenario(**{**asdict(s), 'battery_profile': profile, 'temperature_c': t})
+                 for s, t in zip(random_scenarios(2000), np.random.default_rng(3).uniform(-40, 85, 2000))]
+    columns = {name: np.array([getattr(s, name) for s in scenarios]) for name in asdict(scenarios[0])}
+    columns['battery_profile'] = profile
+    results = sweep(**columns)
+    for mode in MODES:
+        minutes, hours, days = results[mode]
+        for i, scenario in enumerate(scenarios):
+            assert (minutes[i], hours[i], days[i]) == calculate_scenario(scenario, mode), (scenario, mode)
+
+def test_sweep_accepts_an_array_of_profiles():
+    profiles = np.array(PROFILES * 3)
+    temperatures = np.repeat([-10.0, 25.0, 50.0], len(PROFILES))
+    _, hours, _ = sweep(modes=(SLEEP_MODE,), battery_profile=profiles, temperature_c=temperatures)[SLEEP_MODE]
+    for i, (profile, temperature) in enumerate(zip(profiles, temperatures)):
+        expected = calculate_scenario(Scenario(battery_profile=str(profile), temperature_c=temperature), SLEEP_MODE)
+        assert hours[i] == expected[1]
+
+def test_grid_is_the_cartesian_product():
+    params = grid(battery_capacity_mah=[500, 1000], wakeup_interval_s=[10, 60, 600])
+    assert list(zip(params['battery_capacity_mah'], params['wakeup_interval_s'])) == [
+        (500, 10), (500, 60), (500, 600), (1000, 10), (1000, 60), (1000, 600)]
+
+@pytest.mark.parametrize('power, message', [(0.0, 'greater than 0 W'), (1e-30, 'too small')])
+def test_invalid_power_raises(power, message):
+    with pytest.raises(ValueError, match=message):
+        calculate_runtime([1.0, 1.0], [0.5, power], 0.0)
+
+def test_unknown_input_raises():
+    with pytest.raises(TypeError, match='Unknown sweep inputs'):
+        sweep(battery_capacity=1000)
+
+def test_mask_marks_invalid_rows():
+    minutes, hours, days = calculate_runtime([1.0, 1.0, 1.0, 0.0, 1.0, 1.0], [0.5, 0.0, 1e-30, 0.0, -0.5, 0.01],
+                                             [0.0, 0.0, 0.0, 0.0, 0.0, -100.0], errors='mask')
+    assert hours.tolist() == [2, UNBOUNDED_RUNTIME, UNBOUNDED_RUNTIME, 0, INVALID_RUNTIME, INVALID_RUNTIME]
+
+def test_mask_accepts_scalar_inputs():
+    assert calculate_runtime(1.0, 0.0, 0.0, errors='mask')[1] == UNBOUNDED_RUNTIME
+    assert calculate_runtime(1.0, -1.0, 0.0, errors='mask')[1] == INVALID_RUNTIME
@@ -0,0 +1,107 @@
+"""
+================================================================================
+Battery Life Calculator Tests
+--------------------------------------------------------------------------------
+@file: test_table.py
+@brief: Tests of the result store and the result table model.
+
+@license: MIT License
+================================================================================
+"""
+
+import random
+
+import pytest
+
+from batterycalc.engine import ALWAYS_ON_MODE, LOG_MODE, MODES, SLEEP_MODE
+from batterycalc.results import ResultIndex, ResultSet
+from batterycalc.table import COLUMN_FIELDS, COLUMNS, ResultTableModel
+
+PROBES = ('Probe A', 'Probe B', 'Probe C')
+
+def make_results(count, seed=0):
+    rng = random.Random(seed)
+    results = ResultSet()
+    for _ in range(count):
+        # Few distinct values, so every column has ties
+        hours = rng.randint(1, 40)
+        results.append(rng.choice(MODES), rng.choice(PROBES), rng.choice((1.0, 4.5, 10.0, 100.0)),
+                       rng.choice((3.45, 5.0)), hours * 60, hours, hours / 24)
+    return results
+
+def batches(results, size):
+    return [results[start:start + size] for start in range(0, len(results), size)]
+
+def test_take_and_slicing_keep_the_rows():
+    results = make_results(20)
+    rows = list(results)
+    assert list(results[5:9]) == rows[5:9]
+    assert list(results[::-3]) == rows[::-3]
+    assert list(results.take([7, 2, 2])) == [rows[7], rows[2], rows[2]]
+    assert results[-1] == rows[-1]
+
+def test_extend_recodes_probes():
+    first = ResultSet()
+    first.append(SLEEP_MODE, 'Probe B', 1.0, 3.45, 60, 1, 1 / 24)
+    second = ResultSet()
+    second.append(LOG_MODE, 'Probe A', 4.5, 5.0, 120, 2, 2 / 24)
+    second.append(SLEEP_MODE, 'Probe B', 1.0, 3.45, 60, 1, 1 / 24)
+    first.extend(second)
+    assert [row[1] for row in first] == ['Probe B', 'Probe A', 'Probe B']
+
+def test_index_select_matches_a_scan():
+    results = make_results(300)
+    index = ResultIndex(results)
+    for modes, probes in [(None, None), ([LOG_MODE], None), (None, ['Probe C']), ([ALWAYS_ON_MODE, SLEEP_MODE], ['Probe A'])]:
+        assert index.select(modes, probes) == results.select(modes, probes)
+    assert index.select([LOG_MODE], start=150) == [i for i in results.select([LOG_MODE]) if i >= 150]
+
+def test_sort_is_numeric():
+    results = ResultSet()
+    for current in (10.0, 9.0, 100.0, 1.0):
+        results.append(ALWAYS_ON_MODE, 'Probe A', current, 3.45, 60, 1, 1 / 24)
+    model = ResultTableModel()
+    model.extend(results)
+    model.sort('Power Consumption')
+    assert [model.rows.current_ma[i] for i in model.order] == [1.0, 9.0, 10.0, 100.0]
+    model.sort('Power Consumption', reverse=True)
+    assert [model.rows.current_ma[i] for i in model.order] == [100.0, 10.0, 9.0, 1.0]
+
+def test_select_after_extend():
+    results = make_results(200)
+    model = ResultTableModel()
+    model.select([LOG_MODE], ['Probe B'])
+    for batch in batches(results, 30):
+        model.extend(batch)
+    assert model.order == results.select([LOG_MODE], ['Probe B'])
+    model.select()
+    assert model.order == list(range(len(results)))
+
+@pytest.mark.parametrize('column', COLUMNS)
+@pytest.mark.parametrize('reverse', [False, True])
+def test_extend_while_sorted_equals_a_full_sort(column, reverse):
+    results = make_results(500, seed=len(column))
+    model = ResultTableModel()
+    model.select(None, ['Probe A', 'Probe C'])
+    # Ties keep the order of the previous sort, new rows go after them
+    model.sort('Mode')
+    model.sort(column, reverse)
+    for batch in batches(results, 37):
+        model.extend(batch)
+
+    expected = ResultTableModel()
+    expected.extend(results)
+    expected.select(None, ['Probe A', 'Probe C'])
+    expected.sort(column, reverse)
+    assert list(model.order) == expected.order
+    values = results.column(COLUMN_FIELDS[column])
+    assert [values[i] for i in model.order] == sorted((values[i] for i in model.order), reverse=reverse)
+
+def test_window_formats_the_rows_in_view_order():
+    results = make_results(10)
+    model = ResultTableModel()
+    model.extend(results)
+    model.sort('Runtime [min]', reverse=True)
+    window = model.window(2, 3)
+    assert len(window) == 3
+    assert window == list(model.iter_formatted())[2:5]